@@ -12,8 +12,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from app.config import Config
-from app.utils.db import init_db
-from app.middleware.auth_middleware import init_auth_middleware
+from app.utils.db import init_db, get_pool_stats, get_readiness
+from app.utils.query_audit import init_query_audit
+from app.utils.cache import init_user_cache, init_token_versions, init_token_cache, get_cache_stats
+from app.utils.password_helper import init_password_hashing, get_password_pool_stats
+from app.utils.write_behind import init_write_behind, get_write_behind_stats
+from app.middleware.auth_middleware import init_auth_middleware, require_admin
 from app.middleware.error_handler import init_error_handler
 from app.middleware.cors_middleware import init_cors
 from app.middleware.logging_middleware import init_logging
@@ -26,6 +30,12 @@ def create_app(config_class=Config):
     
     # Initialize extensions
     init_db(app)
+    init_query_audit(app)
+    init_write_behind(app)
+    init_user_cache(app)
+    init_token_versions(app)
+    init_token_cache(app)
+    init_password_hashing(app)
     # Configure CORS origins: allow localhost and the Vercel frontend
     # Keep using config if provided (FRONTEND_ORIGINS can be comma-separated or a list)
     # Default explicitly includes the deployed Vercel URL used by the frontend.
@@ -72,4 +82,52 @@ def create_app(config_class=Config):
             'version': '1.0.0'
         }
     
+    # Readiness: 503 until the database connection is usable
+    @app.route('/api/health/ready')
+    def readiness_check():
+        readiness = get_readiness()
+        ready = readiness['status'] == 'ready'
+        return {
+            'success': ready,
+            'status': readiness['status'],
+            'data': readiness
+        }, 200 if ready else 503
+    
+    # Internal statistics (admins only)
+    # Connection pool statistics of the worker process serving the request
+    @app.route('/api/health/db')
+    @require_admin
+    def db_pool_stats():
+        return {
+            'success': True,
+            'data': get_pool_stats()
+        }
+    
+    # Hit/miss counters of the in-process caches of the worker process
+    @app.route('/api/health/cache')
+    @require_admin
+    def cache_stats():
+        return {
+            'success': True,
+            'data': get_cache_stats()
+        }
+    
+    # Password hashing pool queue depth and wait times of the worker process
+    @app.route('/api/health/password-pool')
+    @require_admin
+    def password_pool_stats():
+        return {
+            'success': True,
+            'data': get_password_pool_stats()
+        }
+    
+    # Write-behind queue depth and flush counters of the worker process
+    @app.route('/api/health/write-behind')
+    @require_admin
+    def write_behind_stats():
+        return {
+            'success': True,
+            'data': get_write_behind_stats()
+        }
+    
     return app
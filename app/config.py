@@ -17,11 +17,79 @@ class Config:
     
     # Database settings
     MONGO_URI = os.environ.get('MONGO_URI') or 'mongodb://localhost:27017/followup_db'
+    # Skip MongoDB entirely and use the in-memory mock database
+    USE_MOCK_DB = os.environ.get('USE_MOCK_DB', 'False').lower() == 'true'
+    # Mock DB reads: 'copy' returns a private dict per document, 'view'
+    # returns the stored read-only documents without copying them
+    MOCK_DB_READ_MODE = os.environ.get('MOCK_DB_READ_MODE', 'copy')
+    # MongoClient pool: size it against the number of threads per worker
+    # process (each process gets its own client and pool)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 0)) or None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 0)) or None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    # Wire compression, in order of preference, e.g. 'zstd,snappy,zlib'
+    # (zstd needs the zstandard package, snappy needs python-snappy)
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')
+    # Don't ping MongoDB while creating the app: connect on first use and
+    # report readiness from a background probe (/api/health/ready)
+    MONGO_LAZY_CONNECT = os.environ.get('MONGO_LAZY_CONNECT', 'False').lower() == 'true'
+    MONGO_PROBE_INTERVAL_S = float(os.environ.get('MONGO_PROBE_INTERVAL_S', 2))
+    # Read profile for analytics/reporting reads (dashboard KPIs, charts):
+    # a read preference mode, a staleness bound for secondaries (>= 90s, 0
+    # for none) and a read concern. Add MONGO_<NAME>_READ_PREFERENCE (and
+    # the two others) to declare more profiles for get_collection().
+    MONGO_ANALYTICS_READ_PREFERENCE = os.environ.get('MONGO_ANALYTICS_READ_PREFERENCE', 'secondaryPreferred')
+    MONGO_ANALYTICS_MAX_STALENESS_S = int(os.environ.get('MONGO_ANALYTICS_MAX_STALENESS_S', 90))
+    MONGO_ANALYTICS_READ_CONCERN = os.environ.get('MONGO_ANALYTICS_READ_CONCERN', 'local')
+    # Per-process cache of authenticated users (without password hashes),
+    # so the auth middleware skips the users lookup; 0 turns it off
+    USER_CACHE_TTL_S = float(os.environ.get('USER_CACHE_TTL_S', 30))
+    USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', 10000))
+    # Write-behind queue for non-critical writes (last_login, read flags):
+    # queued in-process and flushed as one bulk_write every interval or
+    # once MAX_BATCH are waiting; past MAX_QUEUE writes run synchronously
+    WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND_ENABLED', 'False').lower() == 'true'
+    WRITE_BEHIND_FLUSH_INTERVAL_MS = int(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL_MS', 200))
+    WRITE_BEHIND_MAX_BATCH = int(os.environ.get('WRITE_BEHIND_MAX_BATCH', 500))
+    WRITE_BEHIND_MAX_QUEUE = int(os.environ.get('WRITE_BEHIND_MAX_QUEUE', 10000))
+    # Query-plan audit: explain a sample of find/aggregate calls and flag
+    # COLLSCANs, in-memory sorts and a high docs examined/returned ratio
+    QUERY_AUDIT_ENABLED = os.environ.get('QUERY_AUDIT_ENABLED', 'False').lower() == 'true'
+    QUERY_AUDIT_SAMPLE_RATE = float(os.environ.get('QUERY_AUDIT_SAMPLE_RATE', 0.1))
+    QUERY_AUDIT_MAX_RATIO = float(os.environ.get('QUERY_AUDIT_MAX_RATIO', 10))
+    # Stream the meeting/task lists from the cursor (also ?stream=true per
+    # request); the batch size is both the cursor batch and the write chunk
+    STREAM_LIST_RESPONSES = os.environ.get('STREAM_LIST_RESPONSES', 'False').lower() == 'true'
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 100))
+    # Largest JSON array accepted by the /bulk create and update endpoints
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 500))
     
     # JWT settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your-jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', 900))  # 15 minutes
     JWT_REFRESH_TOKEN_EXPIRES = int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES', 604800))  # 7 days
+    # Access tokens carry the user's role, profile and token version, so
+    # requests are authorized without loading the user; revocations are
+    # seen within TOKEN_VERSION_REFRESH_S by every worker, which keeps them
+    # for JWT_ACCESS_TOKEN_EXPIRES
+    JWT_CLAIMS_TOKENS = os.environ.get('JWT_CLAIMS_TOKENS', 'False').lower() == 'true'
+    TOKEN_VERSION_REFRESH_S = float(os.environ.get('TOKEN_VERSION_REFRESH_S', 5))
+    # bcrypt cost factor (each +1 doubles the hashing time); calibrate it
+    # for the target CPU with scripts/calibrate_bcrypt.py. Stored hashes
+    # with another cost are rehashed at the user's next login
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    # bcrypt runs on a pool of this many threads, with at most MAX_QUEUE
+    # more calls waiting and TIMEOUT_S per call before the endpoint answers
+    # 503; 0 workers hashes on the request thread
+    BCRYPT_POOL_WORKERS = int(os.environ.get('BCRYPT_POOL_WORKERS', 4))
+    BCRYPT_POOL_MAX_QUEUE = int(os.environ.get('BCRYPT_POOL_MAX_QUEUE', 32))
+    BCRYPT_POOL_TIMEOUT_S = float(os.environ.get('BCRYPT_POOL_TIMEOUT_S', 5))
+    # Verified token payloads cached (until their exp) so a token reused
+    # across requests is checked once per process; 0 turns it off
+    JWT_VERIFY_CACHE_SIZE = int(os.environ.get('JWT_VERIFY_CACHE_SIZE', 4096))
     
     # Gemini AI settings
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
@@ -65,6 +133,7 @@ class TestingConfig(Config):
     MONGO_URI = 'mongodb://localhost:27017/followup_test_db'
     JWT_ACCESS_TOKEN_EXPIRES = 60  # 1 minute for tests
     JWT_REFRESH_TOKEN_EXPIRES = 300  # 5 minutes for tests
+    BCRYPT_ROUNDS = 4  # bcrypt's minimum, fast hashes for tests
 
 config = {
     'development': DevelopmentConfig,
@@ -9,7 +9,8 @@ from ..schemas.user_schema import (
     UserRegisterSchema, UserLoginSchema, UserUpdateSchema,
     PasswordChangeSchema, PasswordResetSchema, PasswordResetConfirmSchema
 )
-from ..utils.password_helper import hash_password, verify_password, generate_reset_token, validate_password_strength
+from ..utils.password_helper import (hash_password, verify_password, generate_reset_token, validate_password_strength,
+                                     needs_rehash, PasswordHashingBusy)
 from ..utils.jwt_helper import generate_access_token, generate_refresh_token, decode_token
 from ..utils.validators import validate_email_address
 from datetime import datetime
@@ -76,8 +77,8 @@ class AuthController:
             user_id = user.create()
             
             # Generate tokens
-            access_token = generate_access_token(user_id)
-            refresh_token = generate_refresh_token(user_id)
+            access_token = generate_access_token(user_id, user)
+            refresh_token = generate_refresh_token(user_id, user.token_version)
             
             return jsonify({
                 'success': True,
@@ -103,6 +104,14 @@ class AuthController:
                 'details': e.messages,
                 'status': 400
             }), 400
+        except PasswordHashingBusy as e:
+            current_app.logger.warning(f"Registration: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Server busy, please retry',
+                'status': 503,
+                'retry_after': 1
+            }), 503, {'Retry-After': '1'}
         except Exception as e:
             current_app.logger.error(f"Registration error: {e}")
             return jsonify({
@@ -142,9 +151,17 @@ class AuthController:
                 raise Exception('User object missing id')
             user.update_last_login(user_id)
             
+            # Bring the stored hash to the configured bcrypt cost while the
+            # plain password is at hand; the login succeeds either way
+            if needs_rehash(user.password):
+                try:
+                    user.update_password_hash(user_id, user.password, hash_password(data['password']))
+                except Exception as e:
+                    current_app.logger.warning(f"Password rehash skipped: {e}")
+            
             # Generate tokens
-            access_token = generate_access_token(user_id)
-            refresh_token = generate_refresh_token(user_id)
+            access_token = generate_access_token(user_id, user)
+            refresh_token = generate_refresh_token(user_id, user.token_version)
             
             return jsonify({
                 'success': True,
@@ -172,6 +189,14 @@ class AuthController:
                 'details': e.messages,
                 'status': 400
             }), 400
+        except PasswordHashingBusy as e:
+            current_app.logger.warning(f"Login: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Server busy, please retry',
+                'status': 503,
+                'retry_after': 1
+            }), 503, {'Retry-After': '1'}
         except Exception as e:
             current_app.logger.error(f"Login error: {e}")
             return jsonify({
@@ -211,11 +236,17 @@ class AuthController:
                     'error': 'User not found',
                     'status': 401
                 }), 401
+            if payload.get('tv', 0) < user.token_version:
+                return jsonify({
+                    'success': False,
+                    'error': 'Refresh token has been revoked',
+                    'status': 401
+                }), 401
             # Generate new access token (compute id safely)
             user_id = AuthController._get_user_id(user)
             if user_id is None:
                 raise Exception('User object missing id')
-            access_token = generate_access_token(user_id)
+            access_token = generate_access_token(user_id, user)
             
             return jsonify({
                 'success': True,
@@ -254,6 +285,15 @@ class AuthController:
                     'error': 'User object missing id',
                     'status': 500
                 }), 500
+            if getattr(user, 'claims_only', False):
+                # The token only carries part of the profile
+                user = User.find_principal(user_id)
+                if not user:
+                    return jsonify({
+                        'success': False,
+                        'error': 'User not found',
+                        'status': 404
+                    }), 404
             
             return jsonify({
                 'success': True,
@@ -351,7 +391,14 @@ class AuthController:
             schema = PasswordChangeSchema()
             data = schema.load(request.json)
             
-            user = request.user
+            # request.user comes from the user cache, without the password hash
+            user = User.find_by_id(request.user_id)
+            if not user:
+                return jsonify({
+                    'success': False,
+                    'error': 'User not found',
+                    'status': 404
+                }), 404
             
             # Verify current password
             if not verify_password(data['current_password'], user.password):
@@ -383,9 +430,20 @@ class AuthController:
                 }), 500
             user.update(user_id, {'password': new_hashed_password})
             
+            # The change revokes the user's tokens, this one included, so
+            # hand back a pair issued with the new token version
+            user = User.find_by_id(user_id)
+            access_token = generate_access_token(user_id, user)
+            refresh_token = generate_refresh_token(user_id, user.token_version)
+            
             return jsonify({
                 'success': True,
-                'message': 'Password changed successfully'
+                'message': 'Password changed successfully',
+                'tokens': {
+                    'access_token': access_token,
+                    'refresh_token': refresh_token,
+                    'token_type': 'Bearer'
+                }
             }), 200
             
         except ValidationError as e:
@@ -395,6 +453,14 @@ class AuthController:
                 'details': e.messages,
                 'status': 400
             }), 400
+        except PasswordHashingBusy as e:
+            current_app.logger.warning(f"Change password: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Server busy, please retry',
+                'status': 503,
+                'retry_after': 1
+            }), 503, {'Retry-After': '1'}
         except Exception as e:
             current_app.logger.error(f"Change password error: {e}")
             return jsonify({
@@ -7,6 +7,8 @@ from ..models.meeting import Meeting
 from ..models.task import Task
 from ..models.notification import Notification
 from ..middleware.auth_middleware import get_current_user_id
+from ..utils.db import read_profile
+from ..utils.projection import projection_for
 from datetime import datetime, timedelta
 
 class DashboardController:
@@ -18,50 +20,31 @@ class DashboardController:
         try:
             user_id = get_current_user_id()
             
-            # Calculate date ranges
-            today = datetime.now()
-            week_ago = today - timedelta(days=7)
-            month_ago = today - timedelta(days=30)
-            
-            today_str = today.strftime('%Y-%m-%d')
-            week_ago_str = week_ago.strftime('%Y-%m-%d')
-            month_ago_str = month_ago.strftime('%Y-%m-%d')
-            
-            # Get meetings stats
-            all_meetings = Meeting.find_by_user(user_id)
-            today_meetings = Meeting.find_today(user_id)
-            upcoming_meetings = Meeting.find_upcoming(user_id, days=7)
-            completed_meetings = Meeting.find_by_user(user_id, status='completed')
-            
-            # Get task stats
-            all_tasks = Task.find_by_user(user_id)
-            todo_tasks = Task.find_by_user(user_id, status='todo')
-            inprogress_tasks = Task.find_by_user(user_id, status='inprogress')
-            done_tasks = Task.find_by_user(user_id, status='done')
-            overdue_tasks = Task.find_overdue(user_id)
-            
-            # Get notification stats
-            all_notifications = Notification.find_by_user(user_id, read=None)
-            unread_notifications = Notification.find_by_user(user_id, read=False)
+            # The counts tolerate a little staleness, so read them from a
+            # secondary through the analytics read profile. Each collection
+            # is counted in the database with a single aggregation.
+            with read_profile('analytics'):
+                meetings = Meeting.count_summary(user_id, days=7)
+                tasks = Task.count_summary(user_id)
+                notifications = Notification.count_summary(user_id)
             
             # Calculate KPIs
-            total_meetings = len(all_meetings)
-            total_tasks = len(all_tasks)
-            completion_rate = (len(done_tasks) / total_tasks * 100) if total_tasks > 0 else 0
+            total_tasks = tasks['total']
+            completion_rate = (tasks['done'] / total_tasks * 100) if total_tasks > 0 else 0
             
             kpis = {
-                'total_meetings': total_meetings,
-                'today_meetings': len(today_meetings),
-                'upcoming_meetings': len(upcoming_meetings),
-                'completed_meetings': len(completed_meetings),
+                'total_meetings': meetings['total'],
+                'today_meetings': meetings['today'],
+                'upcoming_meetings': meetings['upcoming'],
+                'completed_meetings': meetings['completed'],
                 'total_tasks': total_tasks,
-                'todo_tasks': len(todo_tasks),
-                'inprogress_tasks': len(inprogress_tasks),
-                'done_tasks': len(done_tasks),
-                'overdue_tasks': len(overdue_tasks),
+                'todo_tasks': tasks['todo'],
+                'inprogress_tasks': tasks['inprogress'],
+                'done_tasks': tasks['done'],
+                'overdue_tasks': tasks['overdue'],
                 'task_completion_rate': round(completion_rate, 1),
-                'total_notifications': len(all_notifications),
-                'unread_notifications': len(unread_notifications)
+                'total_notifications': notifications['total'],
+                'unread_notifications': notifications['unread']
             }
             
             return jsonify({
@@ -82,11 +65,14 @@ class DashboardController:
         try:
             user_id = get_current_user_id()
             
-            # Get recent meetings
-            recent_meetings = Meeting.find_by_user(user_id)[:5]
+            # Get recent meetings, with just the fields shown below; the
+            # database sorts and returns only the first 5
+            recent_meetings = Meeting.find_by_user(
+                user_id, projection=projection_for(['contact', 'company', 'date', 'status']), limit=5)
             
             # Get recent tasks
-            recent_tasks = Task.find_by_user(user_id)[:5]
+            recent_tasks = Task.find_by_user(
+                user_id, projection=projection_for(['title', 'due_date', 'status', 'priority']), limit=5)
             
             # Format activity data
             activities = []
@@ -95,7 +81,7 @@ class DashboardController:
                 meeting_dict = meeting.to_dict()
                 activities.append({
                     'type': 'meeting',
-                    'id': str(meeting_dict.get('_id', '')),
+                    'id': meeting.id,
                     'title': f"Meeting with {meeting_dict.get('contact', '')} - {meeting_dict.get('company', '')}",
                     'date': meeting_dict.get('date', ''),
                     'status': meeting_dict.get('status', '')
@@ -105,7 +91,7 @@ class DashboardController:
                 task_dict = task.to_dict()
                 activities.append({
                     'type': 'task',
-                    'id': str(task_dict.get('_id', '')),
+                    'id': task.id,
                     'title': task_dict.get('title', ''),
                     'due_date': task_dict.get('due_date', ''),
                     'status': task_dict.get('status', ''),
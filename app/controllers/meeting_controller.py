@@ -5,10 +5,20 @@ Meeting controller for CRUD operations
 from flask import jsonify, current_app, request
 from marshmallow import ValidationError
 from ..models.meeting import Meeting
-from ..schemas.meeting_schema import MeetingCreateSchema, MeetingUpdateSchema
+from ..schemas.meeting_schema import MeetingCreateSchema, MeetingUpdateSchema, MeetingFilterSchema
 from ..middleware.auth_middleware import get_current_user_id
+from ..utils.projection import parse_fields, projection_for, select_fields
+from ..utils.pagination import page_params
+from ..utils.streaming import stream_list, wants_stream
+from ..utils.bulk import BulkRequestError, bulk_response, load_bulk
 from bson import ObjectId
 
+def _meeting_data(meeting, fields=None):
+    """Serialize a meeting for the list endpoint."""
+    meeting_dict = select_fields(meeting.to_dict(), fields)
+    meeting_dict['id'] = meeting.id
+    return meeting_dict
+
 class MeetingController:
     """Meeting controller for business meeting management."""
     
@@ -23,20 +33,43 @@ class MeetingController:
             date_from = request.args.get('date_from')
             date_to = request.args.get('date_to')
             
-            meetings = Meeting.find_by_user(user_id, status, date_from, date_to)
+            # ?fields=company,date,status returns (and fetches) only those fields
+            fields = parse_fields(request.args.get('fields'), Meeting.FIELDS)
             
-            meetings_data = []
-            for meeting in meetings:
-                meeting_dict = meeting.to_dict()
-                meeting_dict['id'] = str(meeting_dict.pop('_id', ''))
-                meetings_data.append(meeting_dict)
+            # ?limit=N (and then ?cursor=<next_cursor>) pages through them
+            page = page_params(MeetingFilterSchema, request.args)
+            if page:
+                meetings, next_cursor = Meeting.find_page(
+                    user_id, status, date_from, date_to, limit=page['limit'],
+                    cursor=page.get('cursor'), projection=projection_for(fields))
+            elif wants_stream():
+                # Write the response while reading the cursor instead of building it in memory
+                meetings = Meeting.iter_by_user(user_id, status, date_from, date_to,
+                                                projection=projection_for(fields),
+                                                batch_size=current_app.config['STREAM_BATCH_SIZE'])
+                return stream_list(meetings, lambda meeting: _meeting_data(meeting, fields),
+                                   'Failed to fetch meetings')
+            else:
+                meetings = Meeting.find_by_user(user_id, status, date_from, date_to,
+                                                projection=projection_for(fields))
             
-            return jsonify({
+            meetings_data = [_meeting_data(meeting, fields) for meeting in meetings]
+            
+            response = {
                 'success': True,
                 'data': meetings_data,
                 'count': len(meetings_data)
-            }), 200
+            }
+            if page:
+                response['next_cursor'] = next_cursor
+            return jsonify(response), 200
             
+        except ValidationError as e:
+            return jsonify({
+                'success': False,
+                'error': 'Validation error',
+                'details': e.messages
+            }), 400
         except Exception as e:
             current_app.logger.error(f"Get meetings error: {e}")
             return jsonify({
@@ -146,6 +179,63 @@ class MeetingController:
                 'error': 'Failed to update meeting'
             }), 500
     
+    @staticmethod
+    def bulk_create_meetings():
+        """Create several meetings from a JSON array in one write."""
+        try:
+            user_id = get_current_user_id()
+            
+            entries, errors = load_bulk(MeetingCreateSchema, request.get_json(silent=True))
+            created = Meeting.create_many([Meeting(user_id=user_id, **data) for _, data in entries])
+            
+            results = {}
+            for (index, _), (meeting_id, error) in zip(entries, created):
+                results[index] = {'status': 'created', 'id': meeting_id} if meeting_id else {'status': 'failed', 'error': error}
+            return bulk_response(results, errors, 201)
+            
+        except BulkRequestError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        except Exception as e:
+            current_app.logger.error(f"Bulk create meetings error: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Failed to create meetings'
+            }), 500
+    
+    @staticmethod
+    def bulk_update_meetings():
+        """Update several meetings from a JSON array of {"id": ..., <fields>} items in one write."""
+        try:
+            user_id = get_current_user_id()
+            
+            entries, errors = load_bulk(MeetingUpdateSchema, request.get_json(silent=True), with_ids=True)
+            updated = Meeting.bulk_update(user_id, [(meeting_id, data) for _, meeting_id, data in entries])
+            
+            results = {}
+            for (index, meeting_id, _), (exists, error) in zip(entries, updated):
+                if not exists:
+                    results[index] = {'status': 'not_found', 'id': meeting_id}
+                elif error:
+                    results[index] = {'status': 'failed', 'id': meeting_id, 'error': error}
+                else:
+                    results[index] = {'status': 'updated', 'id': meeting_id}
+            return bulk_response(results, errors, 200)
+            
+        except BulkRequestError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        except Exception as e:
+            current_app.logger.error(f"Bulk update meetings error: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Failed to update meetings'
+            }), 500
+    
     @staticmethod
     def delete_meeting(meeting_id):
         """Delete a meeting."""
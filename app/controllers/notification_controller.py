@@ -3,8 +3,12 @@ Notification controller for managing user notifications
 """
 
 from flask import jsonify, current_app, request
+from marshmallow import ValidationError
 from ..models.notification import Notification
+from ..schemas.notification_schema import NotificationFilterSchema
 from ..middleware.auth_middleware import get_current_user_id
+from ..utils.projection import parse_fields, projection_for, select_fields
+from ..utils.pagination import page_params
 
 class NotificationController:
     """Notification controller for notification management."""
@@ -20,22 +24,39 @@ class NotificationController:
             
             # Change to use read parameter instead of unread_only
             read_filter = False if unread_only else None
-            notifications = Notification.find_by_user(user_id, read=read_filter)
+            # ?fields=title,read returns (and fetches) only those fields
+            fields = parse_fields(request.args.get('fields'), Notification.FIELDS)
+            # ?limit=N (and then ?cursor=<next_cursor>) pages through them
+            page = page_params(NotificationFilterSchema, request.args)
+            if page:
+                notifications, next_cursor = Notification.find_page(
+                    user_id, read=read_filter, limit=page['limit'],
+                    cursor=page.get('cursor'), projection=projection_for(fields))
+            else:
+                notifications = Notification.find_by_user(user_id, read=read_filter,
+                                                          projection=projection_for(fields))
             
             notifications_data = []
             for notification in notifications:
-                notif_dict = notification.to_dict()
-                # Handle potential missing _id
-                if '_id' in notif_dict:
-                    notif_dict['id'] = str(notif_dict.pop('_id'))
+                notif_dict = select_fields(notification.to_dict(), fields)
+                notif_dict['id'] = notification.id
                 notifications_data.append(notif_dict)
             
-            return jsonify({
+            response = {
                 'success': True,
                 'data': notifications_data,
                 'count': len(notifications_data)
-            }), 200
+            }
+            if page:
+                response['next_cursor'] = next_cursor
+            return jsonify(response), 200
             
+        except ValidationError as e:
+            return jsonify({
+                'success': False,
+                'error': 'Validation error',
+                'details': e.messages
+            }), 400
         except Exception as e:
             current_app.logger.error(f"Get notifications error: {e}")
             return jsonify({
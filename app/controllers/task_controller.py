@@ -5,8 +5,21 @@ Task controller for CRUD operations
 from flask import jsonify, current_app, request
 from marshmallow import ValidationError
 from ..models.task import Task
-from ..schemas.task_schema import TaskCreateSchema, TaskUpdateSchema
+from ..schemas.task_schema import TaskCreateSchema, TaskUpdateSchema, TaskFilterSchema
 from ..middleware.auth_middleware import get_current_user_id
+from ..utils.projection import parse_fields, projection_for, select_fields
+from ..utils.pagination import page_params
+from ..utils.streaming import stream_list, wants_stream
+from ..utils.bulk import BulkRequestError, bulk_response, load_bulk
+
+def _task_data(task, fields=None):
+    """Serialize a task for the list endpoint."""
+    task_dict = select_fields(task.to_dict(), fields)
+    task_dict['id'] = task.id
+    # Convert dueDate to due_date for frontend compatibility
+    if 'due_date' in task_dict:
+        task_dict['dueDate'] = task_dict['due_date']
+    return task_dict
 
 class TaskController:
     """Task controller for task management."""
@@ -22,23 +35,42 @@ class TaskController:
             priority = request.args.get('priority')
             assignee = request.args.get('assignee')
             
-            tasks = Task.find_by_user(user_id, status, priority, assignee)
+            # ?fields=title,status,due_date returns (and fetches) only those fields
+            fields = parse_fields(request.args.get('fields'), Task.FIELDS)
             
-            tasks_data = []
-            for task in tasks:
-                task_dict = task.to_dict()
-                task_dict['id'] = str(task_dict.pop('_id', ''))
-                # Convert dueDate to due_date for frontend compatibility
-                if 'due_date' in task_dict:
-                    task_dict['dueDate'] = task_dict['due_date']
-                tasks_data.append(task_dict)
+            # ?limit=N (and then ?cursor=<next_cursor>) pages through them
+            page = page_params(TaskFilterSchema, request.args)
+            if page:
+                tasks, next_cursor = Task.find_page(
+                    user_id, status, priority, assignee, limit=page['limit'],
+                    cursor=page.get('cursor'), projection=projection_for(fields))
+            elif wants_stream():
+                # Write the response while reading the cursor instead of building it in memory
+                tasks = Task.iter_by_user(user_id, status, priority, assignee,
+                                          projection=projection_for(fields),
+                                          batch_size=current_app.config['STREAM_BATCH_SIZE'])
+                return stream_list(tasks, lambda task: _task_data(task, fields), 'Failed to fetch tasks')
+            else:
+                tasks = Task.find_by_user(user_id, status, priority, assignee,
+                                          projection=projection_for(fields))
             
-            return jsonify({
+            tasks_data = [_task_data(task, fields) for task in tasks]
+            
+            response = {
                 'success': True,
                 'data': tasks_data,
                 'count': len(tasks_data)
-            }), 200
+            }
+            if page:
+                response['next_cursor'] = next_cursor
+            return jsonify(response), 200
             
+        except ValidationError as e:
+            return jsonify({
+                'success': False,
+                'error': 'Validation error',
+                'details': e.messages
+            }), 400
         except Exception as e:
             current_app.logger.error(f"Get tasks error: {e}")
             return jsonify({
@@ -148,6 +180,63 @@ class TaskController:
                 'error': 'Failed to update task'
             }), 500
     
+    @staticmethod
+    def bulk_create_tasks():
+        """Create several tasks from a JSON array in one write."""
+        try:
+            user_id = get_current_user_id()
+            
+            entries, errors = load_bulk(TaskCreateSchema, request.get_json(silent=True))
+            created = Task.create_many([Task(user_id=user_id, **data) for _, data in entries])
+            
+            results = {}
+            for (index, _), (task_id, error) in zip(entries, created):
+                results[index] = {'status': 'created', 'id': task_id} if task_id else {'status': 'failed', 'error': error}
+            return bulk_response(results, errors, 201)
+            
+        except BulkRequestError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        except Exception as e:
+            current_app.logger.error(f"Bulk create tasks error: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Failed to create tasks'
+            }), 500
+    
+    @staticmethod
+    def bulk_update_tasks():
+        """Update several tasks from a JSON array of {"id": ..., <fields>} items in one write."""
+        try:
+            user_id = get_current_user_id()
+            
+            entries, errors = load_bulk(TaskUpdateSchema, request.get_json(silent=True), with_ids=True)
+            updated = Task.bulk_update(user_id, [(task_id, data) for _, task_id, data in entries])
+            
+            results = {}
+            for (index, task_id, _), (exists, error) in zip(entries, updated):
+                if not exists:
+                    results[index] = {'status': 'not_found', 'id': task_id}
+                elif error:
+                    results[index] = {'status': 'failed', 'id': task_id, 'error': error}
+                else:
+                    results[index] = {'status': 'updated', 'id': task_id}
+            return bulk_response(results, errors, 200)
+            
+        except BulkRequestError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        except Exception as e:
+            current_app.logger.error(f"Bulk update tasks error: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Failed to update tasks'
+            }), 500
+    
     @staticmethod
     def delete_task(task_id):
         """Delete a task."""
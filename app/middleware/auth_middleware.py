@@ -4,6 +4,7 @@ JWT Authentication Middleware
 
 from functools import wraps
 from flask import request, jsonify, current_app
+from ..utils.cache import get_token_versions
 from ..utils.jwt_helper import decode_token
 from ..models.user import User
 
@@ -20,6 +21,7 @@ def init_auth_middleware(app):
             '/api/auth/register',
             '/api/auth/refresh',
             '/api/health',
+            '/api/health/ready',
             '/api/auth/forgot-password',
             '/api/auth/reset-password'
         ]
@@ -47,8 +49,18 @@ def init_auth_middleware(app):
                 'status': 401
             }), 401
         
-        # Get user from database
-        user = User.find_by_id(payload['user_id'])
+        if 'tv' in payload:
+            # A token with claims: only check it hasn't been revoked since
+            if get_token_versions().is_revoked(payload['user_id'], payload['tv']):
+                return jsonify({
+                    'success': False,
+                    'error': 'Token has been revoked',
+                    'status': 401
+                }), 401
+            user = User.from_claims(payload)
+        else:
+            # Get user from the user cache, or the database on a miss
+            user = User.find_principal(payload['user_id'])
         if not user:
             return jsonify({
                 'success': False,
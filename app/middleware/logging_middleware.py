@@ -29,7 +29,7 @@ def init_logging(app):
     def log_request_end(response):
         """Log request completion."""
         if not current_app.debug or not hasattr(request, 'start_time'):
-            return
+            return response
         
         end_time = datetime.utcnow()
         duration = (end_time - request.start_time).total_seconds() * 1000
@@ -6,13 +6,17 @@ from datetime import datetime
 from bson import ObjectId
 import uuid
 from ..utils.db import get_collection
+from ..utils.indexes import register_index, sync_indexes
+from ..utils.projection import document_kwargs
+
+# find_by_session_id, save (upsert) and delete_session: one document per session
+register_index('ai_chat', [('session_id', 1), ('user_id', 1)], unique=True)
+# find_by_user and find_recent_sessions, most recently updated first
+register_index('ai_chat', [('user_id', 1), ('updated_at', -1)])
 
 def create_ai_chat_indexes():
     """Create indexes for ai_chat collection."""
-    ai_chat = get_collection('ai_chat')
-    ai_chat.create_index('user_id')
-    ai_chat.create_index('session_id')
-    return True
+    return not sync_indexes(['ai_chat'])['errors']
 
 class AIMessage:
     """Individual message in AI chat."""
@@ -65,26 +69,31 @@ class AIChatSession:
         }
     
     @classmethod
-    def find_by_user(cls, user_id, limit=10, skip=0):
+    def from_document(cls, data):
+        """Build a chat session from a stored document, which may be a projection."""
+        return cls(**document_kwargs(cls, data))
+    
+    @classmethod
+    def find_by_user(cls, user_id, limit=10, skip=0, projection=None):
         """Find chat sessions by user."""
         collection = get_collection('ai_chat')
         query = {'user_id': user_id}
-        cursor = collection.find(query).sort('updated_at', -1).skip(skip).limit(limit)
-        return [cls(**chat_data) for chat_data in cursor]
+        cursor = collection.find(query, projection).sort('updated_at', -1).skip(skip).limit(limit)
+        return [cls.from_document(chat_data) for chat_data in cursor]
     
     @classmethod
-    def find_by_session_id(cls, session_id, user_id=None):
+    def find_by_session_id(cls, session_id, user_id=None, projection=None):
         """Find chat session by session ID."""
         collection = get_collection('ai_chat')
         query = {'session_id': session_id}
         if user_id:
             query['user_id'] = user_id
         
-        chat_data = collection.find_one(query)
-        return cls(**chat_data) if chat_data else None
+        chat_data = collection.find_one(query, projection)
+        return cls.from_document(chat_data) if chat_data else None
     
     @classmethod
-    def find_recent_sessions(cls, user_id, hours=24):
+    def find_recent_sessions(cls, user_id, hours=24, projection=None):
         """Find recent chat sessions within specified hours."""
         collection = get_collection('ai_chat')
         from datetime import datetime, timedelta
@@ -96,8 +105,8 @@ class AIChatSession:
             'updated_at': {'$gte': cutoff_time}
         }
         
-        cursor = collection.find(query).sort('updated_at', -1)
-        return [cls(**chat_data) for chat_data in cursor]
+        cursor = collection.find(query, projection).sort('updated_at', -1)
+        return [cls.from_document(chat_data) for chat_data in cursor]
     
     def create(self):
         """Create chat session in database."""
@@ -5,13 +5,16 @@ KPI Metrics model for MongoDB
 from datetime import datetime, timedelta
 from bson import ObjectId
 from ..utils.db import get_collection
+from ..utils.indexes import register_index, sync_indexes
+from ..utils.projection import document_kwargs
+
+# find_by_user, find_by_date, update_or_create and get_chart_data; one
+# document per user and day
+register_index('kpi_metrics', [('user_id', 1), ('date', 1)], unique=True)
 
 def create_kpi_indexes():
     """Create indexes for kpi_metrics collection."""
-    kpi_metrics = get_collection('kpi_metrics')
-    kpi_metrics.create_index('user_id')
-    kpi_metrics.create_index('date')
-    return True
+    return not sync_indexes(['kpi_metrics'])['errors']
 
 class KPIMetric:
     """KPI metric model for dashboard analytics."""
@@ -48,7 +51,12 @@ class KPIMetric:
         }
     
     @classmethod
-    def find_by_user(cls, user_id, date_from=None, date_to=None):
+    def from_document(cls, data):
+        """Build a KPI metric from a stored document, which may be a projection."""
+        return cls(metrics=data, **document_kwargs(cls, data))
+    
+    @classmethod
+    def find_by_user(cls, user_id, date_from=None, date_to=None, projection=None):
         """Find KPI metrics by user with optional date range."""
         collection = get_collection('kpi_metrics')
         query = {'user_id': user_id}
@@ -60,19 +68,19 @@ class KPIMetric:
         elif date_to:
             query['date'] = {'$lte': date_to}
         
-        cursor = collection.find(query).sort('date', -1)
-        return [cls(**metric_data) for metric_data in cursor]
+        cursor = collection.find(query, projection).sort('date', -1)
+        return [cls.from_document(metric_data) for metric_data in cursor]
     
     @classmethod
-    def find_by_date(cls, user_id, date):
+    def find_by_date(cls, user_id, date, projection=None):
         """Find KPI metrics for specific date."""
         collection = get_collection('kpi_metrics')
         query = {
             'user_id': user_id,
             'date': date
         }
-        metric_data = collection.find_one(query)
-        return cls(**metric_data) if metric_data else None
+        metric_data = collection.find_one(query, projection)
+        return cls.from_document(metric_data) if metric_data else None
     
     @classmethod
     def calculate_daily_metrics(cls, user_id, date=None):
@@ -119,31 +127,59 @@ class KPIMetric:
         result = collection.insert_one(metric_data)
         return str(result.inserted_id)
     
+    def _upsert_fields(self, date):
+        """Split to_dict() for an upsert keyed on (user_id, date).
+
+        Returns ``(metric fields, fields only set on insert)``; the key
+        fields come from the upsert filter.
+        """
+        data = self.to_dict()
+        data.pop('user_id')
+        data.pop('date')
+        return data, {'created_at': data.pop('created_at')}
+    
     def update_or_create(self, user_id, date=None):
-        """Update existing metric or create new one for specific date."""
+        """Update existing metric or create new one for specific date.
+        
+        A single upsert on the unique (user_id, date) index, so concurrent
+        callers can't both insert. Returns the metric's id, or None when an
+        existing metric was left unchanged.
+        """
         if not date:
             date = self.date
         
         collection = get_collection('kpi_metrics')
+        metrics, on_insert = self._upsert_fields(date)
+        result = collection.update_one(
+            {'user_id': user_id, 'date': date},
+            {'$set': metrics, '$setOnInsert': on_insert},
+            upsert=True
+        )
+        if result.upserted_id is not None:
+            return str(result.upserted_id)
+        if result.modified_count > 0:
+            existing = collection.find_one({'user_id': user_id, 'date': date}, {'_id': 1})
+            return str(existing['_id'])
+        return None
+    
+    def create_if_missing(self):
+        """Store this metric unless one already exists for its user and date.
         
-        # Check if metric exists for this date
-        existing = collection.find_one({'user_id': user_id, 'date': date})
-        
-        if existing:
-            # Update existing metric
-            result = collection.update_one(
-                {'_id': existing['_id']},
-                {'$set': self.to_dict()}
-            )
-            return str(existing['_id']) if result.modified_count > 0 else None
-        else:
-            # Create new metric
-            return self.create()
+        An upsert that only sets fields on insert, so two requests racing
+        to generate the same day's metric both succeed and the first one wins.
+        """
+        collection = get_collection('kpi_metrics')
+        metrics, on_insert = self._upsert_fields(self.date)
+        collection.update_one(
+            {'user_id': self.user_id, 'date': self.date},
+            {'$setOnInsert': dict(metrics, **on_insert)},
+            upsert=True
+        )
     
     @classmethod
     def get_chart_data(cls, user_id, days=7):
-        """Get meeting activity chart data for last N days."""
-        collection = get_collection('kpi_metrics')
+        """Get meeting activity chart data for last N days (analytics read profile)."""
+        collection = get_collection('kpi_metrics', read_profile='analytics')
         from datetime import datetime, timedelta
         
         end_date = datetime.now()
@@ -205,7 +241,7 @@ class KPIMetric:
         if not latest_metrics:
             # Calculate current metrics
             current_metrics = cls.calculate_daily_metrics(user_id)
-            current_metrics.create()
+            current_metrics.create_if_missing()
             latest_metrics = [current_metrics]
         
         # Calculate totals
@@ -237,4 +273,4 @@ class KPIMetric:
             existing = cls.find_by_date(user_id, date)
             if not existing:
                 metrics = cls.calculate_daily_metrics(user_id, date)
-                metrics.create()
+                metrics.create_if_missing()
@@ -3,21 +3,35 @@ Meeting model for MongoDB
 """
 
 from datetime import datetime
-from bson import ObjectId
-from ..utils.db import get_collection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from ..utils.db import get_collection, normalize_id
+from ..utils import pagination
+from ..utils.indexes import register_index, sync_indexes
+from ..utils.projection import document_kwargs
+
+# find_by_user (date range, sorted by date) and find_by_date (sorted by time)
+register_index('meetings', [('user_id', 1), ('date', 1), ('time', 1)])
+# find_page: keyset pagination on (date, _id)
+register_index('meetings', [('user_id', 1), ('date', 1), ('_id', 1)])
+# find_upcoming and find_by_user/find_page(status=...): equality on status,
+# then date (and _id for the page order)
+register_index('meetings', [('user_id', 1), ('status', 1), ('date', 1), ('_id', 1)])
+# search_by_text
+register_index('meetings', [('company', 'text'), ('contact', 'text'), ('subject', 'text')])
 
 def create_meeting_indexes():
     """Create indexes for meetings collection."""
-    meetings = get_collection('meetings')
-    meetings.create_index('user_id')
-    meetings.create_index('date')
-    meetings.create_index('status')
-    meetings.create_index([('company', 'text'), ('contact', 'text'), ('subject', 'text')])
-    return True
+    return not sync_indexes(['meetings'])['errors']
 
 class Meeting:
     """Meeting model for business meeting management."""
     
+    # Stored fields, the ones a projection (or ?fields=) can select
+    FIELDS = ('user_id', 'company', 'contact', 'subject', 'description', 'date', 'time',
+              'duration', 'location', 'status', 'priority', 'notes', 'attendees', 'tags',
+              'phone', 'email', 'company_address', 'created_at', 'updated_at')
+    
     def __init__(self, user_id, company, contact, subject, date, time, 
                  duration=60, location='Virtual Meeting', status='scheduled', 
                  priority='medium', description=None, notes=None, 
@@ -76,9 +90,12 @@ class Meeting:
         }
     
     @classmethod
-    def find_by_user(cls, user_id, status=None, date_from=None, date_to=None):
-        """Find meetings by user with optional filters."""
-        collection = get_collection('meetings')
+    def from_document(cls, data):
+        """Build a meeting from a stored document, which may be a projection."""
+        return cls(**document_kwargs(cls, data))
+    
+    @staticmethod
+    def _user_query(user_id, status=None, date_from=None, date_to=None):
         query = {'user_id': user_id}
         
         if status:
@@ -90,23 +107,52 @@ class Meeting:
             query['date'] = {'$gte': date_from}
         elif date_to:
             query['date'] = {'$lte': date_to}
+        return query
+    
+    @classmethod
+    def find_by_user(cls, user_id, status=None, date_from=None, date_to=None, projection=None, limit=None):
+        """Find meetings by user with optional filters (the first ``limit`` ones, if given)."""
+        return list(cls.iter_by_user(user_id, status, date_from, date_to, projection, limit=limit))
+    
+    @classmethod
+    def iter_by_user(cls, user_id, status=None, date_from=None, date_to=None, projection=None, batch_size=None,
+                     limit=None):
+        """Yield a user's meetings as the cursor returns them (see find_by_user)."""
+        collection = get_collection('meetings')
+        query = cls._user_query(user_id, status, date_from, date_to)
+        cursor = collection.find(query, projection).sort('date', 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        for meeting_data in cursor:
+            yield cls.from_document(meeting_data)
+    
+    @classmethod
+    def find_page(cls, user_id, status=None, date_from=None, date_to=None,
+                  limit=pagination.DEFAULT_LIMIT, cursor=None, projection=None):
+        """Find one page of a user's meetings in (date, _id) order.
         
-        cursor = collection.find(query).sort('date', 1)
-        return [cls(**meeting_data) for meeting_data in cursor]
+        Returns ``(meetings, next_cursor)``; next_cursor is None on the last page.
+        """
+        query = cls._user_query(user_id, status, date_from, date_to)
+        documents, next_cursor = pagination.find_page(
+            get_collection('meetings'), query, 'date', 1, limit, cursor, projection)
+        return [cls.from_document(meeting_data) for meeting_data in documents], next_cursor
     
     @classmethod
-    def find_by_id(cls, meeting_id, user_id=None):
+    def find_by_id(cls, meeting_id, user_id=None, projection=None):
         """Find meeting by ID, optionally filtered by user."""
         collection = get_collection('meetings')
-        query = {'_id': ObjectId(meeting_id) if isinstance(meeting_id, str) else meeting_id}
+        query = {'_id': normalize_id(meeting_id)}
         if user_id:
             query['user_id'] = user_id
         
-        meeting_data = collection.find_one(query)
-        return cls(**meeting_data) if meeting_data else None
+        meeting_data = collection.find_one(query, projection)
+        return cls.from_document(meeting_data) if meeting_data else None
     
     @classmethod
-    def find_upcoming(cls, user_id, days=7):
+    def find_upcoming(cls, user_id, days=7, projection=None):
         """Find upcoming meetings within specified days."""
         collection = get_collection('meetings')
         from datetime import datetime, timedelta
@@ -120,26 +166,56 @@ class Meeting:
             'date': {'$lte': end_date_str}
         }
         
-        cursor = collection.find(query).sort('date', 1)
-        return [cls(**meeting_data) for meeting_data in cursor]
+        cursor = collection.find(query, projection).sort('date', 1)
+        return [cls.from_document(meeting_data) for meeting_data in cursor]
     
     @classmethod
-    def find_by_date(cls, user_id, date):
+    def find_by_date(cls, user_id, date, projection=None):
         """Find meetings by specific date."""
         collection = get_collection('meetings')
         query = {
             'user_id': user_id,
             'date': date
         }
-        cursor = collection.find(query).sort('time', 1)
-        return [cls(**meeting_data) for meeting_data in cursor]
+        cursor = collection.find(query, projection).sort('time', 1)
+        return [cls.from_document(meeting_data) for meeting_data in cursor]
     
     @classmethod
-    def find_today(cls, user_id):
+    def find_today(cls, user_id, projection=None):
         """Find today's meetings."""
         from datetime import datetime
         today = datetime.now().strftime('%Y-%m-%d')
-        return cls.find_by_date(user_id, today)
+        return cls.find_by_date(user_id, today, projection)
+
+    @classmethod
+    def count_summary(cls, user_id, days=7):
+        """Count a user's meetings in one aggregation.
+
+        Returns ``total``, ``today``, ``upcoming`` (as in find_upcoming) and
+        ``completed`` counts.
+        """
+        collection = get_collection('meetings')
+        from datetime import datetime, timedelta
+        today = datetime.now().strftime('%Y-%m-%d')
+        end_date_str = (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d')
+
+        pipeline = [
+            {'$match': {'user_id': user_id}},
+            {'$group': {
+                '_id': None,
+                'total': {'$sum': 1},
+                'today': {'$sum': {'$cond': [{'$eq': ['$date', today]}, 1, 0]}},
+                'upcoming': {'$sum': {'$cond': [{'$and': [
+                    {'$eq': ['$status', 'scheduled']},
+                    {'$gt': ['$date', None]},
+                    {'$lte': ['$date', end_date_str]}
+                ]}, 1, 0]}},
+                'completed': {'$sum': {'$cond': [{'$eq': ['$status', 'completed']}, 1, 0]}}
+            }}
+        ]
+
+        counts = next(iter(collection.aggregate(pipeline)), {})
+        return {key: counts.get(key, 0) for key in ('total', 'today', 'upcoming', 'completed')}
     
     def create(self):
         """Create meeting in database."""
@@ -148,10 +224,51 @@ class Meeting:
         result = collection.insert_one(meeting_data)
         return str(result.inserted_id)
     
+    @classmethod
+    def create_many(cls, meetings):
+        """Insert several meetings with one unordered insert_many.
+        
+        Returns an ``(id, error)`` pair per meeting, in order; ``id`` is None
+        for the meetings that could not be inserted.
+        """
+        collection = get_collection('meetings')
+        documents = [meeting.to_dict() for meeting in meetings]
+        try:
+            collection.insert_many(documents, ordered=False)
+            failed = {}
+        except BulkWriteError as e:
+            failed = {error['index']: error['errmsg'] for error in e.details['writeErrors']}
+        # insert_many sets the _id of each document it sends
+        return [(None, failed[index]) if index in failed else (str(document['_id']), None)
+                for index, document in enumerate(documents)]
+    
+    @classmethod
+    def bulk_update(cls, user_id, updates):
+        """Apply ``(meeting_id, update_data)`` pairs to a user's meetings with one unordered bulk_write.
+        
+        Returns an ``(exists, error)`` pair per update, in order; ``exists``
+        is False when the meeting does not exist for the user and ``error``
+        is set for the updates the database rejected.
+        """
+        collection = get_collection('meetings')
+        ids = [normalize_id(meeting_id) for meeting_id, _ in updates]
+        found = {str(doc['_id']) for doc in collection.find({'_id': {'$in': ids}, 'user_id': user_id}, {'_id': 1})}
+        now = datetime.utcnow()
+        positions = [index for index, meeting_id in enumerate(ids) if str(meeting_id) in found]
+        requests = [UpdateOne({'_id': ids[index], 'user_id': user_id}, {'$set': dict(updates[index][1], updated_at=now)})
+                    for index in positions]
+        failed = {}
+        if requests:
+            try:
+                collection.bulk_write(requests, ordered=False)
+            except BulkWriteError as e:
+                failed = {positions[error['index']]: error['errmsg'] for error in e.details['writeErrors']}
+        return [(str(meeting_id) in found, failed.get(index)) for index, meeting_id in enumerate(ids)]
+    
     def update(self, meeting_id, user_id, update_data):
         """Update meeting data."""
         collection = get_collection('meetings')
-        meeting_id = ObjectId(meeting_id) if isinstance(meeting_id, str) else meeting_id
+        meeting_id = normalize_id(meeting_id)
         update_data['updated_at'] = datetime.utcnow()
         
         result = collection.update_one(
@@ -163,7 +280,7 @@ class Meeting:
     def delete(self, meeting_id, user_id):
         """Delete meeting."""
         collection = get_collection('meetings')
-        meeting_id = ObjectId(meeting_id) if isinstance(meeting_id, str) else meeting_id
+        meeting_id = normalize_id(meeting_id)
         
         result = collection.delete_one({
             '_id': meeting_id, 
@@ -172,20 +289,20 @@ class Meeting:
         return result.deleted_count > 0
     
     @classmethod
-    def search_by_text(cls, user_id, search_text):
+    def search_by_text(cls, user_id, search_text, projection=None):
         """Search meetings by text across company, contact, and subject."""
         collection = get_collection('meetings')
         query = {
             'user_id': user_id,
             '$text': {'$search': search_text}
         }
-        cursor = collection.find(query)
-        return [cls(**meeting_data) for meeting_data in cursor]
+        cursor = collection.find(query, projection)
+        return [cls.from_document(meeting_data) for meeting_data in cursor]
     
     @classmethod
     def group_by_date(cls, user_id, start_date=None, end_date=None):
-        """Group meetings by date for calendar view."""
-        collection = get_collection('meetings')
+        """Group meetings by date for calendar view (analytics read profile)."""
+        collection = get_collection('meetings', read_profile='analytics')
         pipeline = [
             {'$match': {'user_id': user_id}},
             {'$group': {
@@ -4,19 +4,30 @@ Notification model for MongoDB
 
 from datetime import datetime
 from bson import ObjectId
+from pymongo import UpdateMany
 from ..utils.db import get_collection
+from ..utils import pagination
+from ..utils.indexes import register_index, sync_indexes
+from ..utils.projection import document_kwargs
+from ..utils.write_behind import defer_write
+
+# find_by_user/find_page(read=...), count_unread, mark_all_as_read and delete_all_read
+register_index('notifications', [('user_id', 1), ('read', 1), ('created_at', -1), ('_id', -1)])
+# find_by_user, find_page and find_recent, newest first
+register_index('notifications', [('user_id', 1), ('created_at', -1), ('_id', -1)])
+# find_by_type
+register_index('notifications', [('user_id', 1), ('type', 1), ('created_at', -1)])
 
 def create_notification_indexes():
     """Create indexes for notifications collection."""
-    notifications = get_collection('notifications')
-    notifications.create_index('user_id')
-    notifications.create_index('created_at')
-    notifications.create_index('read')
-    return True
+    return not sync_indexes(['notifications'])['errors']
 
 class Notification:
     """Notification model for user notifications."""
     
+    # Stored fields, the ones a projection (or ?fields=) can select
+    FIELDS = ('user_id', 'type', 'title', 'description', 'read', 'meeting_id', 'task_id', 'created_at')
+    
     def __init__(self, user_id, notification_type, title, description, 
                  read=False, meeting_id=None, task_id=None, _id=None, created_at=None):
         # Preserve DB id if provided
@@ -49,7 +60,12 @@ class Notification:
         }
     
     @classmethod
-    def find_by_user(cls, user_id, read=None, limit=50, skip=0):
+    def from_document(cls, data):
+        """Build a notification from a stored document, which may be a projection."""
+        return cls(**document_kwargs(cls, data, renames={'type': 'notification_type'}))
+    
+    @classmethod
+    def find_by_user(cls, user_id, read=None, limit=50, skip=0, projection=None):
         """Find notifications by user with optional filter for read status."""
         collection = get_collection('notifications')
         query = {'user_id': user_id}
@@ -57,19 +73,32 @@ class Notification:
         if read is not None:
             query['read'] = read
         
-        cursor = collection.find(query).sort('created_at', -1).skip(skip).limit(limit)
-        return [cls(**notification_data) for notification_data in cursor]
+        cursor = collection.find(query, projection).sort('created_at', -1).skip(skip).limit(limit)
+        return [cls.from_document(notification_data) for notification_data in cursor]
+    
+    @classmethod
+    def find_page(cls, user_id, read=None, limit=pagination.DEFAULT_LIMIT, cursor=None, projection=None):
+        """Find one page of a user's notifications, newest first, in (created_at, _id) order.
+        
+        Returns ``(notifications, next_cursor)``; next_cursor is None on the last page.
+        """
+        query = {'user_id': user_id}
+        if read is not None:
+            query['read'] = read
+        documents, next_cursor = pagination.find_page(
+            get_collection('notifications'), query, 'created_at', -1, limit, cursor, projection)
+        return [cls.from_document(notification_data) for notification_data in documents], next_cursor
     
     @classmethod
-    def find_by_id(cls, notification_id, user_id=None):
+    def find_by_id(cls, notification_id, user_id=None, projection=None):
         """Find notification by ID, optionally filtered by user."""
         collection = get_collection('notifications')
         query = {'_id': ObjectId(notification_id) if isinstance(notification_id, str) else notification_id}
         if user_id:
             query['user_id'] = user_id
         
-        notification_data = collection.find_one(query)
-        return cls(**notification_data) if notification_data else None
+        notification_data = collection.find_one(query, projection)
+        return cls.from_document(notification_data) if notification_data else None
     
     @classmethod
     def count_unread(cls, user_id):
@@ -80,20 +109,36 @@ class Notification:
             'read': False
         })
         return count
+
+    @classmethod
+    def count_summary(cls, user_id):
+        """Count a user's notifications and unread notifications in one aggregation."""
+        collection = get_collection('notifications')
+        pipeline = [
+            {'$match': {'user_id': user_id}},
+            {'$group': {
+                '_id': None,
+                'total': {'$sum': 1},
+                'unread': {'$sum': {'$cond': [{'$eq': ['$read', False]}, 1, 0]}}
+            }}
+        ]
+
+        counts = next(iter(collection.aggregate(pipeline)), {})
+        return {key: counts.get(key, 0) for key in ('total', 'unread')}
     
     @classmethod
-    def find_by_type(cls, user_id, notification_type):
+    def find_by_type(cls, user_id, notification_type, projection=None):
         """Find notifications by type."""
         collection = get_collection('notifications')
         query = {
             'user_id': user_id,
             'type': notification_type
         }
-        cursor = collection.find(query).sort('created_at', -1)
-        return [cls(**notification_data) for notification_data in cursor]
+        cursor = collection.find(query, projection).sort('created_at', -1)
+        return [cls.from_document(notification_data) for notification_data in cursor]
     
     @classmethod
-    def find_recent(cls, user_id, hours=24):
+    def find_recent(cls, user_id, hours=24, projection=None):
         """Find notifications from last N hours."""
         collection = get_collection('notifications')
         from datetime import datetime, timedelta
@@ -105,8 +150,8 @@ class Notification:
             'created_at': {'$gte': cutoff_time}
         }
         
-        cursor = collection.find(query).sort('created_at', -1)
-        return [cls(**notification_data) for notification_data in cursor]
+        cursor = collection.find(query, projection).sort('created_at', -1)
+        return [cls.from_document(notification_data) for notification_data in cursor]
     
     def create(self):
         """Create notification in database."""
@@ -127,13 +172,18 @@ class Notification:
         return result.modified_count > 0
     
     def mark_all_as_read(self, user_id):
-        """Mark all notifications as read for user."""
-        collection = get_collection('notifications')
-        result = collection.update_many(
-            {'user_id': user_id, 'read': False}, 
+        """Mark all notifications as read for user (through the write-behind queue, if on).
+
+        A queued write only marks the notifications created so far, so it
+        doesn't also mark the ones created before it is flushed; a write run
+        right away has no such cutoff.
+        """
+        query = {'user_id': user_id, 'read': False}
+        result = defer_write('notifications', UpdateMany(
+            dict(query, created_at={'$lte': datetime.utcnow()}), 
             {'$set': {'read': True}}
-        )
-        return result.modified_count > 0
+        ), key=('mark_all_as_read', user_id), immediate=UpdateMany(query, {'$set': {'read': True}}))
+        return result is None or result.modified_count > 0
     
     def delete(self, notification_id, user_id):
         """Delete notification."""
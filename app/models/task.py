@@ -3,21 +3,35 @@ Task model for MongoDB
 """
 
 from datetime import datetime
-from bson import ObjectId
-from ..utils.db import get_collection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from ..utils.db import get_collection, normalize_id
+from ..utils import pagination
+from ..utils.indexes import register_index, sync_indexes
+from ..utils.projection import document_kwargs
+
+# find_by_user/find_page(status=...) sorted by due_date (and _id for the page order)
+register_index('tasks', [('user_id', 1), ('status', 1), ('due_date', 1), ('_id', 1)])
+# find_page (keyset pagination on (due_date, _id)), and find_by_user,
+# find_upcoming and find_overdue, whose due_date sort/range it also serves
+register_index('tasks', [('user_id', 1), ('due_date', 1), ('_id', 1)])
+# find_today: due_date is matched exactly, priority is the sort key and the
+# status range comes last (equality, sort, range)
+register_index('tasks', [('user_id', 1), ('due_date', 1), ('priority', -1), ('status', 1)])
+# find_by_meeting, sorted by priority
+register_index('tasks', [('user_id', 1), ('meeting_id', 1), ('priority', -1)])
 
 def create_task_indexes():
     """Create indexes for tasks collection."""
-    tasks = get_collection('tasks')
-    tasks.create_index('user_id')
-    tasks.create_index('due_date')
-    tasks.create_index('status')
-    tasks.create_index('assignee')
-    return True
+    return not sync_indexes(['tasks'])['errors']
 
 class Task:
     """Task model for task management and Kanban boards."""
     
+    # Stored fields, the ones a projection (or ?fields=) can select
+    FIELDS = ('user_id', 'title', 'description', 'meeting_id', 'assignee', 'assignee_user_id',
+              'due_date', 'priority', 'status', 'tags', 'created_at', 'updated_at', 'completed_at')
+    
     def __init__(self, user_id, title, description=None, meeting_id=None, 
                  assignee=None, assignee_user_id=None, due_date=None, 
                  priority='medium', status='todo', tags=None,
@@ -63,9 +77,12 @@ class Task:
         }
     
     @classmethod
-    def find_by_user(cls, user_id, status=None, priority=None, assignee=None):
-        """Find tasks by user with optional filters."""
-        collection = get_collection('tasks')
+    def from_document(cls, data):
+        """Build a task from a stored document, which may be a projection."""
+        return cls(**document_kwargs(cls, data))
+    
+    @staticmethod
+    def _user_query(user_id, status=None, priority=None, assignee=None):
         query = {'user_id': user_id}
         
         if status:
@@ -76,34 +93,63 @@ class Task:
         
         if assignee:
             query['assignee'] = assignee
+        return query
+    
+    @classmethod
+    def find_by_user(cls, user_id, status=None, priority=None, assignee=None, projection=None, limit=None):
+        """Find tasks by user with optional filters (the first ``limit`` ones, if given)."""
+        return list(cls.iter_by_user(user_id, status, priority, assignee, projection, limit=limit))
+    
+    @classmethod
+    def iter_by_user(cls, user_id, status=None, priority=None, assignee=None, projection=None, batch_size=None,
+                     limit=None):
+        """Yield a user's tasks as the cursor returns them (see find_by_user)."""
+        collection = get_collection('tasks')
+        query = cls._user_query(user_id, status, priority, assignee)
+        cursor = collection.find(query, projection).sort('due_date', 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        for task_data in cursor:
+            yield cls.from_document(task_data)
+    
+    @classmethod
+    def find_page(cls, user_id, status=None, priority=None, assignee=None,
+                  limit=pagination.DEFAULT_LIMIT, cursor=None, projection=None):
+        """Find one page of a user's tasks in (due_date, _id) order.
         
-        cursor = collection.find(query).sort('due_date', 1)
-        return [cls(**task_data) for task_data in cursor]
+        Returns ``(tasks, next_cursor)``; next_cursor is None on the last page.
+        """
+        query = cls._user_query(user_id, status, priority, assignee)
+        documents, next_cursor = pagination.find_page(
+            get_collection('tasks'), query, 'due_date', 1, limit, cursor, projection)
+        return [cls.from_document(task_data) for task_data in documents], next_cursor
     
     @classmethod
-    def find_by_id(cls, task_id, user_id=None):
+    def find_by_id(cls, task_id, user_id=None, projection=None):
         """Find task by ID, optionally filtered by user."""
         collection = get_collection('tasks')
-        query = {'_id': ObjectId(task_id) if isinstance(task_id, str) else task_id}
+        query = {'_id': normalize_id(task_id)}
         if user_id:
             query['user_id'] = user_id
         
-        task_data = collection.find_one(query)
-        return cls(**task_data) if task_data else None
+        task_data = collection.find_one(query, projection)
+        return cls.from_document(task_data) if task_data else None
     
     @classmethod
-    def find_by_meeting(cls, meeting_id, user_id):
+    def find_by_meeting(cls, meeting_id, user_id, projection=None):
         """Find tasks associated with a specific meeting."""
         collection = get_collection('tasks')
         query = {
             'user_id': user_id,
             'meeting_id': meeting_id
         }
-        cursor = collection.find(query).sort('priority', -1)
-        return [cls(**task_data) for task_data in cursor]
+        cursor = collection.find(query, projection).sort('priority', -1)
+        return [cls.from_document(task_data) for task_data in cursor]
     
     @classmethod
-    def find_upcoming(cls, user_id, days=7):
+    def find_upcoming(cls, user_id, days=7, projection=None):
         """Find upcoming tasks within specified days."""
         collection = get_collection('tasks')
         from datetime import datetime, timedelta
@@ -117,11 +163,11 @@ class Task:
             'status': {'$ne': 'done'}
         }
         
-        cursor = collection.find(query).sort('due_date', 1)
-        return [cls(**task_data) for task_data in cursor]
+        cursor = collection.find(query, projection).sort('due_date', 1)
+        return [cls.from_document(task_data) for task_data in cursor]
     
     @classmethod
-    def find_today(cls, user_id):
+    def find_today(cls, user_id, projection=None):
         """Find tasks due today."""
         from datetime import datetime
         today = datetime.now().strftime('%Y-%m-%d')
@@ -133,11 +179,11 @@ class Task:
             'status': {'$ne': 'done'}
         }
         
-        cursor = collection.find(query).sort('priority', -1)
-        return [cls(**task_data) for task_data in cursor]
+        cursor = collection.find(query, projection).sort('priority', -1)
+        return [cls.from_document(task_data) for task_data in cursor]
     
     @classmethod
-    def find_overdue(cls, user_id):
+    def find_overdue(cls, user_id, projection=None):
         """Find overdue tasks."""
         from datetime import datetime
         
@@ -150,8 +196,39 @@ class Task:
             'status': {'$ne': 'done'}
         }
         
-        cursor = collection.find(query).sort('due_date', 1)
-        return [cls(**task_data) for task_data in cursor]
+        cursor = collection.find(query, projection).sort('due_date', 1)
+        return [cls.from_document(task_data) for task_data in cursor]
+
+    @classmethod
+    def count_summary(cls, user_id):
+        """Count a user's tasks in one aggregation.
+
+        Returns ``total``, per-status (``todo``, ``inprogress``, ``done``)
+        and ``overdue`` (as in find_overdue) counts.
+        """
+        collection = get_collection('tasks')
+        from datetime import datetime
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        pipeline = [
+            {'$match': {'user_id': user_id}},
+            {'$group': {
+                '_id': None,
+                'total': {'$sum': 1},
+                'todo': {'$sum': {'$cond': [{'$eq': ['$status', 'todo']}, 1, 0]}},
+                'inprogress': {'$sum': {'$cond': [{'$eq': ['$status', 'inprogress']}, 1, 0]}},
+                'done': {'$sum': {'$cond': [{'$eq': ['$status', 'done']}, 1, 0]}},
+                # $lt in an expression also matches null, unlike in a query
+                'overdue': {'$sum': {'$cond': [{'$and': [
+                    {'$ne': ['$status', 'done']},
+                    {'$gt': ['$due_date', None]},
+                    {'$lt': ['$due_date', today]}
+                ]}, 1, 0]}}
+            }}
+        ]
+
+        counts = next(iter(collection.aggregate(pipeline)), {})
+        return {key: counts.get(key, 0) for key in ('total', 'todo', 'inprogress', 'done', 'overdue')}
     
     @classmethod
     def find_by_status(cls, user_id):
@@ -186,19 +263,68 @@ class Task:
         result = collection.insert_one(task_data)
         return str(result.inserted_id)
     
-    def update(self, task_id, user_id, update_data):
-        """Update task data."""
-        collection = get_collection('tasks')
-        task_id = ObjectId(task_id) if isinstance(task_id, str) else task_id
-        
+    @staticmethod
+    def _update_fields(update_data, completed_at=None):
+        """Add the timestamps an update of ``update_data`` implies."""
         # Handle status change and completed_at timestamp
         if 'status' in update_data:
-            if update_data['status'] == 'done' and not self.completed_at:
+            if update_data['status'] == 'done' and not completed_at:
                 update_data['completed_at'] = datetime.utcnow()
             elif update_data['status'] != 'done':
                 update_data['completed_at'] = None
         
         update_data['updated_at'] = datetime.utcnow()
+        return update_data
+    
+    @classmethod
+    def create_many(cls, tasks):
+        """Insert several tasks with one unordered insert_many.
+        
+        Returns an ``(id, error)`` pair per task, in order; ``id`` is None
+        for the tasks that could not be inserted.
+        """
+        collection = get_collection('tasks')
+        documents = [task.to_dict() for task in tasks]
+        try:
+            collection.insert_many(documents, ordered=False)
+            failed = {}
+        except BulkWriteError as e:
+            failed = {error['index']: error['errmsg'] for error in e.details['writeErrors']}
+        # insert_many sets the _id of each document it sends
+        return [(None, failed[index]) if index in failed else (str(document['_id']), None)
+                for index, document in enumerate(documents)]
+    
+    @classmethod
+    def bulk_update(cls, user_id, updates):
+        """Apply ``(task_id, update_data)`` pairs to a user's tasks with one unordered bulk_write.
+        
+        Returns an ``(exists, error)`` pair per update, in order; ``exists``
+        is False when the task does not exist for the user and ``error`` is
+        set for the updates the database rejected.
+        """
+        collection = get_collection('tasks')
+        ids = [normalize_id(task_id) for task_id, _ in updates]
+        # Keep the stored completed_at of tasks that are already done
+        found = {str(doc['_id']): doc.get('completed_at')
+                 for doc in collection.find({'_id': {'$in': ids}, 'user_id': user_id}, {'_id': 1, 'completed_at': 1})}
+        positions = [index for index, task_id in enumerate(ids) if str(task_id) in found]
+        requests = [UpdateOne({'_id': ids[index], 'user_id': user_id},
+                              {'$set': cls._update_fields(updates[index][1], found[str(ids[index])])})
+                    for index in positions]
+        failed = {}
+        if requests:
+            try:
+                collection.bulk_write(requests, ordered=False)
+            except BulkWriteError as e:
+                failed = {positions[error['index']]: error['errmsg'] for error in e.details['writeErrors']}
+        return [(str(task_id) in found, failed.get(index)) for index, task_id in enumerate(ids)]
+    
+    def update(self, task_id, user_id, update_data):
+        """Update task data."""
+        collection = get_collection('tasks')
+        task_id = normalize_id(task_id)
+        
+        self._update_fields(update_data, self.completed_at)
         
         result = collection.update_one(
             {'_id': task_id, 'user_id': user_id}, 
@@ -209,7 +335,7 @@ class Task:
     def move_to_status(self, task_id, user_id, new_status):
         """Move task to a different status column."""
         collection = get_collection('tasks')
-        task_id = ObjectId(task_id) if isinstance(task_id, str) else task_id
+        task_id = normalize_id(task_id)
         
         update_data = {
             'status': new_status,
@@ -231,7 +357,7 @@ class Task:
     def delete(self, task_id, user_id):
         """Delete task."""
         collection = get_collection('tasks')
-        task_id = ObjectId(task_id) if isinstance(task_id, str) else task_id
+        task_id = normalize_id(task_id)
         
         result = collection.delete_one({
             '_id': task_id, 
@@ -3,14 +3,29 @@ User model for MongoDB
 """
 
 from datetime import datetime
+import copy
 from bson import ObjectId
+from pymongo import UpdateOne
+from ..utils.cache import get_token_versions, get_user_cache
 from ..utils.db import get_collection, normalize_id
+from ..utils.write_behind import defer_write
+from ..utils.indexes import register_index, sync_indexes
+
+# Login and registration look users up by email
+register_index('users', 'email', unique=True)
+# The token version map loads the users whose tokens were revoked recently
+register_index('users', 'tokens_revoked_at')
 
 def create_user_index():
     """Create indexes for users collection."""
-    users = get_collection('users')
-    users.create_index('email', unique=True)
-    return True
+    return not sync_indexes(['users'])['errors']
+
+def _copy_preferences(preferences):
+    """Copy a preferences dict, deep-copying only its nested values (usually none)."""
+    if not preferences:
+        return preferences
+    return {key: copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+            for key, value in preferences.items()}
 
 class User:
     """User model for authentication and preferences.
@@ -22,7 +37,8 @@ class User:
     """
     
     def __init__(self, email, password, full_name, role='user', avatar_initials=None,
-                 preferences=None, _id=None, created_at=None, updated_at=None, last_login=None):
+                 preferences=None, _id=None, created_at=None, updated_at=None, last_login=None,
+                 token_version=0):
         self._id = _id
         # Expose a string id property for convenience
         try:
@@ -51,6 +67,8 @@ class User:
         self.created_at = created_at or datetime.utcnow()
         self.updated_at = updated_at or datetime.utcnow()
         self.last_login = last_login
+        # Bumped to revoke the user's tokens (see revoke_tokens)
+        self.token_version = token_version or 0
     
     def to_dict(self):
         """Convert user object to dictionary."""
@@ -63,17 +81,16 @@ class User:
             'preferences': self.preferences,
             'created_at': self.created_at,
             'updated_at': self.updated_at,
-            'last_login': self.last_login
+            'last_login': self.last_login,
+            'token_version': self.token_version
         }
     
     @classmethod
-    def find_by_email(cls, email):
-        """Find user by email."""
-        collection = get_collection('users')
-        user_data = collection.find_one({'email': email})
-        if not user_data:
-            return None
-        # Create user instance and preserve DB id and timestamps
+    def from_document(cls, user_data):
+        """Create a user from a MongoDB document, preserving its id and timestamps.
+
+        Fields the model doesn't hold (such as ``tokens_revoked_at``) are ignored.
+        """
         return cls(
             email=user_data.get('email'),
             password=user_data.get('password'),
@@ -84,9 +101,19 @@ class User:
             _id=user_data.get('_id'),
             created_at=user_data.get('created_at'),
             updated_at=user_data.get('updated_at'),
-            last_login=user_data.get('last_login')
+            last_login=user_data.get('last_login'),
+            token_version=user_data.get('token_version', 0)
         )
     
+    @classmethod
+    def find_by_email(cls, email):
+        """Find user by email."""
+        collection = get_collection('users')
+        user_data = collection.find_one({'email': email})
+        if not user_data:
+            return None
+        return cls.from_document(user_data)
+    
     @classmethod
     def find_by_id(cls, user_id):
         """Find user by ID."""
@@ -95,19 +122,58 @@ class User:
         user_data = collection.find_one({'_id': user_id})
         if not user_data:
             return None
-        # Create user instance and preserve DB id and timestamps
-        return cls(
-            email=user_data.get('email'),
-            password=user_data.get('password'),
-            full_name=user_data.get('full_name'),
-            role=user_data.get('role', 'user'),
-            avatar_initials=user_data.get('avatar_initials'),
-            preferences=user_data.get('preferences'),
-            _id=user_data.get('_id'),
-            created_at=user_data.get('created_at'),
-            updated_at=user_data.get('updated_at'),
-            last_login=user_data.get('last_login')
+        return cls.from_document(user_data)
+    
+    @classmethod
+    def find_principal(cls, user_id):
+        """Find the user authenticating a request, through the user cache.
+
+        The returned user has no ``password`` (the hash is never cached);
+        code that needs it must use ``find_by_id``.
+        """
+        cache = get_user_cache()
+        principal = cache.get(user_id) if cache is not None else None
+        if principal is None:
+            principal = cls.find_by_id(user_id)
+            if principal is None:
+                return None
+            principal.password = None
+            if cache is not None:
+                cache.set(user_id, principal)
+        # A copy, so a controller changing attributes doesn't change the
+        # cache; preferences are the only mutable attribute and get their own
+        principal = copy.copy(principal)
+        principal.preferences = _copy_preferences(principal.preferences)
+        return principal
+    
+    @classmethod
+    def from_claims(cls, payload):
+        """Build the request's user from the claims of an access token.
+
+        Only the claims are known (no timestamps, no password), so such a
+        user has ``claims_only`` set; load the full user with
+        ``find_principal`` when more is needed.
+        """
+        user = cls(
+            email=payload.get('email'),
+            password=None,
+            full_name=payload.get('full_name') or '',
+            role=payload.get('role', 'user'),
+            avatar_initials=payload.get('avatar_initials'),
+            # The payload may be shared with the verified-token cache
+            preferences=_copy_preferences(payload.get('preferences')),
+            _id=payload['user_id'],
+            token_version=payload.get('tv', 0)
         )
+        user.claims_only = True
+        return user
+    
+    @staticmethod
+    def invalidate_cached(user_id):
+        """Drop a user from this process's user cache after a change."""
+        cache = get_user_cache()
+        if cache is not None:
+            cache.invalidate(str(user_id))
     
     def create(self):
         """Create user in database."""
@@ -127,25 +193,62 @@ class User:
         collection = get_collection('users')
         user_id = normalize_id(user_id)
         update_data['updated_at'] = datetime.utcnow()
-        result = collection.update_one(
-            {'_id': user_id}, 
-            {'$set': update_data}
-        )
+        update = {'$set': update_data}
+        # Tokens issued before a password or role change are revoked
+        revoke = 'password' in update_data or 'role' in update_data
+        if revoke:
+            update = {'$set': dict(update_data, tokens_revoked_at=update_data['updated_at']),
+                      '$inc': {'token_version': 1}}
+        result = collection.update_one({'_id': user_id}, update)
+        self.invalidate_cached(user_id)
+        if revoke:
+            self._publish_token_version(user_id)
         return result.modified_count > 0
     
-    def update_last_login(self, user_id):
-        """Update last login timestamp."""
+    def update_password_hash(self, user_id, old_hash, new_hash):
+        """Replace a password hash by a rehash of the same password.
+
+        Unlike a password change this keeps the user's tokens, and it only
+        applies while ``old_hash`` is still the stored hash, so it can't
+        undo a concurrent password change. Goes through the write-behind
+        queue, if on.
+        """
+        user_id = normalize_id(user_id)
+        defer_write('users', UpdateOne(
+            {'_id': user_id, 'password': old_hash},
+            {'$set': {'password': new_hash}}
+        ), key=('password', user_id))
+    
+    def revoke_tokens(self, user_id):
+        """Revoke every token issued to the user so far."""
         collection = get_collection('users')
         user_id = normalize_id(user_id)
-        result = collection.update_one(
+        result = collection.update_one({'_id': user_id}, {'$inc': {'token_version': 1},
+                                                          '$set': {'tokens_revoked_at': datetime.utcnow()}})
+        self.invalidate_cached(user_id)
+        self._publish_token_version(user_id)
+        return result.modified_count > 0
+    
+    @staticmethod
+    def _publish_token_version(user_id):
+        """Make this process reject the user's revoked tokens right away."""
+        user_data = get_collection('users').find_one({'_id': user_id}, {'token_version': 1, 'tokens_revoked_at': 1})
+        if user_data:
+            get_token_versions().set(str(user_id), user_data.get('token_version', 0), user_data.get('tokens_revoked_at'))
+    
+    def update_last_login(self, user_id):
+        """Update last login timestamp (through the write-behind queue, if on)."""
+        user_id = normalize_id(user_id)
+        result = defer_write('users', UpdateOne(
             {'_id': user_id}, 
             {'$set': {'last_login': datetime.utcnow()}}
-        )
-        return result.modified_count > 0
+        ), key=('last_login', user_id))
+        self.invalidate_cached(user_id)
+        return result is None or result.modified_count > 0
     
     @classmethod
     def find_by_role(cls, role):
         """Find users by role."""
         collection = get_collection('users')
         cursor = collection.find({'role': role})
-        return [cls(**user_data) for user_data in cursor]
+        return [cls.from_document(user_data) for user_data in cursor]
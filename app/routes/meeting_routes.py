@@ -10,6 +10,8 @@ meeting_bp = Blueprint('meetings', __name__)
 
 # Meeting endpoints
 meeting_bp.route('', methods=['GET'])(require_auth(MeetingController.get_all_meetings))
+meeting_bp.route('/bulk', methods=['POST'])(require_auth(MeetingController.bulk_create_meetings))
+meeting_bp.route('/bulk', methods=['PUT'])(require_auth(MeetingController.bulk_update_meetings))
 meeting_bp.route('/<meeting_id>', methods=['GET'])(require_auth(MeetingController.get_meeting))
 meeting_bp.route('', methods=['POST'])(require_auth(MeetingController.create_meeting))
 meeting_bp.route('/<meeting_id>', methods=['PUT'])(require_auth(MeetingController.update_meeting))
@@ -10,6 +10,8 @@ task_bp = Blueprint('tasks', __name__)
 
 # Task endpoints
 task_bp.route('', methods=['GET'])(require_auth(TaskController.get_all_tasks))
+task_bp.route('/bulk', methods=['POST'])(require_auth(TaskController.bulk_create_tasks))
+task_bp.route('/bulk', methods=['PUT'])(require_auth(TaskController.bulk_update_tasks))
 task_bp.route('/<task_id>', methods=['GET'])(require_auth(TaskController.get_task))
 task_bp.route('', methods=['POST'])(require_auth(TaskController.create_task))
 task_bp.route('/<task_id>', methods=['PUT'])(require_auth(TaskController.update_task))
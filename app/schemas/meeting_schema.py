@@ -77,6 +77,8 @@ class MeetingFilterSchema(Schema):
     priority = fields.Str(validate=validate.OneOf(['high', 'medium', 'low']))
     page = fields.Int(missing=1, validate=validate.Range(min=1))
     limit = fields.Int(missing=20, validate=validate.Range(min=1, max=100))
+    # Opaque keyset cursor (next_cursor of the previous page)
+    cursor = fields.Str(validate=validate.Length(min=1))
 
 class MeetingResponseSchema(Schema):
     """Meeting response schema for API."""
@@ -45,6 +45,8 @@ class NotificationFilterSchema(Schema):
     type = fields.Str(validate=validate.OneOf(['meeting', 'task', 'followup', 'system']))
     page = fields.Int(missing=1, validate=validate.Range(min=1))
     limit = fields.Int(missing=50, validate=validate.Range(min=1, max=100))
+    # Opaque keyset cursor (next_cursor of the previous page)
+    cursor = fields.Str(validate=validate.Length(min=1))
 
 class BulkNotificationUpdateSchema(Schema):
     """Bulk notification update validation schema."""
@@ -56,6 +56,8 @@ class TaskFilterSchema(Schema):
     due_date = fields.Str(validate=validate.Regexp(r'^\d{4}-\d{2}-\d{2}$'))
     page = fields.Int(missing=1, validate=validate.Range(min=1))
     limit = fields.Int(missing=20, validate=validate.Range(min=1, max=100))
+    # Opaque keyset cursor (next_cursor of the previous page)
+    cursor = fields.Str(validate=validate.Length(min=1))
 
 class TaskResponseSchema(Schema):
     """Task response schema for API."""
@@ -0,0 +1,77 @@
+"""
+Helpers for the bulk create/update endpoints
+
+A bulk request body is a JSON array. Every item is validated (one
+``many=True`` schema load), the valid ones are written in a single
+unordered batch, and the response reports a result per item, in request
+order, so one bad item doesn't fail the others.
+"""
+
+from flask import current_app, jsonify
+from marshmallow import ValidationError
+
+
+class BulkRequestError(ValueError):
+    """The body as a whole is unusable (not a list, empty or too long)."""
+
+
+def load_bulk(schema_class, payload, with_ids=False):
+    """Validate the items of a bulk request.
+
+    Returns ``(entries, errors)``: ``entries`` lists ``(index, data)`` (or
+    ``(index, id, data)`` with ``with_ids``, where each item carries the
+    ``id`` of the document to update) for the valid items, and ``errors``
+    maps the index of each invalid item to its validation messages.
+    """
+    if not isinstance(payload, list) or not payload:
+        raise BulkRequestError('Expected a non-empty JSON array of items')
+    max_items = current_app.config.get('BULK_MAX_ITEMS', 500)
+    if len(payload) > max_items:
+        raise BulkRequestError(f'At most {max_items} items per request')
+
+    errors = {}
+    ids = [None] * len(payload)
+    items = []
+    for index, item in enumerate(payload):
+        if not isinstance(item, dict):
+            items.append({})
+            errors[index] = {'_schema': ['Invalid input type.']}
+            continue
+        if with_ids:
+            item = dict(item)
+            ids[index] = item.pop('id', None)
+            if not isinstance(ids[index], str) or not ids[index]:
+                errors[index] = {'id': ['Missing data for required field.']}
+        items.append(item)
+
+    try:
+        loaded = schema_class(many=True).load(items)
+    except ValidationError as e:
+        for index, messages in e.messages.items():
+            errors[index] = dict(errors.get(index, {}), **messages)
+        loaded = e.valid_data
+
+    entries = [(index, ids[index], data) if with_ids else (index, data)
+               for index, data in enumerate(loaded) if index not in errors]
+    return entries, errors
+
+
+def bulk_response(results, errors, ok_status):
+    """Build the response for a bulk request.
+
+    ``results`` maps item indexes to their result dicts (each with a
+    ``status``); ``errors`` are the validation errors from load_bulk. The
+    HTTP status is ``ok_status`` when no item failed, 207 for a partial
+    success and 400 when every item failed.
+    """
+    for index, messages in errors.items():
+        results[index] = {'status': 'invalid', 'errors': messages}
+    items = [dict(results[index], index=index) for index in sorted(results)]
+    failed = sum(1 for item in items if item['status'] in ('invalid', 'failed', 'not_found'))
+    status = ok_status if not failed else (400 if failed == len(items) else 207)
+    return jsonify({
+        'success': not failed,
+        'data': items,
+        'count': len(items) - failed,
+        'failed': failed
+    }), status
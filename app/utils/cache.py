@@ -0,0 +1,217 @@
+"""
+In-process caches
+
+``TTLCache`` is a bounded, thread-safe LRU whose entries also expire after
+a fixed time. Each worker process has its own copy, so invalidations only
+reach the process that makes them; the TTL bounds how stale the other
+workers can be. ``TokenVersionMap`` is the same idea for token revocations.
+The token cache holds verified JWT payloads until their ``exp``.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import threading
+import time
+
+from .db import get_collection
+
+_user_cache = None
+_token_versions = None
+_token_cache = None
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU cache of at most ``maxsize`` entries, each kept for ``ttl`` seconds."""
+
+    def __init__(self, maxsize=10000, ttl=30, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key``, or ``default`` if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self._stats['expirations'] += 1
+            self._stats['misses'] += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Cache ``value`` under ``key``, evicting the least recently used entry if full.
+
+        ``ttl`` overrides the cache's TTL for this entry.
+        """
+        with self._lock:
+            self._entries[key] = (value, self._clock() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key):
+        """Drop the entry for ``key``, if any."""
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is not _MISSING:
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        """Drop every entry (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the hit/miss counters, hit rate and current size."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(self._stats, size=len(self._entries), maxsize=self.maxsize, ttl=self.ttl,
+                        hit_rate=round(self._stats['hits'] / lookups, 4) if lookups else None)
+
+
+class TokenVersionMap:
+    """Current ``token_version`` of the users whose tokens were recently revoked.
+
+    Tokens with claims (``JWT_CLAIMS_TOKENS``) carry the version they were
+    issued with; a lower one than the user's current version means the
+    token was revoked. A revocation stops mattering once every token issued
+    before it has expired, so the map only holds the users revoked within
+    the last ``window`` seconds (the access token lifetime). Every
+    ``refresh_interval`` seconds one request thread fetches the revocations
+    made since the previous fetch (give or take ``overlap`` seconds of
+    clock skew between workers) while the others keep using the map, so
+    checking a token costs no database access in between.
+    """
+
+    def __init__(self, refresh_interval=5, window=900, overlap=60, clock=time.monotonic, now=datetime.utcnow):
+        self.refresh_interval = refresh_interval
+        self.window = timedelta(seconds=window)
+        self.overlap = timedelta(seconds=overlap)
+        self._clock = clock
+        self._now = now
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._versions = {}
+        self._loaded_at = None
+        self._fetched_until = None
+        self._stats = {'checks': 0, 'reloads': 0, 'revoked': 0}
+
+    def _due(self):
+        return self._loaded_at is None or self._clock() - self._loaded_at >= self.refresh_interval
+
+    def _refresh(self):
+        """Fetch the recent revocations if the map is due; only one thread at a time does.
+
+        The first load is waited for; later ones are skipped by the threads
+        that find another one running.
+        """
+        if not self._due() or not self._refresh_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._due():
+                self._reload()
+        finally:
+            self._refresh_lock.release()
+
+    def _reload(self):
+        now = self._now()
+        horizon = now - self.window - self.overlap
+        since = horizon if self._fetched_until is None else max(horizon, self._fetched_until - self.overlap)
+        cursor = get_collection('users').find({'tokens_revoked_at': {'$gte': since}},
+                                              {'token_version': 1, 'tokens_revoked_at': 1})
+        fetched = [(str(user['_id']), user.get('token_version', 0), user['tokens_revoked_at']) for user in cursor]
+        with self._lock:
+            for user_id, version, revoked_at in fetched:
+                known = self._versions.get(user_id)
+                if known is None or version >= known[0]:
+                    self._versions[user_id] = (version, revoked_at)
+            self._versions = {user_id: entry for user_id, entry in self._versions.items() if entry[1] >= horizon}
+            self._fetched_until = now
+            self._loaded_at = self._clock()
+            self._stats['reloads'] += 1
+
+    def current(self, user_id):
+        """Return the user's current token version (0 if not revoked recently)."""
+        self._refresh()
+        with self._lock:
+            self._stats['checks'] += 1
+            entry = self._versions.get(user_id)
+            return entry[0] if entry else 0
+
+    def is_revoked(self, user_id, version):
+        """Return True if a token issued with ``version`` has been revoked."""
+        revoked = version < self.current(user_id)
+        if revoked:
+            with self._lock:
+                self._stats['revoked'] += 1
+        return revoked
+
+    def set(self, user_id, version, revoked_at=None):
+        """Record a version bumped by this process, ahead of the next reload."""
+        with self._lock:
+            self._versions[user_id] = (version, revoked_at or self._now())
+
+    def stats(self):
+        """Return the check/reload counters and the map size."""
+        with self._lock:
+            return dict(self._stats, size=len(self._versions), refresh_interval=self.refresh_interval,
+                        window_s=self.window.total_seconds())
+
+
+def init_user_cache(app):
+    """Create the authenticated-user cache from the app config (off when the TTL is 0)."""
+    global _user_cache
+    ttl = app.config.get('USER_CACHE_TTL_S', 30)
+    _user_cache = TTLCache(maxsize=app.config.get('USER_CACHE_MAX_SIZE', 10000), ttl=ttl) if ttl > 0 else None
+
+
+def init_token_versions(app):
+    """Create the token version map from the app config.
+
+    Revocations are kept for as long as the access tokens they revoke live.
+    """
+    global _token_versions
+    _token_versions = TokenVersionMap(refresh_interval=app.config.get('TOKEN_VERSION_REFRESH_S', 5),
+                                      window=app.config.get('JWT_ACCESS_TOKEN_EXPIRES', 900))
+
+
+def get_token_versions():
+    """Return the token version map."""
+    return _token_versions
+
+
+def init_token_cache(app):
+    """Create the verified-token cache from the app config (off when the size is 0)."""
+    global _token_cache
+    size = app.config.get('JWT_VERIFY_CACHE_SIZE', 4096)
+    # Entries are stored with the token's remaining lifetime as their TTL
+    _token_cache = TTLCache(maxsize=size, ttl=0) if size > 0 else None
+
+
+def get_token_cache():
+    """Return the verified-token cache, or None when it is off."""
+    return _token_cache
+
+
+def get_user_cache():
+    """Return the authenticated-user cache, or None when it is off."""
+    return _user_cache
+
+
+def get_cache_stats():
+    """Return the statistics of the caches of the current process."""
+    return {
+        'users': _user_cache.stats() if _user_cache is not None else {'enabled': False},
+        'token_versions': _token_versions.stats() if _token_versions is not None else {'enabled': False},
+        'tokens': _token_cache.stats() if _token_cache is not None else {'enabled': False}
+    }
@@ -2,49 +2,338 @@
 MongoDB database connection and utilities
 """
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from flask import current_app
 from datetime import datetime
 import os
+import re
+import threading
+import time
+
+from .query_audit import audit_collection
+
+try:
+    from pymongo import monitoring, read_preferences
+    from pymongo.read_concern import ReadConcern
+except ImportError:
+    # Without pymongo only the mock database is usable
+    monitoring = read_preferences = ReadConcern = None
 
 _db_client = None
 _db = None
 
+# Real MongoDB: settings captured by init_db; the client itself is created
+# lazily in each process (see _get_client)
+_mongo_settings = None
+_client_pid = None
+_client_lock = threading.Lock()
+_pool_listener = None
+
+# Named read profiles (see _read_profiles) and the one active for this
+# context, set with the read_profile() context manager
+_read_profiles_options = {}
+_active_read_profile = ContextVar('read_profile', default=None)
+
+# Readiness of the real MongoDB connection, maintained by the readiness probe
+_readiness = {'status': 'starting', 'error': None, 'checked_at': None}
+_probe_pid = None
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener if monitoring else object):
+    """Collect connection pool statistics for the current process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.connections = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_time_ms = 0.0
+        self.max_wait_time_ms = 0.0
+
+    def _finish_wait(self):
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        waited = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        self.waiting -= 1
+        self.wait_time_ms += waited
+        self.max_wait_time_ms = max(self.max_wait_time_ms, waited)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._finish_wait()
+            self.checked_out += 1
+            self.checkouts += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._finish_wait()
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self):
+        """Return the current statistics as a dict."""
+        with self._lock:
+            return {
+                'connections': self.connections,
+                'checked_out': self.checked_out,
+                'waiting': self.waiting,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'wait_time_ms_total': round(self.wait_time_ms, 3),
+                'wait_time_ms_avg': round(self.wait_time_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_time_ms_max': round(self.max_wait_time_ms, 3),
+            }
+
+
+def _client_options(config):
+    """Build MongoClient keyword arguments from the app config."""
+    options = {
+        'maxPoolSize': config.get('MONGO_MAX_POOL_SIZE', 100),
+        'minPoolSize': config.get('MONGO_MIN_POOL_SIZE', 0),
+        'serverSelectionTimeoutMS': config.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+        'connectTimeoutMS': config.get('MONGO_CONNECT_TIMEOUT_MS', 5000),
+    }
+    if config.get('MONGO_MAX_IDLE_TIME_MS'):
+        options['maxIdleTimeMS'] = config['MONGO_MAX_IDLE_TIME_MS']
+    if config.get('MONGO_WAIT_QUEUE_TIMEOUT_MS'):
+        options['waitQueueTimeoutMS'] = config['MONGO_WAIT_QUEUE_TIMEOUT_MS']
+    compressors = config.get('MONGO_COMPRESSORS')
+    if compressors:
+        # pymongo skips (with a warning) compressors whose module is missing
+        options['compressors'] = compressors
+    return options
+
+
+_READ_PROFILE_KEY = re.compile(r'^MONGO_(\w+)_READ_PREFERENCE$')
+
+
+def _read_profiles(config):
+    """Build ``with_options`` kwargs for each read profile in the config.
+
+    A profile NAME is declared by ``MONGO_NAME_READ_PREFERENCE`` (a read
+    preference mode such as ``secondaryPreferred``), with optional
+    ``MONGO_NAME_MAX_STALENESS_S`` (at least 90; 0 or unset for no bound)
+    and ``MONGO_NAME_READ_CONCERN`` (e.g. ``local`` or ``majority``).
+    """
+    profiles = {}
+    for key in config:
+        match = _READ_PROFILE_KEY.match(key)
+        if not match:
+            continue
+        prefix = f'MONGO_{match.group(1)}_'
+        mode = config[key]
+        max_staleness = config.get(prefix + 'MAX_STALENESS_S') or -1
+        preference = read_preferences.make_read_preference(
+            read_preferences.read_pref_mode_from_name(mode), None, max_staleness=max_staleness)
+        options = {'read_preference': preference}
+        if config.get(prefix + 'READ_CONCERN'):
+            options['read_concern'] = ReadConcern(config[prefix + 'READ_CONCERN'])
+        profiles[match.group(1).lower()] = options
+    return profiles
+
+
+@contextmanager
+def read_profile(name):
+    """Route the reads made inside the block through read profile ``name``.
+
+    ``get_collection`` calls that don't pass their own ``read_profile`` use
+    it, so whole code paths (e.g. a dashboard) can read from secondaries.
+    """
+    token = _active_read_profile.set(name)
+    try:
+        yield
+    finally:
+        _active_read_profile.reset(token)
+
+
+def _get_client():
+    """Return this process's MongoClient, creating it on first use.
+
+    A client must not be shared across fork(): a preforking server that
+    builds the app in the master would otherwise hand every worker the
+    master's sockets. The client is tagged with the PID that created it and
+    a worker that inherits one simply builds its own.
+    """
+    global _db_client, _client_pid, _pool_listener
+    pid = os.getpid()
+    if _db_client is not None and _client_pid == pid:
+        return _db_client
+    if _mongo_settings is None:
+        raise RuntimeError("Database not initialized")
+
+    with _client_lock:
+        if _db_client is None or _client_pid != pid:
+            from pymongo import MongoClient
+            _pool_listener = PoolStatsListener()
+            # An inherited client belongs to the parent; it is dropped
+            # without close() so the parent's connections are left alone.
+            _db_client = MongoClient(_mongo_settings['uri'],
+                                     event_listeners=[_pool_listener],
+                                     **_mongo_settings['options'])
+            _client_pid = pid
+    return _db_client
+
+
+def get_pool_stats():
+    """Return connection pool statistics for the current process."""
+    if _mongo_settings is None:
+        return {'backend': 'mock', 'pid': os.getpid()}
+    stats = {
+        'backend': 'mongodb',
+        'pid': os.getpid(),
+        'max_pool_size': _mongo_settings['options']['maxPoolSize'],
+        'min_pool_size': _mongo_settings['options']['minPoolSize'],
+    }
+    if _pool_listener is not None and _client_pid == os.getpid():
+        stats.update(_pool_listener.snapshot())
+    return stats
+
+
+def _set_readiness(status, error=None):
+    global _readiness
+    _readiness = {'status': status, 'error': error, 'checked_at': datetime.utcnow().isoformat()}
+
+
+def _probe(interval):
+    """Ping MongoDB until it answers, recording readiness after each try."""
+    while _mongo_settings is not None:
+        try:
+            _get_client().admin.command('ping')
+        except Exception as e:
+            _set_readiness('unavailable', str(e))
+            time.sleep(interval)
+        else:
+            _set_readiness('ready')
+            return
+
+
+def _start_probe():
+    """Start the background readiness probe for the current process."""
+    global _probe_pid
+    _probe_pid = os.getpid()
+    _set_readiness('starting')
+    thread = threading.Thread(target=_probe, args=(_mongo_settings['probe_interval'],),
+                              name='mongo-readiness-probe', daemon=True)
+    thread.start()
+
+
+def get_readiness():
+    """Report whether the database can serve requests.
+
+    Returns a dict whose ``status`` is ``ready``, ``starting`` or
+    ``unavailable``. Each process probes its own connection, so a forked
+    worker starts a probe the first time it is asked.
+    """
+    if _mongo_settings is None:
+        status = 'ready' if _db is not None else 'starting'
+        return {'status': status, 'backend': 'mock', 'error': None, 'checked_at': None}
+    if _probe_pid != os.getpid():
+        with _client_lock:
+            if _probe_pid != os.getpid():
+                _start_probe()
+    return dict(_readiness, backend='mongodb')
+
+
 def init_db(app):
-    """Initialize MongoDB connection or use mock database."""
-    global _db_client, _db
-    
+    """Initialize MongoDB connection or use mock database.
+
+    With ``MONGO_LAZY_CONNECT`` the connection is not tested here: the
+    client is created on first use and a background probe, started in
+    each worker by its first ``get_readiness`` call, reports readiness.
+    Nothing connects during app creation, so a preforking master never
+    holds a client. Lazy mode never falls back to the mock database.
+    """
+    global _mongo_settings, _probe_pid, _read_profiles_options, _readiness
+
+    _read_profiles_options = _read_profiles(app.config) if read_preferences else {}
+    # Forget the connection state of any app initialized before this one
+    close_db()
+    _mongo_settings = None
+    _probe_pid = None
+    _readiness = {'status': 'starting', 'error': None, 'checked_at': None}
+    if app.config.get('USE_MOCK_DB'):
+        app.logger.info("Using mock in-memory database (USE_MOCK_DB is set)")
+        _init_mock_db(app)
+        return
+
+    _mongo_settings = {
+        'uri': app.config['MONGO_URI'],
+        'db_name': app.config['MONGO_URI'].split('/')[-1].split('?')[0],
+        'options': _client_options(app.config),
+        'probe_interval': app.config.get('MONGO_PROBE_INTERVAL_S', 2),
+    }
+    if app.config.get('MONGO_LAZY_CONNECT'):
+        app.logger.info("MongoDB will connect on first use (MONGO_LAZY_CONNECT is set)")
+        return
+
     # Try to use real MongoDB first
     try:
-        from pymongo import MongoClient
-        _db_client = MongoClient(app.config['MONGO_URI'], 
-                               serverSelectionTimeoutMS=5000,
-                               connectTimeoutMS=5000)
-        
         # Test connection
-        _db_client.admin.command('ping')
-        
-        # Get database
-        db_name = app.config['MONGO_URI'].split('/')[-1]
-        _db = _db_client[db_name]
-        
+        _get_client().admin.command('ping')
+        _set_readiness('ready')
+        _probe_pid = os.getpid()
+
         # Store in app context
-        app.db = _db
-        
+        app.db = get_db()
+
         app.logger.info("MongoDB connection initialized successfully")
-        
+
     except Exception as e:
         # Fall back to mock database for development
         app.logger.warning(f"MongoDB connection failed: {e}")
         app.logger.info("Using mock in-memory database for development")
-        
-        from .mock_db import get_mock_db
-        _db = get_mock_db()
-        app.db = _db
-        app.using_mock_db = True
+        close_db()
+        _mongo_settings = None
+        _init_mock_db(app)
+
+def _init_mock_db(app):
+    """Point the app at the in-memory mock database."""
+    global _db
+    from .mock_db import get_mock_db
+    _db = get_mock_db()
+    _db.set_read_mode(app.config.get('MOCK_DB_READ_MODE', 'copy'))
+    app.db = _db
+    app.using_mock_db = True
 
 def get_db():
     """Get database instance."""
-    global _db
+    if _mongo_settings is not None:
+        return _get_client()[_mongo_settings['db_name']]
     if _db is None:
         raise RuntimeError("Database not initialized")
     return _db
@@ -71,53 +360,41 @@ def normalize_id(id_value):
         return id_value
 
 def close_db():
-    """Close database connection."""
-    global _db_client
-    if _db_client:
+    """Close this process's database connection."""
+    global _db_client, _client_pid
+    if _db_client is not None and _client_pid == os.getpid():
         _db_client.close()
+    _db_client = None
+    _client_pid = None
+
+def get_collection(collection_name, read_profile=None):
+    """Get a MongoDB collection (wrapped for auditing in query audit mode).
 
-def get_collection(collection_name):
-    """Get a MongoDB collection."""
-    return get_db()[collection_name]
+    ``read_profile`` names a read profile from the config (see
+    ``_read_profiles``) whose read preference and read concern the
+    collection uses; by default the one set by the ``read_profile()``
+    context manager applies, if any. Writes always go to the primary.
+    """
+    collection = get_db()[collection_name]
+    profile = read_profile or _active_read_profile.get()
+    if profile:
+        if profile not in _read_profiles_options:
+            raise ValueError(f"Unknown read profile: {profile}")
+        collection = collection.with_options(**_read_profiles_options[profile])
+    return audit_collection(collection)
+
+def create_indexes(drop_stale=False):
+    """Create the indexes the models declare (see app/utils/indexes.py).
 
-def create_indexes():
-    """Create database indexes for performance."""
+    Stale indexes are reported, and only dropped when ``drop_stale`` is true.
+    """
     try:
-        # Users collection indexes
-        users = get_collection('users')
-        users.create_index('email', unique=True)
-        
-        # Meetings collection indexes
-        meetings = get_collection('meetings')
-        meetings.create_index('user_id')
-        meetings.create_index('date')
-        meetings.create_index('status')
-        meetings.create_index([('company', 'text'), ('contact', 'text'), ('subject', 'text')])
-        
-        # Tasks collection indexes
-        tasks = get_collection('tasks')
-        tasks.create_index('user_id')
-        tasks.create_index('due_date')
-        tasks.create_index('status')
-        tasks.create_index('assignee')
-        
-        # Notifications collection indexes
-        notifications = get_collection('notifications')
-        notifications.create_index('user_id')
-        notifications.create_index('created_at')
-        notifications.create_index('read')
-        
-        # AI chat collection indexes
-        ai_chat = get_collection('ai_chat')
-        ai_chat.create_index('user_id')
-        ai_chat.create_index('session_id')
-        
-        # KPI metrics collection indexes
-        kpi_metrics = get_collection('kpi_metrics')
-        kpi_metrics.create_index('user_id')
-        kpi_metrics.create_index('date')
-        
-        return True
+        from .indexes import sync_model_indexes
+
+        report = sync_model_indexes(drop_stale=drop_stale)
+        for label in report['stale']:
+            current_app.logger.warning(f"Index {label} is not declared by any model")
+        return not report['errors']
     except Exception as e:
         current_app.logger.error(f"Failed to create indexes: {e}")
         return False
@@ -0,0 +1,147 @@
+"""
+Declarative index registry
+
+Models declare the indexes their queries need with ``register_index`` next
+to those queries; ``sync_indexes`` diffs the registry against the live
+indexes and creates (and optionally drops) indexes to match.
+"""
+
+from flask import current_app
+from .db import get_collection
+
+# MongoDB's own index, never managed by the registry
+_ID_INDEX = '_id_'
+
+_registry = {}
+
+
+class IndexSpec:
+    """An index declared by a model."""
+
+    def __init__(self, collection, keys, name=None, unique=False, partial=None, weights=None):
+        self.collection = collection
+        self.keys = [(keys, 1)] if isinstance(keys, str) else [tuple(key) for key in keys]
+        self.name = name or '_'.join(f'{field}_{direction}' for field, direction in self.keys)
+        self.unique = unique
+        self.partial = partial
+        self.weights = weights
+
+    @property
+    def is_text(self):
+        return any(direction == 'text' for _, direction in self.keys)
+
+    def options(self):
+        """Keyword arguments for ``create_index``."""
+        options = {'name': self.name, 'background': True}
+        if self.unique:
+            options['unique'] = True
+        if self.partial:
+            options['partialFilterExpression'] = self.partial
+        if self.weights:
+            options['weights'] = self.weights
+        return options
+
+    def matches(self, info):
+        """Return True if a live ``index_information()`` entry is this index."""
+        if self.is_text:
+            # Text indexes are reported as _fts/_ftsx keys plus field weights
+            text_fields = {field for field, direction in self.keys if direction == 'text'}
+            weights = info.get('weights', {})
+            expected = {field: (self.weights or {}).get(field, 1) for field in text_fields}
+            if weights != expected:
+                return False
+        elif [(field, _direction(direction)) for field, direction in info.get('key', [])] != self.keys:
+            return False
+        return (bool(info.get('unique')) == self.unique
+                and info.get('partialFilterExpression') == self.partial)
+
+    def __repr__(self):
+        return f'IndexSpec({self.collection!r}, {self.keys!r}, name={self.name!r})'
+
+
+def _direction(direction):
+    # The server reports directions as floats (1.0) in some versions
+    return int(direction) if isinstance(direction, float) else direction
+
+
+def register_index(collection, keys, name=None, unique=False, partial=None, weights=None):
+    """Declare an index on ``collection``.
+
+    ``keys`` is a field name or a list of ``(field, direction)`` pairs;
+    ``partial`` is a partialFilterExpression. Re-registering a name replaces
+    the earlier declaration.
+    """
+    spec = IndexSpec(collection, keys, name=name, unique=unique, partial=partial, weights=weights)
+    _registry.setdefault(collection, {})[spec.name] = spec
+    return spec
+
+
+def registered_indexes(collection=None):
+    """Return the declared IndexSpecs, for one collection or all of them."""
+    if collection is not None:
+        return list(_registry.get(collection, {}).values())
+    return [spec for specs in _registry.values() for spec in specs.values()]
+
+
+def sync_indexes(collections=None, drop_stale=False, dry_run=False):
+    """Bring the live indexes in line with the registry.
+
+    Missing indexes are created (in the background on servers that still
+    honour the option). Live indexes that are not declared, or whose
+    definition changed, are only dropped when ``drop_stale`` is true;
+    otherwise they are reported. With ``dry_run`` nothing is changed.
+
+    Returns a report dict with ``created``, ``dropped``, ``stale``,
+    ``unchanged`` and ``errors`` lists of ``collection.index`` names.
+    """
+    report = {'created': [], 'dropped': [], 'stale': [], 'unchanged': [], 'errors': []}
+    for name in collections or sorted(_registry):
+        collection = get_collection(name)
+        specs = _registry.get(name, {})
+        try:
+            live = collection.index_information()
+        except Exception as e:
+            current_app.logger.error(f"Failed to list indexes of {name}: {e}")
+            report['errors'].append(name)
+            continue
+
+        changed = {index for index, info in live.items() if index in specs and not specs[index].matches(info)}
+        stale = [index for index in live if index != _ID_INDEX and (index not in specs or index in changed)]
+        for index in stale:
+            label = f'{name}.{index}'
+            if not drop_stale:
+                report['stale'].append(label)
+                continue
+            if not dry_run:
+                try:
+                    collection.drop_index(index)
+                except Exception as e:
+                    current_app.logger.error(f"Failed to drop index {label}: {e}")
+                    report['errors'].append(label)
+                    continue
+            report['dropped'].append(label)
+
+        for spec in specs.values():
+            label = f'{name}.{spec.name}'
+            if spec.name in live and spec.name not in changed:
+                report['unchanged'].append(label)
+                continue
+            if spec.name in changed and not drop_stale:
+                # Can't replace it without dropping the old definition first
+                continue
+            if not dry_run:
+                try:
+                    collection.create_index(spec.keys, **spec.options())
+                except Exception as e:
+                    current_app.logger.error(f"Failed to create index {label}: {e}")
+                    report['errors'].append(label)
+                    continue
+            report['created'].append(label)
+    return report
+
+
+def sync_model_indexes(drop_stale=False, dry_run=False):
+    """Sync the indexes declared by every model."""
+    # Importing the models registers their indexes
+    from app.models import user, meeting, task, notification, ai_chat, kpi  # noqa: F401
+    return sync_indexes(drop_stale=drop_stale, dry_run=dry_run)
@@ -2,58 +2,94 @@
 JWT token utilities for authentication
 """
 
+import hashlib
+import time
 import jwt
 from datetime import datetime, timedelta
 from flask import current_app
+from .cache import get_token_cache
 
-def generate_access_token(user_id):
-    """Generate JWT access token."""
+def generate_access_token(user_id, user=None):
+    """Generate JWT access token.
+
+    With ``JWT_CLAIMS_TOKENS`` and a ``user``, the token also carries the
+    user's profile claims and token version (``tv``), so the auth
+    middleware can build the request's user without a database lookup.
+    """
     payload = {
         'user_id': user_id,
         'type': 'access',
         'exp': datetime.utcnow() + timedelta(seconds=current_app.config['JWT_ACCESS_TOKEN_EXPIRES']),
         'iat': datetime.utcnow()
     }
+    if user is not None and current_app.config.get('JWT_CLAIMS_TOKENS'):
+        payload.update({
+            'email': user.email,
+            'full_name': user.full_name,
+            'role': user.role,
+            'avatar_initials': user.avatar_initials,
+            'preferences': user.preferences,
+            'tv': user.token_version
+        })
     return jwt.encode(payload, current_app.config['JWT_SECRET_KEY'], algorithm='HS256')
 
-def generate_refresh_token(user_id):
-    """Generate JWT refresh token."""
+def generate_refresh_token(user_id, token_version=None):
+    """Generate JWT refresh token (revocable when given the user's token version)."""
     payload = {
         'user_id': user_id,
         'type': 'refresh',
         'exp': datetime.utcnow() + timedelta(seconds=current_app.config['JWT_REFRESH_TOKEN_EXPIRES']),
         'iat': datetime.utcnow()
     }
+    if token_version is not None:
+        payload['tv'] = token_version
     return jwt.encode(payload, current_app.config['JWT_SECRET_KEY'], algorithm='HS256')
 
-def decode_token(token, token_type='access'):
-    """Decode and validate JWT token."""
+def _verified_payload(token):
+    """Return the verified payload of ``token``, or None if it's invalid or expired.
+
+    Every helper below goes through here. Verified payloads are cached
+    (keyed by a digest of the secret and the token) until the token's
+    ``exp``, so a token reused across requests is verified once. Callers
+    get their own dict; the only nested claim, ``preferences``, is shared
+    with the cache and copied by ``User.from_claims``.
+    """
+    secret = current_app.config['JWT_SECRET_KEY']
+    cache = get_token_cache()
+    if cache is not None:
+        key = hashlib.sha256(f'{secret}.{token}'.encode()).digest()
+        payload = cache.get(key)
+        if payload is not None:
+            return dict(payload)
     try:
-        payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-        
-        # Verify token type
-        if payload.get('type') != token_type:
-            return None
-        
-        return payload
-    except jwt.ExpiredSignatureError:
-        return None
+        payload = jwt.decode(token, secret, algorithms=['HS256'])
     except jwt.InvalidTokenError:
+        # Includes ExpiredSignatureError
+        return None
+    if cache is not None and isinstance(payload.get('exp'), (int, float)):
+        # The caller keeps the freshly decoded dict, the cache its own
+        cache.set(key, dict(payload), ttl=payload['exp'] - time.time())
+    return payload
+
+def decode_token(token, token_type='access'):
+    """Decode and validate JWT token."""
+    payload = _verified_payload(token)
+    
+    # Verify token type
+    if not payload or payload.get('type') != token_type:
         return None
+    
+    return payload
 
 def is_token_expired(token):
-    """Check if token is expired."""
-    try:
-        payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-        exp = payload.get('exp')
-        return datetime.utcnow() >= datetime.fromtimestamp(exp)
-    except:
+    """Check if token is expired (invalid tokens count as expired)."""
+    payload = _verified_payload(token)
+    if payload is None:
         return True
+    exp = payload.get('exp')
+    return exp is not None and time.time() >= exp
 
 def get_token_expiry(token):
     """Get token expiry timestamp."""
-    try:
-        payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-        return payload.get('exp')
-    except:
-        return None
+    payload = _verified_payload(token)
+    return payload.get('exp') if payload else None
@@ -2,178 +2,2177 @@
 Mock in-memory database for development without MongoDB
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from collections import defaultdict
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right
+from functools import cmp_to_key
+from itertools import islice
+import heapq
+import operator
+import re
+import threading
+import time
+import unicodedata
 import uuid
 
-class MockDatabase:
-    """Mock database that simulates MongoDB collections in memory."""
-    
+from pymongo.errors import BulkWriteError, DuplicateKeyError, InvalidOperation, OperationFailure
+
+_MISSING = object()
+
+# Comparison operators an index range scan can answer
+_RANGE_OPERATORS = ('$gt', '$gte', '$lt', '$lte')
+
+_COMPARATORS = {
+    '$gt': operator.gt,
+    '$gte': operator.ge,
+    '$lt': operator.lt,
+    '$lte': operator.le,
+}
+
+_REGEX_FLAGS = {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL, 'x': re.VERBOSE}
+_PATTERN_TYPE = type(re.compile(''))
+_TOKEN_RE = re.compile(r'\w+')
+# A $search string: quoted phrases or bare terms, either optionally negated
+_SEARCH_RE = re.compile(r'(-?)"([^"]*)"|(-?)(\S+)')
+
+# Deleted slots are compacted away once they are both numerous and the
+# majority of a collection's storage.
+_COMPACT_MIN_TOMBSTONES = 1024
+
+
+def _lookup_field(document, path):
+    """Resolve a (possibly dotted) field path, or return ``_MISSING``.
+
+    Like MongoDB, a path that crosses an array collects the remaining path
+    from every element of that array.
+    """
+    value = document
+    for part in path.split('.'):
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list):
+            if part.isdigit():
+                position = int(part)
+                value = value[position] if position < len(value) else _MISSING
+            else:
+                value = [item[part] for item in value if isinstance(item, dict) and part in item]
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _resolve_field(document, path):
+    """Resolve a (possibly dotted) field path against a document."""
+    value = _lookup_field(document, path)
+    return None if value is _MISSING else value
+
+
+def _sort_key(value):
+    """Return a key that orders mixed-type values like MongoDB's BSON order.
+
+    The first element is the type bracket (null < numbers < strings < objects
+    < arrays < other < booleans < dates) so values of different types never
+    have to be compared with each other directly.
+    """
+    if value is None:
+        return (1, 0)
+    if isinstance(value, bool):
+        return (7, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    if isinstance(value, datetime):
+        return (8, value)
+    if isinstance(value, dict):
+        return (4, repr(value))
+    if isinstance(value, (list, tuple)):
+        return (5, repr(value))
+    return (6, str(value))
+
+
+def _index_name(keys):
+    """Build the default index name the way pymongo does (``field_1_other_-1``)."""
+    return '_'.join(f'{field}_{direction}' for field, direction in keys)
+
+
+def _normalize_keys(keys):
+    """Normalize ``create_index`` key specs to a list of ``(field, direction)``."""
+    if isinstance(keys, str):
+        return [(keys, 1)]
+    return [(key, 1) if isinstance(key, str) else tuple(key) for key in keys]
+
+
+def _is_operator_dict(value):
+    """Return True if ``value`` is an operator expression like ``{'$gte': 1}``."""
+    return isinstance(value, dict) and bool(value) and all(key.startswith('$') for key in value)
+
+
+def _fold(text):
+    """Lower-case ``text`` and strip accents so 'Réunion' matches 'reunion'."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _tokenize(text):
+    """Split text into case- and accent-folded word tokens."""
+    return _TOKEN_RE.findall(_fold(text))
+
+
+def _any_value(test):
+    """Extend a scalar test to array fields, which match if any element does."""
+    def matches(value):
+        if isinstance(value, list):
+            return test(value) or any(test(item) for item in value)
+        return test(value)
+    return matches
+
+
+def _compile_eq(target, is_id=False):
+    if is_id:
+        target = str(target)
+        return lambda value: value is not _MISSING and str(value) == target
+    if target is None:
+        return lambda value: value is _MISSING or value is None or (
+            isinstance(value, list) and None in value)
+
+    target_is_bool = isinstance(target, bool)
+
+    def equals(value):
+        return value == target and isinstance(value, bool) is target_is_bool
+    return _any_value(equals)
+
+
+def _compile_in(targets, is_id=False):
+    patterns = [target for target in targets if isinstance(target, _PATTERN_TYPE)]
+    if is_id:
+        keys = {str(target) for target in targets}
+        return lambda value: value is not _MISSING and str(value) in keys
+
+    keys = {_sort_key(target) for target in targets if not isinstance(target, _PATTERN_TYPE)}
+    if _sort_key(None) in keys:
+        keys.add(_MISSING)
+
+    def member(value):
+        if value is _MISSING:
+            return _MISSING in keys
+        if _sort_key(value) in keys:
+            return True
+        return isinstance(value, str) and any(pattern.search(value) for pattern in patterns)
+    return lambda value: member(value) or (
+        isinstance(value, list) and any(member(item) for item in value))
+
+
+def _compile_comparison(op, target, is_id=False):
+    compare = _COMPARATORS[op]
+    if is_id:
+        target = str(target)
+        return lambda value: value is not _MISSING and compare(str(value), target)
+
+    bracket = _sort_key(target)[0]
+    if bracket in (4, 5, 6):
+        target_key = _sort_key(target)
+
+        def test(value):
+            return _sort_key(value)[0] == bracket and compare(_sort_key(value), target_key)
+    else:
+        def test(value):
+            return _sort_key(value)[0] == bracket and compare(value, target)
+    return lambda value: value is not _MISSING and _any_value(test)(value)
+
+
+def _compile_regex(pattern, options=''):
+    if not isinstance(pattern, _PATTERN_TYPE):
+        flags = 0
+        for option in options or '':
+            flags |= _REGEX_FLAGS.get(option, 0)
+        pattern = re.compile(pattern, flags)
+    return _any_value(lambda value: isinstance(value, str) and pattern.search(value) is not None)
+
+
+def _compile_condition(condition, is_id=False):
+    """Compile the right-hand side of a field predicate into ``test(value)``.
+
+    ``value`` is the resolved field value, or ``_MISSING`` if the field is
+    absent from the document.
+    """
+    if isinstance(condition, _PATTERN_TYPE):
+        return _compile_regex(condition)
+    if not _is_operator_dict(condition):
+        return _compile_eq(condition, is_id)
+
+    tests = []
+    for op, arg in condition.items():
+        if op == '$eq':
+            tests.append(_compile_eq(arg, is_id))
+        elif op == '$ne':
+            eq = _compile_eq(arg, is_id)
+            tests.append(lambda value, eq=eq: not eq(value))
+        elif op in _COMPARATORS:
+            tests.append(_compile_comparison(op, arg, is_id))
+        elif op == '$in':
+            tests.append(_compile_in(arg, is_id))
+        elif op == '$nin':
+            member = _compile_in(arg, is_id)
+            tests.append(lambda value, member=member: not member(value))
+        elif op == '$exists':
+            tests.append(lambda value, wanted=bool(arg): (value is not _MISSING) is wanted)
+        elif op == '$regex':
+            tests.append(_compile_regex(arg, condition.get('$options')))
+        elif op == '$options':
+            continue
+        elif op == '$not':
+            inner = _compile_condition(arg, is_id)
+            tests.append(lambda value, inner=inner: not inner(value))
+        elif op == '$size':
+            tests.append(lambda value, size=arg: isinstance(value, list) and len(value) == size)
+        elif op == '$all':
+            eqs = [_compile_eq(target) for target in arg]
+            tests.append(lambda value, eqs=eqs: isinstance(value, list) and all(eq(value) for eq in eqs))
+        elif op == '$elemMatch':
+            if _is_operator_dict(arg):
+                element = _compile_condition(arg)
+            else:
+                sub_query = _compile_query(arg)
+                element = lambda item, sub_query=sub_query: isinstance(item, dict) and sub_query(item)
+            tests.append(lambda value, element=element: isinstance(value, list) and any(
+                element(item) for item in value))
+        else:
+            raise OperationFailure(f'unknown operator: {op}')
+
+    if len(tests) == 1:
+        return tests[0]
+    return lambda value: all(test(value) for test in tests)
+
+
+def _compile_field(field, condition):
+    test = _compile_condition(condition, is_id=(field == '_id'))
+    if '.' in field:
+        return lambda doc: test(_lookup_field(doc, field))
+    return lambda doc: test(doc.get(field, _MISSING))
+
+
+def _parse_search(search):
+    """Split a ``$search`` string into folded terms and phrases.
+
+    Returns ``(terms, phrases, excluded_terms, excluded_phrases)``. Phrases
+    are kept as tuples of tokens, and like MongoDB the words of a phrase
+    also count as search terms.
+    """
+    terms, phrases, excluded, excluded_phrases = set(), [], set(), []
+    for negated_phrase, phrase, negated, word in _SEARCH_RE.findall(search):
+        if word:
+            (excluded if negated else terms).update(_tokenize(word))
+            continue
+        tokens = tuple(_tokenize(phrase))
+        if not tokens:
+            continue
+        if negated_phrase:
+            excluded_phrases.append(tokens)
+        else:
+            phrases.append(tokens)
+            terms.update(tokens)
+    return terms, phrases, excluded, excluded_phrases
+
+
+def _string_values(value):
+    """Yield the strings held by a field value (a string or a list of them)."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, str):
+                yield item
+
+
+def _contains_phrase(token_lists, phrase):
+    """Return True if ``phrase`` occurs as consecutive tokens in any list."""
+    size = len(phrase)
+    return any(tuple(tokens[i:i + size]) == phrase
+               for tokens in token_lists for i in range(len(tokens) - size + 1))
+
+
+def _compile_text(spec):
+    """Compile a ``$text`` predicate for a collection without a text index.
+
+    Terms are matched against every string field. Collections with a text
+    index answer ``$text`` from the index instead (see MockTextIndex).
+    """
+    terms, phrases, excluded, excluded_phrases = _parse_search(spec.get('$search', ''))
+
+    def matches(doc):
+        token_lists = [_tokenize(text) for value in doc.values() for text in _string_values(value)]
+        tokens = {token for tokens in token_lists for token in tokens}
+        return (bool(terms & tokens) and not (excluded & tokens)
+                and all(_contains_phrase(token_lists, phrase) for phrase in phrases)
+                and not any(_contains_phrase(token_lists, phrase) for phrase in excluded_phrases))
+    return matches
+
+
+def _compile_query(query):
+    """Compile a MongoDB filter document into a predicate ``matches(doc)``.
+
+    The query is interpreted once; the returned closure only evaluates the
+    pre-built tests, which keeps scans over large collections tight.
+    Unsupported operators raise OperationFailure rather than matching
+    everything.
+    """
+    if not query:
+        return lambda doc: True
+
+    tests = []
+    for key, value in query.items():
+        if key == '$and':
+            subs = [_compile_query(sub) for sub in value]
+            tests.append(lambda doc, subs=subs: all(sub(doc) for sub in subs))
+        elif key == '$or':
+            subs = [_compile_query(sub) for sub in value]
+            tests.append(lambda doc, subs=subs: any(sub(doc) for sub in subs))
+        elif key == '$nor':
+            subs = [_compile_query(sub) for sub in value]
+            tests.append(lambda doc, subs=subs: not any(sub(doc) for sub in subs))
+        elif key == '$text':
+            tests.append(_compile_text(value))
+        elif key == '$comment':
+            continue
+        elif key.startswith('$'):
+            raise OperationFailure(f'unknown top level operator: {key}')
+        else:
+            tests.append(_compile_field(key, value))
+
+    if not tests:
+        return lambda doc: True
+    if len(tests) == 1:
+        return tests[0]
+    if len(tests) == 2:
+        first, second = tests
+        return lambda doc: first(doc) and second(doc)
+    return lambda doc: all(test(doc) for test in tests)
+
+
+def _normalize_sort(key_or_list, direction=None):
+    """Normalize ``sort()`` arguments to a list of ``(field, direction)``."""
+    if isinstance(key_or_list, str):
+        return [(key_or_list, 1 if direction is None else direction)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [tuple(item) for item in key_or_list]
+
+
+def _sort_value(document, field, direction):
+    """Return the sort key of a field; arrays sort by their min (or max) element."""
+    value = _resolve_field(document, field)
+    if isinstance(value, list) and value:
+        keys = [_sort_key(item) for item in value]
+        return min(keys) if direction == 1 else max(keys)
+    return _sort_key(value)
+
+
+def _order_by(spec):
+    """Build ``(key, reverse)`` for ordering documents by a sort spec."""
+    directions = {direction for _, direction in spec}
+    if len(directions) == 1:
+        direction = directions.pop()
+        fields = [field for field, _ in spec]
+        return (lambda doc: tuple(_sort_value(doc, field, direction) for field in fields)), direction == -1
+
+    def compare(left, right):
+        for field, direction in spec:
+            a, b = _sort_value(left, field, direction), _sort_value(right, field, direction)
+            if a != b:
+                return (-1 if a < b else 1) * direction
+        return 0
+    return cmp_to_key(compare), False
+
+
+def _index_bounds(keys, query):
+    """Return how many index keys ``query`` bounds, and its leading equality prefix.
+
+    An index can only be used when its first key is bound; later keys are
+    bounded wherever they sit (a skipped key is scanned over its full range).
+    """
+    if keys[0][0] not in query:
+        return 0, 0
+    bound = sum(1 for field, _ in keys if field in query)
+    equalities = 0
+    for field, _ in keys:
+        value = query.get(field, _MISSING)
+        if value is _MISSING or (_is_operator_dict(value) and '$eq' not in value and '$in' not in value):
+            break
+        equalities += 1
+    return bound, equalities
+
+
+def _index_provides_sort(keys, equalities, sort):
+    """Return True if an index walked after its equality prefix yields ``sort`` order."""
+    if not sort or not all(isinstance(direction, int) for _, direction in sort):
+        return False
+    rest = keys[equalities:equalities + len(sort)]
+    if [field for field, _ in rest] != [field for field, _ in sort]:
+        return False
+    directions = [(direction, wanted) for (_, direction), (_, wanted) in zip(rest, sort)]
+    return (all(direction == wanted for direction, wanted in directions)
+            or all(direction == -wanted for direction, wanted in directions))
+
+
+def _is_text_score(spec):
+    return isinstance(spec, dict) and spec.get('$meta') == 'textScore'
+
+
+def _text_score_fields(projection, sort):
+    """Rewrite ``{'$meta': 'textScore'}`` in a projection and sort onto plain fields.
+
+    Returns ``(fields, projection, sort)``: the caller stores each
+    document's text score under ``fields`` before sorting and projecting
+    with the rewritten specs. A score that is only sorted on is projected
+    away again.
+    """
+    fields = []
+    if isinstance(projection, dict) and any(_is_text_score(spec) for spec in projection.values()):
+        fields = [field for field, spec in projection.items() if _is_text_score(spec)]
+        projection = {field: spec for field, spec in projection.items() if not _is_text_score(spec)}
+        if any(spec and not isinstance(spec, dict) for field, spec in projection.items() if field != '_id'):
+            projection.update((field, 1) for field in fields)
+        projection = projection or None
+
+    if sort and any(_is_text_score(direction) for _, direction in sort):
+        inclusive = projection and any(
+            spec and not isinstance(spec, dict) for field, spec in projection.items() if field != '_id')
+        for field, direction in sort:
+            if _is_text_score(direction) and field not in fields:
+                fields.append(field)
+                if not inclusive:
+                    projection = dict(projection or {}, **{field: 0})
+        sort = [(field, -1 if _is_text_score(direction) else direction) for field, direction in sort]
+    return fields, projection, sort
+
+
+def _project(document, projection):
+    """Return a private copy of ``document`` shaped by a find() projection."""
+    if not projection:
+        return document.copy()
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+
+    include_id = projection.get('_id', 1)
+    fields = {field: spec for field, spec in projection.items() if field != '_id'}
+    inclusive = any(spec and not isinstance(spec, dict) for spec in fields.values())
+
+    if inclusive:
+        result = {}
+        for field, spec in fields.items():
+            if isinstance(spec, dict):
+                continue
+            value = _lookup_field(document, field)
+            if value is _MISSING:
+                continue
+            target, *rest = field.split('.')
+            if rest:
+                nested = result.setdefault(target, {})
+                for part in rest[:-1]:
+                    nested = nested.setdefault(part, {})
+                nested[rest[-1]] = value
+            else:
+                result[field] = value
+    else:
+        result = {field: value for field, value in document.items() if fields.get(field, 1)}
+
+    for field, spec in fields.items():
+        if isinstance(spec, dict) and '$slice' in spec and isinstance(document.get(field), list):
+            count = spec['$slice']
+            result[field] = document[field][count:] if count < 0 else document[field][:count]
+
+    if include_id and '_id' in document:
+        result['_id'] = document['_id']
+    elif not include_id:
+        result.pop('_id', None)
+    return result
+
+
+def _set_field(document, path, value):
+    """Set a (possibly dotted) field, copying intermediate sub-documents."""
+    parts = path.split('.')
+    target = document
+    for part in parts[:-1]:
+        child = target.get(part)
+        child = dict(child) if isinstance(child, dict) else {}
+        target[part] = child
+        target = child
+    target[parts[-1]] = value
+
+
+def _get_path(document, path):
+    """Return the value at a dotted path through sub-documents, or ``_MISSING``."""
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return _MISSING
+        value = value.get(part, _MISSING)
+        if value is _MISSING:
+            break
+    return value
+
+
+def _unset_field(document, path):
+    """Remove a (possibly dotted) field, copying intermediate sub-documents."""
+    parts = path.split('.')
+    target = document
+    for part in parts[:-1]:
+        child = target.get(part)
+        if not isinstance(child, dict):
+            return
+        child = target[part] = dict(child)
+        target = child
+    target.pop(parts[-1], None)
+
+
+def _array_field(document, path, operator_name):
+    """Return a private copy of the array at ``path`` (empty if missing)."""
+    value = _get_path(document, path)
+    if value is _MISSING:
+        return []
+    if not isinstance(value, list):
+        raise OperationFailure(
+            f"The field '{path}' must be an array but is of type {type(value).__name__} "
+            f'({operator_name})'
+        )
+    return list(value)
+
+
+def _update_set(document, path, value):
+    _set_field(document, path, value)
+
+
+def _update_unset(document, path, value):
+    _unset_field(document, path)
+
+
+def _update_inc(document, path, amount):
+    current = _get_path(document, path)
+    if current is _MISSING:
+        current = 0
+    elif isinstance(current, bool) or not isinstance(current, (int, float)):
+        raise OperationFailure(f"Cannot apply $inc to a value of non-numeric type in field '{path}'")
+    _set_field(document, path, current + amount)
+
+
+def _update_push(document, path, value):
+    items = _array_field(document, path, '$push')
+    if isinstance(value, dict) and '$each' in value:
+        position = value.get('$position')
+        if position is None:
+            items.extend(value['$each'])
+        else:
+            items[position:position] = value['$each']
+        if '$slice' in value:
+            count = value['$slice']
+            items = items[count:] if count < 0 else items[:count]
+    else:
+        items.append(value)
+    _set_field(document, path, items)
+
+
+def _update_add_to_set(document, path, value):
+    items = _array_field(document, path, '$addToSet')
+    values = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+    for item in values:
+        if item not in items:
+            items.append(item)
+    _set_field(document, path, items)
+
+
+def _update_pull(document, path, condition):
+    current = _get_path(document, path)
+    if current is _MISSING:
+        return
+    if not isinstance(current, list):
+        raise OperationFailure(f"Cannot apply $pull to a non-array value in field '{path}'")
+    if _is_operator_dict(condition):
+        test = _compile_query({'value': condition})
+        kept = [item for item in current if not test({'value': item})]
+    elif isinstance(condition, dict):
+        test = _compile_query(condition)
+        kept = [item for item in current if not (isinstance(item, dict) and test(item))]
+    else:
+        kept = [item for item in current if item != condition]
+    if len(kept) != len(current):
+        _set_field(document, path, kept)
+
+
+_UPDATE_OPERATORS = {
+    '$set': _update_set,
+    '$unset': _update_unset,
+    '$inc': _update_inc,
+    '$push': _update_push,
+    '$addToSet': _update_add_to_set,
+    '$pull': _update_pull,
+    '$setOnInsert': _update_set,
+}
+
+
+def _compile_update(update):
+    """Compile an update document into ``apply(document, inserting=False)``.
+
+    ``apply`` returns a new dict and never mutates ``document``: changed
+    sub-documents and arrays are copied, so stored documents (and the
+    views and snapshots sharing them) are left intact. ``$setOnInsert``
+    only applies when ``inserting`` is true.
+    """
+    if not update or not all(key.startswith('$') for key in update):
+        raise ValueError('update only works with $ operators')
+
+    steps = []
+    for name, fields in update.items():
+        if name not in _UPDATE_OPERATORS:
+            raise OperationFailure(f'Unknown modifier: {name}')
+        steps.extend((name, _UPDATE_OPERATORS[name], path, value) for path, value in fields.items())
+
+    def apply(document, inserting=False):
+        result = dict(document)
+        for name, handler, path, value in steps:
+            if name == '$setOnInsert' and not inserting:
+                continue
+            handler(result, path, value)
+        return result
+    return apply
+
+
+def _upsert_seed(query):
+    """Build the document an upsert starts from: the query's equality fields."""
+    seed = {}
+    for key, value in query.items():
+        if key == '$and':
+            for sub in value:
+                for field, sub_value in _upsert_seed(sub).items():
+                    seed[field] = sub_value
+        elif key.startswith('$') or isinstance(value, _PATTERN_TYPE):
+            continue
+        elif _is_operator_dict(value):
+            if '$eq' in value:
+                _set_field(seed, key, value['$eq'])
+        else:
+            _set_field(seed, key, value)
+    return seed
+
+
+def _truthy(value):
+    """Aggregation truthiness: null, missing, false and zero are false."""
+    return value is not _MISSING and value is not None and value is not False and value != 0
+
+
+def _expr_add(*values):
+    if any(value is None for value in values):
+        return None
+    dates = [value for value in values if isinstance(value, datetime)]
+    numbers = sum(value for value in values if not isinstance(value, datetime))
+    if dates:
+        return dates[0] + timedelta(milliseconds=numbers)
+    return numbers
+
+
+def _expr_subtract(left, right):
+    if left is None or right is None:
+        return None
+    if isinstance(left, datetime) and isinstance(right, datetime):
+        return (left - right) / timedelta(milliseconds=1)
+    if isinstance(left, datetime):
+        return left - timedelta(milliseconds=right)
+    return left - right
+
+
+def _expr_multiply(*values):
+    if any(value is None for value in values):
+        return None
+    result = 1
+    for value in values:
+        result *= value
+    return result
+
+
+def _null_safe(function):
+    return lambda *values: None if any(value is None for value in values) else function(*values)
+
+
+_EXPRESSION_OPERATORS = {
+    '$add': _expr_add,
+    '$subtract': _expr_subtract,
+    '$multiply': _expr_multiply,
+    '$divide': _null_safe(operator.truediv),
+    '$mod': _null_safe(operator.mod),
+    '$concat': _null_safe(lambda *values: ''.join(values)),
+    '$toLower': lambda value: '' if value is None else str(value).lower(),
+    '$toUpper': lambda value: '' if value is None else str(value).upper(),
+    '$toString': _null_safe(lambda value: value.isoformat() if isinstance(value, datetime) else str(value)),
+    '$ifNull': lambda *values: next((value for value in values if value is not None), None),
+    '$size': len,
+    '$arrayElemAt': _null_safe(lambda values, position: values[position] if -len(values) <= position < len(values) else None),
+    '$in': lambda value, values: _sort_key(value) in {_sort_key(item) for item in values},
+    '$eq': lambda left, right: _sort_key(left) == _sort_key(right),
+    '$ne': lambda left, right: _sort_key(left) != _sort_key(right),
+    '$gt': lambda left, right: _sort_key(left) > _sort_key(right),
+    '$gte': lambda left, right: _sort_key(left) >= _sort_key(right),
+    '$lt': lambda left, right: _sort_key(left) < _sort_key(right),
+    '$lte': lambda left, right: _sort_key(left) <= _sort_key(right),
+    '$and': lambda *values: all(_truthy(value) for value in values),
+    '$or': lambda *values: any(_truthy(value) for value in values),
+    '$not': lambda value: not _truthy(value),
+}
+
+
+def _compile_expression(expression):
+    """Compile an aggregation expression into ``evaluate(doc)``.
+
+    Field paths that do not resolve evaluate to ``_MISSING`` so object
+    expressions can omit them, as MongoDB does.
+    """
+    if isinstance(expression, str) and expression.startswith('$'):
+        if expression.startswith('$$'):
+            variable, _, path = expression[2:].partition('.')
+            if variable not in ('ROOT', 'CURRENT'):
+                raise OperationFailure(f'unsupported variable: {expression}')
+            return (lambda doc: _lookup_field(doc, path)) if path else (lambda doc: doc)
+        path = expression[1:]
+        if '.' in path:
+            return lambda doc: _lookup_field(doc, path)
+        return lambda doc: doc.get(path, _MISSING)
+
+    if isinstance(expression, dict):
+        if len(expression) == 1 and next(iter(expression)).startswith('$'):
+            (op, args), = expression.items()
+            return _compile_operator(op, args)
+        fields = {field: _compile_expression(value) for field, value in expression.items()}
+
+        def build(doc):
+            result = {}
+            for field, evaluate in fields.items():
+                value = evaluate(doc)
+                if value is not _MISSING:
+                    result[field] = value
+            return result
+        return build
+
+    if isinstance(expression, list):
+        items = [_compile_expression(item) for item in expression]
+        return lambda doc: [_present(evaluate(doc)) for evaluate in items]
+
+    return lambda doc: expression
+
+
+def _present(value):
+    return None if value is _MISSING else value
+
+
+def _compile_operator(op, args):
+    if op == '$literal':
+        return lambda doc: args
+    if op == '$cond':
+        if isinstance(args, dict):
+            args = [args['if'], args['then'], args['else']]
+        condition, then, otherwise = (_compile_expression(arg) for arg in args)
+        return lambda doc: _present(then(doc) if _truthy(condition(doc)) else otherwise(doc))
+    if op not in _EXPRESSION_OPERATORS:
+        raise OperationFailure(f'unsupported expression operator: {op}')
+
+    function = _EXPRESSION_OPERATORS[op]
+    if not isinstance(args, list):
+        args = [args]
+    operands = [_compile_expression(arg) for arg in args]
+    return lambda doc: function(*[_present(evaluate(doc)) for evaluate in operands])
+
+
+class _SumAccumulator:
+    __slots__ = ('total',)
+
+    def __init__(self):
+        self.total = 0
+
+    def add(self, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.total += value
+
+    def result(self):
+        return self.total
+
+
+class _AvgAccumulator:
+    __slots__ = ('total', 'count')
+
     def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def add(self, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.total += value
+            self.count += 1
+
+    def result(self):
+        return self.total / self.count if self.count else None
+
+
+class _MinAccumulator:
+    __slots__ = ('value',)
+    prefer = operator.lt
+
+    def __init__(self):
+        self.value = _MISSING
+
+    def add(self, value):
+        if value is _MISSING or value is None:
+            return
+        if self.value is _MISSING or self.prefer(_sort_key(value), _sort_key(self.value)):
+            self.value = value
+
+    def result(self):
+        return _present(self.value)
+
+
+class _MaxAccumulator(_MinAccumulator):
+    __slots__ = ()
+    prefer = operator.gt
+
+
+class _PushAccumulator:
+    __slots__ = ('values',)
+
+    def __init__(self):
+        self.values = []
+
+    def add(self, value):
+        if value is not _MISSING:
+            self.values.append(value)
+
+    def result(self):
+        return self.values
+
+
+class _AddToSetAccumulator:
+    __slots__ = ('values',)
+
+    def __init__(self):
+        self.values = {}
+
+    def add(self, value):
+        if value is not _MISSING:
+            self.values.setdefault(_sort_key(value), value)
+
+    def result(self):
+        return list(self.values.values())
+
+
+class _FirstAccumulator:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = _MISSING
+
+    def add(self, value):
+        if self.value is _MISSING:
+            self.value = _present(value)
+
+    def result(self):
+        return _present(self.value)
+
+
+class _LastAccumulator(_FirstAccumulator):
+    __slots__ = ()
+
+    def add(self, value):
+        self.value = _present(value)
+
+
+_ACCUMULATORS = {
+    '$sum': _SumAccumulator,
+    '$avg': _AvgAccumulator,
+    '$min': _MinAccumulator,
+    '$max': _MaxAccumulator,
+    '$push': _PushAccumulator,
+    '$addToSet': _AddToSetAccumulator,
+    '$first': _FirstAccumulator,
+    '$last': _LastAccumulator,
+    '$count': _SumAccumulator,
+}
+
+
+def _group_stage(documents, spec):
+    """Hash-group documents; memory is bounded by the number of groups."""
+    group_key = _compile_expression(spec['_id'])
+    accumulators = []
+    for field, accumulator in spec.items():
+        if field == '_id':
+            continue
+        (op, arg), = accumulator.items()
+        if op not in _ACCUMULATORS:
+            raise OperationFailure(f'unsupported accumulator: {op}')
+        evaluate = (lambda doc: 1) if op == '$count' else _compile_expression(arg)
+        accumulators.append((field, _ACCUMULATORS[op], evaluate))
+
+    groups = {}
+    for doc in documents:
+        key_value = _present(group_key(doc))
+        key = _sort_key(key_value)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = (key_value, [factory() for _, factory, _ in accumulators])
+        for state, (_, _, evaluate) in zip(group[1], accumulators):
+            state.add(evaluate(doc))
+
+    for key_value, states in groups.values():
+        result = {'_id': key_value}
+        for state, (field, _, _) in zip(states, accumulators):
+            result[field] = state.result()
+        yield result
+
+
+def _is_inclusion_flag(value):
+    return isinstance(value, (bool, int))
+
+
+def _project_stage(documents, spec):
+    include_id = True
+    included, excluded, computed = [], [], {}
+    for field, value in spec.items():
+        if _is_inclusion_flag(value):
+            if field == '_id':
+                include_id = bool(value)
+            elif value:
+                included.append(field)
+            else:
+                excluded.append(field)
+        else:
+            computed[field] = _compile_expression(value)
+
+    if excluded and not (included or computed):
+        for doc in documents:
+            result = {field: value for field, value in doc.items() if field not in excluded}
+            if not include_id:
+                result.pop('_id', None)
+            yield result
+        return
+
+    for doc in documents:
+        result = {}
+        if include_id and '_id' in doc and '_id' not in computed:
+            result['_id'] = doc['_id']
+        for field in included:
+            value = _lookup_field(doc, field)
+            if value is not _MISSING:
+                _set_field(result, field, value)
+        for field, evaluate in computed.items():
+            value = evaluate(doc)
+            if value is not _MISSING:
+                _set_field(result, field, value)
+        yield result
+
+
+def _add_fields_stage(documents, spec):
+    computed = {field: _compile_expression(value) for field, value in spec.items()}
+    for doc in documents:
+        result = dict(doc)
+        for field, evaluate in computed.items():
+            value = evaluate(doc)
+            if value is not _MISSING:
+                _set_field(result, field, value)
+        yield result
+
+
+def _unwind_stage(documents, spec):
+    if isinstance(spec, str):
+        spec = {'path': spec}
+    path = spec['path'][1:]
+    preserve = spec.get('preserveNullAndEmptyArrays', False)
+    index_field = spec.get('includeArrayIndex')
+
+    for doc in documents:
+        value = _lookup_field(doc, path)
+        if isinstance(value, list) and value:
+            for position, item in enumerate(value):
+                result = dict(doc)
+                _set_field(result, path, item)
+                if index_field:
+                    result[index_field] = position
+                yield result
+        elif value is _MISSING or value is None or isinstance(value, list):
+            if preserve:
+                result = dict(doc)
+                if value == []:
+                    result.pop(path, None)
+                if index_field:
+                    result[index_field] = None
+                yield result
+        else:
+            result = dict(doc)
+            if index_field:
+                result[index_field] = None
+            yield result
+
+
+def _sort_stage(documents, spec, keep=None):
+    key, reverse = _order_by(_normalize_sort(spec))
+    if keep is not None:
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        return iter(select(keep, documents, key=key))
+    return iter(sorted(documents, key=key, reverse=reverse))
+
+
+def _count_stage(documents, field):
+    count = sum(1 for _ in documents)
+    if count:
+        yield {field: count}
+
+
+def _facet_stage(documents, spec):
+    materialized = [doc.copy() for doc in documents]
+    yield {name: list(_run_pipeline(iter(materialized), pipeline)) for name, pipeline in spec.items()}
+
+
+def _run_pipeline(documents, pipeline):
+    """Chain aggregation stages as generators over ``documents``."""
+    for position, stage in enumerate(pipeline):
+        (name, spec), = stage.items()
+        if name == '$match':
+            matches = _compile_query(spec)
+            documents = (doc for doc in documents if matches(doc))
+        elif name == '$group':
+            documents = _group_stage(documents, spec)
+        elif name == '$project':
+            documents = _project_stage(documents, spec)
+        elif name in ('$addFields', '$set'):
+            documents = _add_fields_stage(documents, spec)
+        elif name == '$sort':
+            # A following $limit (optionally after $skip) turns the sort
+            # into a bounded top-k selection.
+            following = [next(iter(later)) for later in pipeline[position + 1:position + 3]]
+            keep = None
+            if following[:1] == ['$limit']:
+                keep = pipeline[position + 1]['$limit']
+            elif following == ['$skip', '$limit']:
+                keep = pipeline[position + 1]['$skip'] + pipeline[position + 2]['$limit']
+            documents = _sort_stage(documents, spec, keep)
+        elif name == '$skip':
+            documents = islice(documents, spec, None)
+        elif name == '$limit':
+            documents = islice(documents, spec)
+        elif name == '$unwind':
+            documents = _unwind_stage(documents, spec)
+        elif name == '$count':
+            documents = _count_stage(documents, spec)
+        elif name == '$facet':
+            documents = _facet_stage(documents, spec)
+        else:
+            raise OperationFailure(f'unsupported aggregation stage: {name}')
+    return documents
+
+
+class ReadOnlyDocument(dict):
+    """A document (or sub-document) as stored by the mock database.
+
+    It is a ``dict`` subclass so reads (``doc[key]``, ``doc.get``, ``**doc``)
+    keep native dict speed, but every mutating method raises TypeError, and
+    so do those of the sub-documents and arrays it holds (see ``_freeze``).
+    ``copy()`` returns a deep, plain copy for callers that need to modify it.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('mock database documents are read-only; use .copy() for a mutable dict')
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    update = pop = popitem = clear = setdefault = _read_only
+
+    def copy(self):
+        return _thaw(self)
+
+    def __reduce__(self):
+        return (ReadOnlyDocument, (dict(self),))
+
+
+class ReadOnlyList(list):
+    """An array inside a stored document; read-only like ReadOnlyDocument."""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('mock database documents are read-only; use .copy() for a mutable list')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def copy(self):
+        return _thaw(self)
+
+    def __reduce__(self):
+        return (ReadOnlyList, (list(self),))
+
+
+def _freeze(value):
+    """Return ``value`` with every dict and list in it made read-only.
+
+    Values that are already frozen are reused as they are, so an updated
+    document shares its unchanged sub-documents with the previous version.
+    """
+    if isinstance(value, (ReadOnlyDocument, ReadOnlyList)):
+        return value
+    if isinstance(value, dict):
+        return ReadOnlyDocument({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return ReadOnlyList([_freeze(item) for item in value])
+    return value
+
+
+def _thaw(value):
+    """Return a deep, plain (mutable) copy of a frozen value."""
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _materialize(document, projection, read_mode):
+    """Hand a stored document to a caller according to the read mode.
+
+    ``view`` hands out the frozen document (a projection still builds a
+    new top-level dict); ``copy`` hands out a private, deep copy.
+    """
+    if projection:
+        document = _project(document, projection)
+        return _thaw(document) if read_mode == 'copy' else document
+    if read_mode == 'view':
+        return document
+    return _thaw(document)
+
+
+class MockIndex:
+    """In-memory secondary index over one or more document fields.
+
+    Documents are bucketed by the value of the leading field, which answers
+    equality lookups directly. The distinct leading values are also kept in
+    sorted order so range predicates can be served with a bisect instead of
+    a collection scan. Array values are indexed per element (multikey).
+
+    A partial index only holds (and only enforces uniqueness over) the
+    documents matching its filter; the planner does not use it for reads.
+    """
+
+    def __init__(self, name, keys, unique=False, partial=None):
+        self.name = name
+        self.keys = keys
+        self.field = keys[0][0]
+        self.unique = unique
+        self.partial = partial
+        self._in_scope = _compile_query(partial) if partial else None
+        self._buckets = {}
+        self._sorted_keys = []
+        self._sorted_dirty = False
+
+    def _keys_for(self, document):
+        value = _resolve_field(document, self.field)
+        if isinstance(value, list) and value:
+            return {_sort_key(item) for item in value}
+        return {_sort_key(value)}
+
+    def _full_key(self, document):
+        return tuple(_sort_key(_resolve_field(document, field)) for field, _ in self.keys)
+
+    def check_unique(self, pk, document):
+        """Raise DuplicateKeyError if ``document`` would violate this index."""
+        if not self.unique or (self._in_scope is not None and not self._in_scope(document)):
+            return
+        full_key = self._full_key(document)
+        for key in self._keys_for(document):
+            for other_pk, other in self._buckets.get(key, {}).items():
+                if other_pk != pk and self._full_key(other) == full_key:
+                    raise DuplicateKeyError(
+                        f'E11000 duplicate key error index: {self.name} dup key: {full_key}'
+                    )
+
+    def add(self, pk, document):
+        """Add a document to the index."""
+        if self._in_scope is not None and not self._in_scope(document):
+            return
+        for key in self._keys_for(document):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = {}
+                self._sorted_dirty = True
+            bucket[pk] = document
+
+    def remove(self, pk, document):
+        """Remove a document from the index using its current field values."""
+        if self._in_scope is not None and not self._in_scope(document):
+            return
+        for key in self._keys_for(document):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(pk, None)
+            if not bucket:
+                del self._buckets[key]
+                self._sorted_dirty = True
+
+    def lookup(self, value):
+        """Return documents whose indexed field equals ``value``."""
+        return list(self._buckets.get(_sort_key(value), {}).values())
+
+    def bucket_size(self, value):
+        """Return how many documents an equality lookup would produce."""
+        return len(self._buckets.get(_sort_key(value), ()))
+
+    def range(self, bounds):
+        """Return documents whose indexed field satisfies the range ``bounds``.
+
+        ``bounds`` maps ``$gt``/``$gte``/``$lt``/``$lte`` to values. Like
+        MongoDB, comparisons are type-bracketed: a string bound only matches
+        string values.
+        """
+        if self._sorted_dirty:
+            self._sorted_keys = sorted(self._buckets)
+            self._sorted_dirty = False
+
+        bracket = _sort_key(next(iter(bounds.values())))[0]
+        start = bisect_left(self._sorted_keys, (bracket,))
+        stop = bisect_left(self._sorted_keys, (bracket + 1,))
+
+        if '$gte' in bounds:
+            start = max(start, bisect_left(self._sorted_keys, _sort_key(bounds['$gte'])))
+        if '$gt' in bounds:
+            start = max(start, bisect_right(self._sorted_keys, _sort_key(bounds['$gt'])))
+        if '$lte' in bounds:
+            stop = min(stop, bisect_right(self._sorted_keys, _sort_key(bounds['$lte'])))
+        if '$lt' in bounds:
+            stop = min(stop, bisect_left(self._sorted_keys, _sort_key(bounds['$lt'])))
+
+        results = {}
+        for key in self._sorted_keys[start:stop]:
+            results.update(self._buckets[key])
+        return list(results.values())
+
+    def copy(self):
+        """Return an independent copy sharing only the (immutable) documents."""
+        clone = MockIndex(self.name, self.keys, unique=self.unique, partial=self.partial)
+        clone._buckets = {key: dict(bucket) for key, bucket in self._buckets.items()}
+        clone._sorted_keys = self._sorted_keys
+        clone._sorted_dirty = self._sorted_dirty
+        return clone
+
+    def info(self):
+        """Describe the index like an ``index_information()`` entry."""
+        info = {'v': 2, 'key': list(self.keys)}
+        if self.unique:
+            info['unique'] = True
+        if self.partial:
+            info['partialFilterExpression'] = self.partial
+        return info
+
+
+class MockTextIndex:
+    """Inverted index behind a ``text`` index.
+
+    Maps each case- and accent-folded token of the indexed fields to the
+    documents containing it and their score for that token, computed like
+    MongoDB: repeated occurrences count with decreasing weight, and a token
+    scores higher in short fields. A ``$text`` query sums the scores of its
+    terms over the postings, so it never scans the collection.
+    """
+
+    unique = False
+
+    def __init__(self, name, keys, weights=None):
+        self.name = name
+        self.keys = keys
+        self.fields = [field for field, direction in keys if direction == 'text']
+        self.weights = weights or {}
+        self._postings = {}
+
+    def _texts(self, document):
+        """Yield ``(field, text)`` for every indexed string value."""
+        for field in self.fields:
+            if field == '$**':
+                for name, value in document.items():
+                    for text in _string_values(value):
+                        yield name, text
+            else:
+                for text in _string_values(_resolve_field(document, field)):
+                    yield field, text
+
+    def _token_scores(self, document):
+        scores = {}
+        for field, text in self._texts(document):
+            tokens = _tokenize(text)
+            weight = self.weights.get(field, 1)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                frequency = 2 * (1 - 0.5 ** count)
+                coefficient = 0.5 * count / len(tokens) + 0.5
+                scores[token] = scores.get(token, 0) + weight * frequency * coefficient
+        return scores
+
+    def check_unique(self, pk, document):
+        """Text indexes are never unique."""
+
+    def add(self, pk, document):
+        """Add a document's tokens to the postings."""
+        for token, score in self._token_scores(document).items():
+            self._postings.setdefault(token, {})[pk] = score
+
+    def remove(self, pk, document):
+        """Remove a document's tokens from the postings."""
+        for token in self._token_scores(document):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(pk, None)
+            if not postings:
+                del self._postings[token]
+
+    def search(self, terms, excluded=()):
+        """Return ``{pk: score}`` for documents with any of ``terms`` and none of ``excluded``."""
+        hits = {}
+        for token in terms:
+            for pk, score in self._postings.get(token, {}).items():
+                hits[pk] = hits.get(pk, 0) + score
+        for token in excluded:
+            for pk in self._postings.get(token, ()):
+                hits.pop(pk, None)
+        return hits
+
+    def matches_phrases(self, document, phrases, excluded_phrases):
+        """Check the phrase clauses of a search against the indexed fields."""
+        if not phrases and not excluded_phrases:
+            return True
+        token_lists = [_tokenize(text) for _, text in self._texts(document)]
+        return (all(_contains_phrase(token_lists, phrase) for phrase in phrases)
+                and not any(_contains_phrase(token_lists, phrase) for phrase in excluded_phrases))
+
+    def copy(self):
+        """Return an independent copy sharing only the (immutable) documents."""
+        clone = MockTextIndex(self.name, self.keys, self.weights)
+        clone._postings = {token: dict(postings) for token, postings in self._postings.items()}
+        return clone
+
+    def info(self):
+        """Describe the index like an ``index_information()`` entry."""
+        return {
+            'v': 2,
+            'key': [('_fts', 'text'), ('_ftsx', 1)],
+            'weights': {field: self.weights.get(field, 1) for field in self.fields},
+        }
+
+
+class _ReadWriteLock:
+    """Lock shared by any number of readers or held by a single writer.
+
+    Writers are preferred: once a writer is waiting, new readers queue
+    behind it so a steady stream of reads cannot starve writes. The lock is
+    not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        """Hold the lock shared with other readers."""
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively."""
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class MockDatabase:
+    """Mock database that simulates MongoDB collections in memory.
+
+    Stored documents are never mutated in place: they are frozen down to
+    their nested sub-documents and arrays, and writes build a new frozen
+    document and swap it into the collection and its indexes. That lets
+    reads in ``view`` mode hand out the stored documents themselves instead
+    of copying each one; ``copy`` mode (the default) returns a private deep
+    copy per document.
+
+    Each collection has a reader/writer lock so the database can be shared
+    by the threads of a threaded server. Writes hold it exclusively; reads
+    hold it only while collecting references to the matching documents,
+    then sort, project and copy them after releasing it.
+
+    ``snapshot`` and ``restore`` capture and reinstate the whole database
+    by reference, in time proportional to the number of collections. Since
+    the documents are frozen, a snapshot can't be changed through them. A
+    collection shared with a snapshot is copied on its next write: its
+    document list, primary key map and index buckets (not the documents),
+    which is linear in its size, so a test pays for the collections it
+    writes to.
+    """
+
+    READ_MODES = ('copy', 'view')
+
+    def __init__(self, read_mode='copy'):
+        self.set_read_mode(read_mode)
+        # Documents are stored in insertion order; deleted slots hold None
+        # (a tombstone) until the collection is compacted.
         self._collections = defaultdict(list)
         self._indexes = defaultdict(dict)
-    
+        # Primary key map: str(_id) -> slot in ``_collections[name]``
+        self._primary = defaultdict(dict)
+        self._tombstones = defaultdict(int)
+        self._locks = {}
+        self._snapshots = {}
+        # Collections whose containers are also referenced by a snapshot
+        self._shared = set()
+
     def __getitem__(self, collection_name):
         """Get a collection by name."""
         return MockCollection(collection_name, self)
-    
+
+    def set_read_mode(self, read_mode):
+        """Choose how reads hand out documents: ``copy`` or ``view``."""
+        if read_mode not in self.READ_MODES:
+            raise ValueError(f'Unknown mock database read mode: {read_mode}')
+        self.read_mode = read_mode
+
     def list_collection_names(self):
         """List all collection names."""
         return list(self._collections.keys())
 
+    def command(self, command, value=None, **kwargs):
+        """Run a database command; ``ping`` and ``explain`` are supported."""
+        if command == 'ping':
+            return {'ok': 1.0}
+        if command == 'explain' and isinstance(value, dict):
+            if 'find' in value:
+                sort = _normalize_sort(value['sort']) if value.get('sort') else None
+                return self[value['find']]._explain(value.get('filter'), sort, value.get('skip', 0),
+                                                    value.get('limit', 0))
+            if 'aggregate' in value:
+                return self[value['aggregate']]._explain_aggregate(value.get('pipeline', []))
+        raise OperationFailure(f'no such command: {command}')
+
+    def snapshot(self, name):
+        """Save the current state of every collection under ``name``."""
+        state = {}
+        for collection_name in list(self._collections):
+            with self._lock_for(collection_name).read():
+                state[collection_name] = (
+                    self._collections[collection_name],
+                    self._primary[collection_name],
+                    self._indexes[collection_name],
+                    self._tombstones[collection_name],
+                )
+                self._shared.add(collection_name)
+        self._snapshots[name] = state
+
+    def restore(self, name):
+        """Reset every collection to the state saved by ``snapshot(name)``."""
+        if name not in self._snapshots:
+            raise KeyError(f'Unknown mock database snapshot: {name}')
+        state = self._snapshots[name]
+        for collection_name in set(self._collections) | set(state):
+            with self._lock_for(collection_name).write():
+                if collection_name in state:
+                    documents, primary, indexes, tombstones = state[collection_name]
+                    self._collections[collection_name] = documents
+                    self._primary[collection_name] = primary
+                    self._indexes[collection_name] = indexes
+                    self._tombstones[collection_name] = tombstones
+                    self._shared.add(collection_name)
+                else:
+                    for store in (self._collections, self._primary, self._indexes, self._tombstones):
+                        store.pop(collection_name, None)
+                    self._shared.discard(collection_name)
+
+    def drop_snapshot(self, name):
+        """Forget a saved snapshot."""
+        self._snapshots.pop(name, None)
+
+    def _detach(self, collection_name):
+        """Give a collection private containers before it is written to.
+
+        Shallow copies of the containers, linear in the collection size;
+        the frozen documents themselves stay shared.
+        """
+        if collection_name not in self._shared:
+            return
+        self._collections[collection_name] = list(self._collections[collection_name])
+        self._primary[collection_name] = dict(self._primary[collection_name])
+        self._indexes[collection_name] = {
+            name: index.copy() for name, index in self._indexes[collection_name].items()
+        }
+        self._shared.discard(collection_name)
+
+    def _lock_for(self, collection_name):
+        """Return the reader/writer lock guarding a collection."""
+        lock = self._locks.get(collection_name)
+        if lock is None:
+            # setdefault is atomic, so racing threads end up sharing one lock
+            lock = self._locks.setdefault(collection_name, _ReadWriteLock())
+        return lock
+
+    def _compact(self, collection_name):
+        """Drop tombstones from a collection and rebuild its primary key map."""
+        documents = [doc for doc in self._collections[collection_name] if doc is not None]
+        self._collections[collection_name] = documents
+        self._primary[collection_name] = {str(doc.get('_id')): slot for slot, doc in enumerate(documents)}
+        self._tombstones[collection_name] = 0
+
+
+class InsertOneResult:
+    """Result of an insert_one call."""
+
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class InsertManyResult:
+    """Result of an insert_many call."""
+
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class BulkWriteResult:
+    """Result of a bulk_write call, built from the server-style summary."""
+
+    def __init__(self, bulk_api_result):
+        self.bulk_api_result = bulk_api_result
+        self.inserted_count = bulk_api_result['nInserted']
+        self.matched_count = bulk_api_result['nMatched']
+        self.modified_count = bulk_api_result['nModified']
+        self.deleted_count = bulk_api_result['nRemoved']
+        self.upserted_count = bulk_api_result['nUpserted']
+        self.upserted_ids = {upsert['index']: upsert['_id'] for upsert in bulk_api_result['upserted']}
+
+
+def _bulk_summary():
+    return {'writeErrors': [], 'writeConcernErrors': [], 'nInserted': 0, 'nUpserted': 0,
+            'nMatched': 0, 'nModified': 0, 'nRemoved': 0, 'upserted': []}
+
+
+class UpdateResult:
+    """Result of an update call."""
+
+    def __init__(self, matched, modified, upserted_id=None):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_id = upserted_id
+
+
+class DeleteResult:
+    """Result of a delete call."""
+
+    def __init__(self, deleted):
+        self.deleted_count = deleted
+
+
 class MockCollection:
     """Mock MongoDB collection."""
-    
+
     def __init__(self, name, db):
         self.name = name
-        self._db = db
-    
-    def find_one(self, query):
+        self.database = self._db = db
+        self._lock = db._lock_for(name)
+
+    def with_options(self, **kwargs):
+        """Return this collection; there are no replicas to route reads to."""
+        return self
+
+    def find_one(self, query=None, projection=None):
         """Find one document matching the query."""
-        documents = self._db._collections[self.name]
-        for doc in documents:
-            if self._matches_query(doc, query):
-                return doc.copy()
-        return None
-    
-    def find(self, query=None):
-        """Find all documents matching the query."""
-        if query is None:
-            query = {}
-        documents = self._db._collections[self.name]
-        results = [doc.copy() for doc in documents if self._matches_query(doc, query)]
-        return MockCursor(results)
-    
+        return next(iter(self.find(query, projection).limit(1)), None)
+
+    def find(self, query=None, projection=None, sort=None, skip=0, limit=0):
+        """Return a lazy cursor over the documents matching the query."""
+        cursor = MockCursor(self, query, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    def count_documents(self, query, skip=0, limit=0):
+        """Count the documents matching the query without copying them."""
+        with self._lock.read():
+            count = sum(1 for _ in self._select(query))
+        count = max(count - skip, 0)
+        return min(count, limit) if limit else count
+
     def insert_one(self, document):
         """Insert a document."""
-        doc = document.copy()
-        if '_id' not in doc:
-            doc['_id'] = str(uuid.uuid4())
-        self._db._collections[self.name].append(doc)
-        
-        class InsertResult:
-            def __init__(self, inserted_id):
-                self.inserted_id = inserted_id
-        
-        return InsertResult(doc['_id'])
-    
-    def update_one(self, query, update):
-        """Update one document."""
-        documents = self._db._collections[self.name]
-        for i, doc in enumerate(documents):
-            if self._matches_query(doc, query):
-                if '$set' in update:
-                    documents[i].update(update['$set'])
-                
-                class UpdateResult:
-                    def __init__(self, matched, modified):
-                        self.matched_count = matched
-                        self.modified_count = modified
-                
-                return UpdateResult(1, 1)
-        
-        class UpdateResult:
-            def __init__(self, matched, modified):
-                self.matched_count = matched
-                self.modified_count = modified
-        
-        return UpdateResult(0, 0)
-    
+        with self._lock.write():
+            return self._insert(document)
+
+    def update_one(self, query, update, upsert=False):
+        """Update one document, or insert one if none matches and ``upsert``."""
+        return self._update(query, update, multi=False, upsert=upsert)
+
+    def update_many(self, query, update, upsert=False):
+        """Update every document matching the query."""
+        return self._update(query, update, multi=True, upsert=upsert)
+
     def delete_one(self, query):
         """Delete one document."""
+        return self._delete(query, multi=False)
+
+    def delete_many(self, query):
+        """Delete every document matching the query."""
+        return self._delete(query, multi=True)
+
+    def insert_many(self, documents, ordered=True):
+        """Insert several documents under one write lock.
+
+        As with pymongo, failed inserts raise BulkWriteError once the batch is
+        done (or at the first failure when ``ordered``); the others stay.
+        """
+        summary = _bulk_summary()
+        inserted_ids = []
+        with self._lock.write():
+            for position, document in enumerate(documents):
+                # pymongo assigns the missing _ids on the caller's documents
+                document.setdefault('_id', str(uuid.uuid4()))
+                try:
+                    inserted_ids.append(self._insert(document).inserted_id)
+                except DuplicateKeyError as e:
+                    summary['writeErrors'].append({'index': position, 'code': 11000, 'errmsg': str(e), 'op': document})
+                    if ordered:
+                        break
+        summary['nInserted'] = len(inserted_ids)
+        if summary['writeErrors']:
+            raise BulkWriteError(summary)
+        return InsertManyResult(inserted_ids)
+
+    def bulk_write(self, requests, ordered=True):
+        """Apply pymongo InsertOne, UpdateOne/UpdateMany and DeleteOne/DeleteMany requests.
+
+        Errors are collected per request and raised together as a
+        BulkWriteError, after the first failure when ``ordered``.
+        """
+        summary = _bulk_summary()
+        with self._lock.write():
+            for position, request in enumerate(requests):
+                try:
+                    self._apply_request(position, request, summary)
+                except (OperationFailure, ValueError, TypeError) as e:
+                    # Like the server, a bad operation is one write error (code
+                    # 2, BadValue), not an exception that drops the batch summary
+                    code = 11000 if isinstance(e, DuplicateKeyError) else getattr(e, 'code', None) or 2
+                    summary['writeErrors'].append({'index': position, 'code': code, 'errmsg': str(e),
+                                                   'op': getattr(request, '_doc', None)})
+                    if ordered:
+                        break
+        if summary['writeErrors']:
+            raise BulkWriteError(summary)
+        return BulkWriteResult(summary)
+
+    def _apply_request(self, position, request, summary):
+        """Apply one bulk_write request; the caller holds the write lock."""
+        kind = type(request).__name__
+        if kind == 'InsertOne':
+            self._insert(request._doc)
+            summary['nInserted'] += 1
+        elif kind in ('UpdateOne', 'UpdateMany'):
+            result = self._apply_update(request._filter, _compile_update(request._doc),
+                                        multi=kind == 'UpdateMany', upsert=request._upsert)
+            summary['nMatched'] += result.matched_count
+            summary['nModified'] += result.modified_count
+            if result.upserted_id is not None:
+                summary['nUpserted'] += 1
+                summary['upserted'].append({'index': position, '_id': result.upserted_id})
+        elif kind in ('DeleteOne', 'DeleteMany'):
+            summary['nRemoved'] += self._apply_delete(request._filter, multi=kind == 'DeleteMany').deleted_count
+        else:
+            raise OperationFailure(f'unsupported bulk write operation: {kind}')
+
+    def _insert(self, document):
+        """Store a new document; the caller holds the write lock."""
+        self._db._detach(self.name)
+        # A frozen copy, so neither the caller nor a reader can change it later
+        if '_id' in document:
+            doc = _freeze(document)
+        else:
+            doc = _freeze(dict(document, _id=str(uuid.uuid4())))
+        pk = str(doc['_id'])
+
+        primary = self._db._primary[self.name]
+        if pk in primary:
+            raise DuplicateKeyError(f'E11000 duplicate key error index: _id_ dup key: {pk}')
+        indexes = self._db._indexes[self.name].values()
+        for index in indexes:
+            index.check_unique(pk, doc)
+
         documents = self._db._collections[self.name]
-        for i, doc in enumerate(documents):
-            if self._matches_query(doc, query):
-                documents.pop(i)
-                
-                class DeleteResult:
-                    def __init__(self, deleted):
-                        self.deleted_count = deleted
-                
-                return DeleteResult(1)
-        
-        class DeleteResult:
-            def __init__(self, deleted):
-                self.deleted_count = deleted
-        
-        return DeleteResult(0)
-    
-    def create_index(self, keys, unique=False):
-        """Create an index (mock - doesn't do anything)."""
-        pass
-    
-    def aggregate(self, pipeline):
-        """Simple aggregation (limited functionality)."""
-        documents = self._db._collections[self.name]
-        results = documents.copy()
-        
-        for stage in pipeline:
-            if '$match' in stage:
-                results = [doc for doc in results if self._matches_query(doc, stage['$match'])]
-            elif '$sort' in stage:
-                # Simple sort by first field
-                field = list(stage['$sort'].keys())[0]
-                direction = stage['$sort'][field]
-                results.sort(key=lambda x: x.get(field, ''), reverse=(direction == -1))
-        
+        primary[pk] = len(documents)
+        documents.append(doc)
+        for index in indexes:
+            index.add(pk, doc)
+
+        return InsertOneResult(doc['_id'])
+
+    def create_index(self, keys, unique=False, name=None, **kwargs):
+        """Create an index and build it over the existing documents."""
+        keys = _normalize_keys(keys)
+        name = name or _index_name(keys)
+        with self._lock.write():
+            return self._create_index(keys, unique, name, kwargs.get('weights'),
+                                      kwargs.get('partialFilterExpression'))
+
+    def _create_index(self, keys, unique, name, weights=None, partial=None):
+        if name in self._db._indexes[self.name]:
+            return name
+
+        if any(direction == 'text' for _, direction in keys):
+            if self._text_index() is not None:
+                raise OperationFailure('only one text index per collection allowed')
+            index = MockTextIndex(name, keys, weights)
+        else:
+            index = MockIndex(name, keys, unique=unique, partial=partial)
+
+        self._db._detach(self.name)
+        indexes = self._db._indexes[self.name]
+        for doc in self._scan():
+            pk = str(doc.get('_id'))
+            index.check_unique(pk, doc)
+            index.add(pk, doc)
+        indexes[name] = index
+        return name
+
+    def index_information(self):
+        """Describe the collection's indexes like pymongo's ``index_information()``."""
+        info = {'_id_': {'v': 2, 'key': [('_id', 1)]}}
+        with self._lock.read():
+            for name, index in self._db._indexes[self.name].items():
+                info[name] = index.info()
+        return info
+
+    def drop_index(self, index_or_name):
+        """Drop an index by name or key specification."""
+        name = index_or_name
+        if not isinstance(name, str):
+            name = _index_name(_normalize_keys(name))
+        if name == '_id_':
+            raise OperationFailure('cannot drop _id index')
+        with self._lock.write():
+            if name not in self._db._indexes[self.name]:
+                raise OperationFailure(f'index not found with name [{name}]')
+            self._db._detach(self.name)
+            del self._db._indexes[self.name][name]
+
+    def aggregate(self, pipeline, **kwargs):
+        """Run an aggregation pipeline as a chain of streaming stages.
+
+        A leading ``$match`` is pushed down to the query planner so it can
+        use indexes; every other stage consumes the previous one lazily.
+        """
+        stages = list(pipeline)
+        with self._lock.read():
+            if stages and '$match' in stages[0]:
+                documents = list(self._select(stages.pop(0)['$match']))
+            else:
+                documents = list(self._scan())
+
+        results = _run_pipeline(documents, stages)
+        if self._db.read_mode == 'copy':
+            # Stored documents, and the stored sub-documents and arrays that
+            # reshaping stages pass through, are read-only
+            results = (_thaw(doc) for doc in results)
         return results
-    
-    def _matches_query(self, document, query):
-        """Check if a document matches a query."""
+
+    def _matching(self, query, multi):
+        """Return the stored documents matching ``query`` (at most one unless ``multi``)."""
+        found = self._select(query)
+        return list(found if multi else islice(found, 1))
+
+    def _select(self, query, scores=None):
+        """Yield the stored documents matching ``query``; the caller holds the lock.
+
+        A top-level ``$text`` clause is answered from the collection's text
+        index when it has one, filling ``scores`` (if given) with each
+        hit's text score; the rest of the query is checked per hit.
+        """
+        text_index = self._text_index() if query and '$text' in query else None
+        if text_index is None:
+            matches = _compile_query(query)
+            yield from (doc for doc in self._candidates(query) if matches(doc))
+            return
+
+        terms, phrases, excluded, excluded_phrases = _parse_search(query['$text'].get('$search', ''))
+        rest = {key: value for key, value in query.items() if key != '$text'}
+        matches = _compile_query(rest)
+        hits = text_index.search(terms, excluded)
+        # Index lookups come back as lists; when the rest of the query picks
+        # fewer documents than the search, probe the hits from that side.
+        candidates = self._candidates(rest) if rest else None
+        if isinstance(candidates, list) and len(candidates) < len(hits):
+            docs = (doc for doc in candidates if str(doc['_id']) in hits)
+        else:
+            docs = (self._get_by_id(pk) for pk in hits)
+
+        for doc in docs:
+            if doc is None or not matches(doc):
+                continue
+            pk = str(doc['_id'])
+            if not text_index.matches_phrases(doc, phrases, excluded_phrases):
+                continue
+            if scores is not None:
+                scores[pk] = hits[pk]
+            yield doc
+
+    def _explain(self, query, sort=None, skip=0, limit=0):
+        """Describe how MongoDB would run a find, in ``explain()`` format.
+
+        The plan is modelled on the server's choice among this collection's
+        indexes: an ``_id`` lookup, the text index for ``$text``, otherwise
+        the index binding the most leading keys (preferring one whose order
+        provides the sort). The statistics come from running the query.
+        """
+        query = query or {}
+        started = time.perf_counter()
+        with self._lock.read():
+            returned = len(list(self._select(query)))
+            plan, examined, sorted_by_index = self._plan(query, sort)
+        returned = max(returned - skip, 0)
+        if limit:
+            returned = min(returned, limit)
+        if sort and not sorted_by_index:
+            plan = {'stage': 'SORT', 'sortPattern': dict(sort), 'inputStage': plan}
+        return {
+            'queryPlanner': {'namespace': f'mock.{self.name}', 'parsedQuery': query, 'winningPlan': plan},
+            'executionStats': {
+                'nReturned': returned,
+                'totalDocsExamined': examined,
+                'totalKeysExamined': 0 if plan.get('stage') == 'COLLSCAN' else examined,
+                'executionTimeMillis': round((time.perf_counter() - started) * 1000),
+            },
+            'ok': 1.0,
+        }
+
+    def _explain_aggregate(self, pipeline):
+        """Describe an aggregation like MongoDB's explain: a ``$cursor`` stage and the rest.
+
+        A leading ``$match`` and a ``$sort`` right after it are pushed down
+        into the ``$cursor`` query, as the server does.
+        """
+        stages = list(pipeline)
+        query, sort = {}, None
+        if stages and '$match' in stages[0]:
+            query = stages.pop(0)['$match']
+        if stages and '$sort' in stages[0]:
+            sort = _normalize_sort(stages.pop(0)['$sort'])
+        return {'stages': [{'$cursor': self._explain(query, sort)}] + stages, 'ok': 1.0}
+
+    def _plan(self, query, sort):
+        """Return ``(winning plan, documents examined, sorted by index)``; the caller holds the lock."""
+        text_index = self._text_index() if '$text' in query else None
+        if text_index is not None:
+            terms, _, excluded, _ = _parse_search(query['$text'].get('$search', ''))
+            scan = {'stage': 'IXSCAN', 'indexName': text_index.name, 'keyPattern': {'_fts': 'text', '_ftsx': 1}}
+            plan = {'stage': 'TEXT_MATCH', 'inputStage': {'stage': 'FETCH', 'inputStage': scan}}
+            return plan, len(text_index.search(terms, excluded)), False
+
+        doc_id = query.get('_id', _MISSING)
+        if doc_id is not _MISSING and not (_is_operator_dict(doc_id) and '$eq' not in doc_id):
+            return {'stage': 'IDHACK'}, len(list(self._candidates({'_id': doc_id}))), True
+
+        best, best_rank = None, None
+        for index in self._db._indexes[self.name].values():
+            if isinstance(index, MockTextIndex) or index.partial:
+                continue
+            bound, equalities = _index_bounds(index.keys, query)
+            if not bound:
+                continue
+            rank = (bound, _index_provides_sort(index.keys, equalities, sort))
+            if best_rank is None or rank > best_rank:
+                best, best_rank = index, rank
+        if best is None:
+            return {'stage': 'COLLSCAN', 'filter': query}, len(self._db._primary[self.name]), False
+
+        bounded = {field: query[field] for field, _ in best.keys if field in query}
+        scan = {'stage': 'IXSCAN', 'indexName': best.name, 'keyPattern': dict(best.keys)}
+        return {'stage': 'FETCH', 'inputStage': scan}, len(list(self._select(bounded))), best_rank[1]
+
+    def _text_index(self):
+        """Return the collection's text index, if it has one."""
+        for index in self._db._indexes[self.name].values():
+            if isinstance(index, MockTextIndex):
+                return index
+        return None
+
+    def _update(self, query, update, multi, upsert=False):
+        apply = _compile_update(update)
+        with self._lock.write():
+            return self._apply_update(query, apply, multi, upsert)
+
+    def _apply_update(self, query, apply, multi, upsert):
+        self._db._detach(self.name)
+        matched = modified = 0
+        for doc in self._matching(query, multi):
+            matched += 1
+            new_doc = apply(doc)
+            if new_doc == doc:
+                continue
+            if new_doc.get('_id') != doc['_id']:
+                raise OperationFailure("Performing an update on the path '_id' would modify the immutable field '_id'")
+
+            self._replace(str(doc['_id']), doc, _freeze(new_doc))
+            modified += 1
+
+        if not matched and upsert:
+            inserted = self._insert(apply(_upsert_seed(query or {}), inserting=True))
+            return UpdateResult(0, 0, upserted_id=inserted.inserted_id)
+        return UpdateResult(matched, modified)
+
+    def _replace(self, pk, old_doc, new_doc):
+        """Swap a stored document for its updated version, keeping indexes in sync."""
+        indexes = self._db._indexes[self.name].values()
+        for index in indexes:
+            index.check_unique(pk, new_doc)
+        for index in indexes:
+            index.remove(pk, old_doc)
+        self._db._collections[self.name][self._db._primary[self.name][pk]] = new_doc
+        for index in indexes:
+            index.add(pk, new_doc)
+
+    def _delete(self, query, multi):
+        with self._lock.write():
+            return self._apply_delete(query, multi)
+
+    def _apply_delete(self, query, multi):
+        self._db._detach(self.name)
+        deleted = 0
+        for doc in self._matching(query, multi):
+            pk = str(doc['_id'])
+            for index in self._db._indexes[self.name].values():
+                index.remove(pk, doc)
+
+            # Leave a tombstone instead of shifting the list
+            documents = self._db._collections[self.name]
+            documents[self._db._primary[self.name].pop(pk)] = None
+            self._db._tombstones[self.name] += 1
+            tombstones = self._db._tombstones[self.name]
+            if tombstones >= _COMPACT_MIN_TOMBSTONES and tombstones * 2 > len(documents):
+                self._db._compact(self.name)
+            deleted += 1
+
+        return DeleteResult(deleted)
+
+    def _scan(self):
+        """Iterate over the live documents of the collection."""
+        return (doc for doc in self._db._collections[self.name] if doc is not None)
+
+    def _get_by_id(self, doc_id):
+        """Return the stored document with the given ``_id`` in O(1), or None."""
+        pk = str(doc_id)
+        slot = self._db._primary[self.name].get(pk)
+        if slot is None:
+            return None
+        documents = self._db._collections[self.name]
+        doc = documents[slot] if slot < len(documents) else None
+        if doc is None or str(doc.get('_id')) != pk:
+            # Storage was replaced behind our back; trust the documents
+            return next((doc for doc in self._scan() if str(doc.get('_id')) == pk), None)
+        return doc
+
+    def _candidates(self, query):
+        """Pick the documents that can possibly match ``query``.
+
+        This is the query planner: an ``_id`` equality (or ``$in``) is a
+        primary key lookup, an equality or ``$in`` predicate on an indexed
+        field is served from the smallest matching index buckets, a range
+        predicate from an index range scan, and anything else from a collection scan. Callers still apply
+        the compiled query to every candidate.
+        """
         if not query:
-            return True
-        
-        for key, value in query.items():
-            if key == '_id':
-                # Handle ObjectId comparison
-                doc_id = str(document.get('_id', ''))
-                query_id = str(value)
-                if doc_id != query_id:
-                    return False
-            elif key.startswith('$'):
-                # Skip operators for simple matching
+            return self._scan()
+
+        doc_id = query.get('_id', _MISSING)
+        if isinstance(doc_id, dict) and '$eq' in doc_id:
+            doc_id = doc_id['$eq']
+        if isinstance(doc_id, dict) and '$in' in doc_id:
+            docs = (self._get_by_id(value) for value in doc_id['$in'])
+            return list({str(doc['_id']): doc for doc in docs if doc is not None}.values())
+        if doc_id is not _MISSING and not isinstance(doc_id, dict):
+            doc = self._get_by_id(doc_id)
+            return [doc] if doc is not None else []
+
+        indexes = self._db._indexes[self.name]
+        if not indexes:
+            return self._scan()
+
+        best_index, best_values, best_size = None, None, None
+        range_index, range_bounds = None, None
+        for index in indexes.values():
+            if isinstance(index, MockTextIndex) or index.partial:
+                continue
+            value = query.get(index.field, _MISSING)
+            if value is _MISSING or isinstance(value, (list, _PATTERN_TYPE)):
                 continue
-            elif isinstance(value, dict):
-                # Handle operators like $ne, $gte, $lte, etc.
-                if '$ne' in value and document.get(key) == value['$ne']:
-                    return False
-                if '$gte' in value and document.get(key, '') < value['$gte']:
-                    return False
-                if '$lte' in value and document.get(key, '') > value['$lte']:
-                    return False
-                if '$lt' in value and document.get(key, '') >= value['$lt']:
-                    return False
-            elif document.get(key) != value:
-                return False
-        
-        return True
+            if _is_operator_dict(value):
+                if '$eq' in value:
+                    values = [value['$eq']]
+                elif '$in' in value and not any(isinstance(v, _PATTERN_TYPE) for v in value['$in']):
+                    values = list(value['$in'])
+                else:
+                    bounds = {op: value[op] for op in _RANGE_OPERATORS if op in value}
+                    if bounds and range_index is None:
+                        range_index, range_bounds = index, bounds
+                    continue
+            else:
+                values = [value]
+            size = sum(index.bucket_size(v) for v in values)
+            if best_size is None or size < best_size:
+                best_index, best_values, best_size = index, values, size
+
+        if best_index is not None:
+            if len(best_values) == 1:
+                return best_index.lookup(best_values[0])
+            results = {}
+            for value in best_values:
+                for doc in best_index.lookup(value):
+                    results[str(doc['_id'])] = doc
+            return list(results.values())
+        if range_index is not None:
+            return range_index.range(range_bounds)
+        return self._scan()
 
 class MockCursor:
-    """Mock MongoDB cursor."""
-    
-    def __init__(self, documents):
-        self._documents = documents
-    
-    def sort(self, key, direction=1):
+    """Lazy mock MongoDB cursor.
+
+    ``sort``, ``skip``, ``limit`` and the projection are only recorded; the
+    query runs as a generator when the cursor is first iterated. With a sort
+    and a limit only the top ``skip + limit`` documents are kept (via a
+    bounded heap), and documents are materialized only as they are yielded.
+    """
+
+    def __init__(self, collection, query=None, projection=None):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+        self._results = None
+
+    def _check_unstarted(self):
+        if self._results is not None:
+            raise InvalidOperation('cannot set options after executing query')
+
+    def sort(self, key_or_list, direction=None):
         """Sort documents."""
-        self._documents.sort(
-            key=lambda x: x.get(key, ''),
-            reverse=(direction == -1)
-        )
+        self._check_unstarted()
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, count):
+        """Skip the first ``count`` results."""
+        self._check_unstarted()
+        self._skip = count
         return self
-    
+
     def limit(self, count):
         """Limit results."""
-        self._documents = self._documents[:count]
+        self._check_unstarted()
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        """Accept a batch size for pymongo compatibility (no-op in memory)."""
         return self
-    
+
+    def clone(self):
+        """Return an unstarted copy of this cursor."""
+        cursor = MockCursor(self._collection, self._query, self._projection)
+        cursor._sort, cursor._skip, cursor._limit = self._sort, self._skip, self._limit
+        return cursor
+
+    def rewind(self):
+        """Rewind the cursor so it can be iterated again."""
+        self._results = None
+        return self
+
+    def close(self):
+        """Stop iterating the cursor."""
+        self._results = iter(())
+
+    def explain(self):
+        """Return the query plan and execution statistics, like pymongo's explain()."""
+        return self._collection._explain(self._query, self._sort, self._skip, self._limit)
+
+    def _execute(self):
+        score_fields, projection, sort = _text_score_fields(self._projection, self._sort)
+        scores = {} if score_fields else None
+        stop = self._skip + self._limit if self._limit else None
+        collection = self._collection
+        with collection._lock.read():
+            # Only references are collected under the lock: stored documents
+            # are immutable, so they can be sorted and copied after it.
+            documents = collection._select(self._query, scores)
+            documents = list(documents if sort or stop is None else islice(documents, stop))
+
+        if score_fields:
+            documents = [ReadOnlyDocument(doc, **dict.fromkeys(score_fields, scores.get(str(doc['_id']), 0.0)))
+                         for doc in documents]
+
+        if sort:
+            key, reverse = _order_by(sort)
+            if stop is not None:
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                documents = select(stop, documents, key=key)
+            else:
+                documents = sorted(documents, key=key, reverse=reverse)
+
+        read_mode = self._collection._db.read_mode
+        for doc in islice(documents, self._skip, stop):
+            yield _materialize(doc, projection, read_mode)
+
     def __iter__(self):
         """Iterate over documents."""
-        return iter(self._documents)
-    
+        return self
+
+    def __next__(self):
+        if self._results is None:
+            self._results = self._execute()
+        return next(self._results)
+
     def __getitem__(self, key):
         """Get item by index or slice."""
-        return self._documents[key]
+        cursor = self.clone()
+        if isinstance(key, slice):
+            cursor._skip += key.start or 0
+            if key.stop is not None:
+                limit = key.stop - (key.start or 0)
+                cursor._limit = min(cursor._limit, limit) if cursor._limit else limit
+            return cursor
+        for doc in cursor.skip(cursor._skip + key).limit(1):
+            return doc
+        raise IndexError('no such item for Cursor instance')
 
 # Global mock database instance
 _mock_db = MockDatabase()
@@ -0,0 +1,115 @@
+"""
+Keyset (cursor) pagination for the list endpoints
+
+A page is sorted on ``(sort key, _id)``; its opaque cursor encodes those
+two values of the last document, and the next page starts strictly after
+them. Unlike skip/limit, every page is a bounded index scan, however deep.
+"""
+
+from datetime import datetime
+import base64
+import binascii
+import json
+
+from bson import ObjectId
+from marshmallow import ValidationError
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that wasn't issued by encode_cursor."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {'$oid': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if '$date' in value:
+            return datetime.fromisoformat(value['$date'])
+        if '$oid' in value:
+            return ObjectId(value['$oid'])
+        raise InvalidCursor('Invalid cursor value')
+    return value
+
+
+def encode_cursor(key, document):
+    """Return the cursor for the page following ``document``."""
+    values = [_encode_value(document.get(key)), _encode_value(document['_id'])]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the ``(sort value, _id)`` pair encoded in ``cursor``."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        value, doc_id = values
+        return _decode_value(value), _decode_value(doc_id)
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def keyset_filter(key, direction, cursor):
+    """Return the filter matching the documents after ``cursor`` in ``(key, _id)`` order.
+
+    Nulls (and missing fields) sort before every other value, so they need
+    their own branches: after a null only nulls with a later _id follow in
+    ascending order, and in descending order nulls follow every value.
+    """
+    value, doc_id = decode_cursor(cursor)
+    after = '$gt' if direction == 1 else '$lt'
+    tie = {key: value, '_id': {after: doc_id}}
+    if value is None:
+        return {'$or': [tie, {key: {'$ne': None}}]} if direction == 1 else tie
+    branches = [{key: {after: value}}, tie]
+    if direction == -1:
+        branches.append({key: None})
+    return {'$or': branches}
+
+
+def page_params(schema, args):
+    """Validate the ``limit``/``cursor`` query parameters of a list request.
+
+    Returns None when neither is given (the endpoint then returns every
+    document, as before), otherwise the loaded values. A malformed cursor
+    is a ValidationError like any other bad parameter.
+    """
+    if 'limit' not in args and 'cursor' not in args:
+        return None
+    params = schema(only=('limit', 'cursor')).load({key: args[key] for key in ('limit', 'cursor') if key in args})
+    if 'cursor' in params:
+        try:
+            decode_cursor(params['cursor'])
+        except InvalidCursor as e:
+            raise ValidationError({'cursor': [str(e)]})
+    return params
+
+
+def find_page(collection, query, key, direction=1, limit=DEFAULT_LIMIT, cursor=None, projection=None):
+    """Return ``(documents, next cursor)`` for one page of ``query``.
+
+    The next cursor is None on the last page.
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    if cursor:
+        keyset = keyset_filter(key, direction, cursor)
+        # Keep the user's fields at the top level, where the planner sees them
+        query = {'$and': [query, keyset]} if set(query) & set(keyset) else dict(query, **keyset)
+    if projection and all(spec for field, spec in projection.items() if field != '_id'):
+        # An inclusive projection must keep the sort key for the next cursor
+        projection = dict(projection, **{key: 1})
+    # One extra document tells whether there is a next page
+    documents = list(collection.find(query, projection).sort([(key, direction), ('_id', direction)]).limit(limit + 1))
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, encode_cursor(key, documents[-1])
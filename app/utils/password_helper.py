@@ -1,26 +1,172 @@
 """
 Password hashing utilities using bcrypt
+
+bcrypt is deliberately slow (a few hundred ms per hash at the
+``BCRYPT_ROUNDS`` cost, see scripts/calibrate_bcrypt.py), so with
+``BCRYPT_POOL_WORKERS`` set the hashing runs on a small thread pool
+(bcrypt releases the GIL) instead of the request thread. At most that many
+hashes run at once, ``BCRYPT_POOL_MAX_QUEUE`` more may wait, and a caller
+waits at most ``BCRYPT_POOL_TIMEOUT_S``; past that PasswordHashingBusy is
+raised and the endpoint answers 503, so a login storm can't take every
+request thread.
 """
 
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import os
+import threading
+import time
 import bcrypt
 import secrets
 import string
 
-def hash_password(password):
-    """Hash password using bcrypt."""
-    # Generate salt rounds (12 rounds minimum for security)
-    salt_rounds = 12
+_pool = None
+_rounds = 12
+
+# bcrypt accepts cost factors 4 to 31
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+
+class PasswordHashingBusy(RuntimeError):
+    """The password hashing pool is full or didn't answer in time."""
+
+
+class PasswordHashingPool:
+    """Bounded thread pool running bcrypt calls, with queue and wait metrics."""
+
+    def __init__(self, workers=4, max_queue=32, timeout=5.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._running = 0
+        self._stats = {'submitted': 0, 'completed': 0, 'rejected': 0, 'timeouts': 0,
+                       'wait_ms_total': 0.0, 'wait_ms_max': 0.0, 'run_ms_total': 0.0}
+
+    def _get_executor(self):
+        """Return this process's executor; the caller holds the lock.
+
+        Pool threads don't survive fork(), so a forked worker builds its own.
+        """
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+            self._pid = os.getpid()
+            self._pending = self._running = 0
+        return self._executor
+
+    def run(self, func, *args):
+        """Run ``func(*args)`` on the pool and return its result.
+
+        Raises PasswordHashingBusy when ``workers + max_queue`` calls are
+        already in flight, or when the result takes longer than ``timeout``.
+        """
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.workers + self.max_queue:
+                self._stats['rejected'] += 1
+                raise PasswordHashingBusy('Password hashing queue is full')
+            self._pending += 1
+            self._stats['submitted'] += 1
+            future = executor.submit(self._call, time.perf_counter(), func, args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # A call still queued is dropped; a running one finishes unseen
+            future.cancel()
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PasswordHashingBusy('Password hashing timed out')
+        finally:
+            if future.cancelled():
+                with self._lock:
+                    self._pending -= 1
+
+    def _call(self, submitted_at, func, args):
+        started = time.perf_counter()
+        wait_ms = (started - submitted_at) * 1000
+        with self._lock:
+            self._running += 1
+            self._stats['wait_ms_total'] += wait_ms
+            self._stats['wait_ms_max'] = max(self._stats['wait_ms_max'], wait_ms)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._stats['completed'] += 1
+                self._stats['run_ms_total'] += (time.perf_counter() - started) * 1000
+
+    def stats(self):
+        """Return the queue depth, concurrency and wait/run time counters."""
+        with self._lock:
+            stats = dict(self._stats, enabled=True, pid=os.getpid(), workers=self.workers,
+                         max_queue=self.max_queue, running=self._running,
+                         queued=self._pending - self._running)
+        started = stats['completed'] or 1
+        stats['wait_ms_avg'] = round(stats.pop('wait_ms_total') / started, 3)
+        stats['run_ms_avg'] = round(stats.pop('run_ms_total') / started, 3)
+        stats['wait_ms_max'] = round(stats['wait_ms_max'], 3)
+        return stats
+
+
+def init_password_hashing(app):
+    """Set the bcrypt cost and create the hashing pool (off when 0 workers) from the app config."""
+    global _pool, _rounds
+    _rounds = min(max(int(app.config.get('BCRYPT_ROUNDS', 12)), MIN_ROUNDS), MAX_ROUNDS)
+    workers = app.config.get('BCRYPT_POOL_WORKERS', 4)
+    _pool = PasswordHashingPool(workers=workers, max_queue=app.config.get('BCRYPT_POOL_MAX_QUEUE', 32),
+                                timeout=app.config.get('BCRYPT_POOL_TIMEOUT_S', 5.0)) if workers > 0 else None
+
+
+def get_password_pool_stats():
+    """Return the password hashing pool statistics of the current process."""
+    if _pool is None:
+        return {'enabled': False, 'pid': os.getpid()}
+    return _pool.stats()
+
+
+def _hash_password(password, rounds):
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt(rounds=salt_rounds)
+    salt = bcrypt.gensalt(rounds=rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
-def verify_password(password, hashed_password):
-    """Verify password against hash."""
+def _verify_password(password, hashed_password):
     password_bytes = password.encode('utf-8')
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+def hash_password(password, rounds=None):
+    """Hash password using bcrypt (on the hashing pool, if configured).
+
+    ``rounds`` defaults to the configured ``BCRYPT_ROUNDS``.
+    """
+    rounds = rounds or _rounds
+    if _pool is None:
+        return _hash_password(password, rounds)
+    return _pool.run(_hash_password, password, rounds)
+
+def verify_password(password, hashed_password):
+    """Verify password against hash (on the hashing pool, if configured)."""
+    if _pool is None:
+        return _verify_password(password, hashed_password)
+    return _pool.run(_verify_password, password, hashed_password)
+
+def hash_rounds(hashed_password):
+    """Return the cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None."""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed_password):
+    """Return True if a stored hash wasn't made with the configured cost."""
+    return hash_rounds(hashed_password) != _rounds
+
 def generate_reset_token():
     """Generate password reset token."""
     alphabet = string.ascii_letters + string.digits
@@ -0,0 +1,59 @@
+"""
+Field projection helpers for the model finders and list endpoints
+"""
+
+from functools import lru_cache
+import inspect
+
+# Projection for callers that only count the documents
+ID_ONLY = {'_id': 1}
+
+
+def parse_fields(value, allowed):
+    """Parse a ``fields=a,b,c`` query parameter.
+
+    Returns the requested field names that are in ``allowed`` (unknown ones
+    are ignored), or None when the parameter is absent so the caller
+    fetches whole documents.
+    """
+    if not value:
+        return None
+    return [field for field in (part.strip() for part in value.split(',')) if field in allowed]
+
+
+def projection_for(fields):
+    """Build a find() projection for a list of field names (None: everything)."""
+    if fields is None:
+        return None
+    return dict.fromkeys(fields, 1) if fields else ID_ONLY
+
+
+def select_fields(data, fields):
+    """Keep only ``fields`` of a serialized document (None keeps all of them)."""
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
+
+
+@lru_cache(maxsize=None)
+def _parameters(cls):
+    return inspect.signature(cls.__init__).parameters
+
+
+def document_kwargs(cls, document, renames=None):
+    """Constructor kwargs for ``cls`` from a stored, possibly projected, document.
+
+    Stored field names are mapped through ``renames``, fields the
+    constructor doesn't take are dropped, and required arguments missing
+    from a projected document are passed as None.
+    """
+    parameters = _parameters(cls)
+    kwargs = {}
+    for key, value in document.items():
+        key = (renames or {}).get(key, key)
+        if key in parameters:
+            kwargs[key] = value
+    for name, parameter in parameters.items():
+        if name != 'self' and name not in kwargs and parameter.default is inspect.Parameter.empty:
+            kwargs[name] = None
+    return kwargs
@@ -0,0 +1,249 @@
+"""
+Query-plan audit mode
+
+When ``QUERY_AUDIT_ENABLED`` is set, collections returned by
+``get_collection`` are wrapped so every ``find``/``find_one`` and
+``aggregate`` is counted per query shape, and a sample of them is run
+through ``explain``. Shapes whose winning plan contains a ``COLLSCAN``, a
+blocking ``SORT`` or examines many more documents than it returns are
+flagged. ``audit_queries.py`` prints the report.
+"""
+
+from collections.abc import Mapping
+import json
+import os
+import random
+import threading
+import traceback
+
+_auditor = None
+
+# Frames from these files are skipped when looking for the calling code
+_INTERNAL_FILES = (os.path.abspath(__file__), os.path.join('app', 'utils', 'db.py'),
+                   os.path.join('app', 'utils', 'pagination.py'))
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def query_shape(value):
+    """Replace the literal values of a filter with '?', keeping fields and operators."""
+    if isinstance(value, Mapping):
+        return {key: query_shape(value[key]) for key in sorted(value)}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, Mapping) for item in value):
+        # $and / $or / $nor branches
+        return [query_shape(item) for item in value]
+    return '?'
+
+
+def pipeline_shape(pipeline):
+    """Shape an aggregation: stage names, with the shape of a leading $match."""
+    stages = []
+    for stage in pipeline:
+        name = next(iter(stage))
+        stages.append({name: query_shape(stage[name])} if name == '$match' else name)
+    return stages
+
+
+def _walk(plan):
+    """Yield every stage of a plan tree, root first."""
+    if not plan:
+        return
+    yield plan
+    yield from _walk(plan.get('inputStage'))
+    for child in plan.get('inputStages', ()):
+        yield from _walk(child)
+
+
+def _plan_and_stats(explain):
+    """Return ``(winning plan, execution stats)`` from a find or aggregate explain."""
+    cursor = explain
+    if 'stages' in explain:
+        cursor = explain['stages'][0].get('$cursor', {})
+    winning = cursor.get('queryPlanner', {}).get('winningPlan', {})
+    # Slot-based engine explains nest the classic plan under queryPlan
+    winning = winning.get('queryPlan', winning)
+    return winning, cursor.get('executionStats', {})
+
+
+def _describe(plan):
+    parts = []
+    for stage in _walk(plan):
+        name = stage.get('stage', '?')
+        parts.append(f"{name} {stage['indexName']}" if 'indexName' in stage else name)
+    return ' > '.join(parts)
+
+
+def _caller():
+    """Return 'file:line in function' for the application code issuing a query."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.endswith(_INTERNAL_FILES) or not filename.startswith(_APP_DIR):
+            continue
+        return f'{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class QueryAuditor:
+    """Per query shape counters and explain findings."""
+
+    def __init__(self, sample_rate=1.0, max_ratio=10):
+        self.sample_rate = sample_rate
+        self.max_ratio = max_ratio
+        self._lock = threading.Lock()
+        self._shapes = {}
+
+    def wrap(self, collection):
+        """Return ``collection`` with its reads audited."""
+        return AuditedCollection(collection, self)
+
+    def record(self, collection, operation, shape, explain):
+        """Count one query and, if ``explain`` is given, run and analyse it."""
+        key = f'{collection.name}.{operation} {json.dumps(shape, sort_keys=True, default=str)}'
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                entry = self._shapes[key] = {
+                    'shape': key, 'collection': collection.name, 'operation': operation,
+                    'source': _caller(), 'executions': 0, 'explained': 0, 'plan': None,
+                    'issues': set(), 'docs_examined': 0, 'returned': 0, 'max_ratio': 0.0, 'errors': 0,
+                }
+            entry['executions'] += 1
+        if random.random() >= self.sample_rate:
+            return
+
+        try:
+            plan, stats = _plan_and_stats(explain())
+        except Exception:
+            with self._lock:
+                entry['errors'] += 1
+            return
+
+        stages = {stage.get('stage') for stage in _walk(plan)}
+        examined = stats.get('totalDocsExamined', 0)
+        returned = stats.get('nReturned', 0)
+        ratio = examined / max(returned, 1)
+        with self._lock:
+            entry['explained'] += 1
+            entry['plan'] = _describe(plan)
+            entry['docs_examined'] += examined
+            entry['returned'] += returned
+            entry['max_ratio'] = max(entry['max_ratio'], ratio)
+            if 'COLLSCAN' in stages:
+                entry['issues'].add('COLLSCAN')
+            if 'SORT' in stages:
+                entry['issues'].add('SORT')
+            if ratio > self.max_ratio:
+                entry['issues'].add('RATIO')
+
+    def report(self):
+        """Return the audited query shapes, those with issues first."""
+        with self._lock:
+            entries = [dict(entry, issues=sorted(entry['issues'])) for entry in self._shapes.values()]
+        return sorted(entries, key=lambda entry: (not entry['issues'], entry['shape']))
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+
+
+class AuditedCollection:
+    """Collection proxy that reports reads to a QueryAuditor."""
+
+    def __init__(self, collection, auditor):
+        self._collection = collection
+        self._auditor = auditor
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find(self, filter=None, *args, **kwargs):
+        return AuditedCursor(self._collection.find(filter, *args, **kwargs), self, filter, kwargs.get('sort'))
+
+    def find_one(self, filter=None, *args, **kwargs):
+        if filter is not None and not isinstance(filter, Mapping):
+            filter = {'_id': filter}
+        for document in self.find(filter, *args, **kwargs).limit(1):
+            return document
+        return None
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        pipeline = list(pipeline)
+        collection = self._collection
+        command = {'aggregate': collection.name, 'pipeline': pipeline, 'cursor': {}}
+        self._auditor.record(collection, 'aggregate', pipeline_shape(pipeline),
+                             lambda: collection.database.command('explain', command, verbosity='executionStats'))
+        return collection.aggregate(pipeline, *args, **kwargs)
+
+
+class AuditedCursor:
+    """Cursor proxy that audits the query when iteration starts."""
+
+    def __init__(self, cursor, collection, filter, sort=None):
+        self._cursor = cursor
+        self._collection = collection
+        self._filter = filter
+        self._sort = sort
+        self._audited = False
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # Keep chained calls (limit, skip, batch_size...) on the proxy
+            return self if result is self._cursor else result
+        return call
+
+    def sort(self, key_or_list, direction=None):
+        if direction is None:
+            self._cursor.sort(key_or_list)
+        else:
+            self._cursor.sort(key_or_list, direction)
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction or 1)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def _audit(self):
+        if self._audited:
+            return
+        self._audited = True
+        shape = {'filter': query_shape(self._filter or {})}
+        if self._sort:
+            shape['sort'] = [list(item) for item in (self._sort.items() if isinstance(self._sort, Mapping) else self._sort)]
+        self._collection._auditor.record(self._collection._collection, 'find', shape, self._cursor.explain)
+
+    def __iter__(self):
+        self._audit()
+        return iter(self._cursor)
+
+    def __next__(self):
+        self._audit()
+        return next(self._cursor)
+
+    def __getitem__(self, index):
+        self._audit()
+        return self._cursor[index]
+
+
+def init_query_audit(app):
+    """Turn query auditing on or off from the app config."""
+    global _auditor
+    if app.config.get('QUERY_AUDIT_ENABLED'):
+        _auditor = QueryAuditor(sample_rate=app.config.get('QUERY_AUDIT_SAMPLE_RATE', 1.0),
+                                max_ratio=app.config.get('QUERY_AUDIT_MAX_RATIO', 10))
+        app.logger.info("Query audit enabled")
+    else:
+        _auditor = None
+
+
+def audit_collection(collection):
+    """Wrap ``collection`` for auditing when audit mode is on."""
+    return collection if _auditor is None else _auditor.wrap(collection)
+
+
+def get_query_auditor():
+    """Return the active QueryAuditor, or None when auditing is off."""
+    return _auditor
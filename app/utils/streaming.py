@@ -0,0 +1,52 @@
+"""
+Streaming JSON list responses
+
+``stream_list`` writes the usual ``{"data": [...], "count": n, "success": true}``
+envelope while iterating over a cursor, so the first bytes leave as soon
+as the first batch is read and only one batch of items is held in memory.
+"""
+
+from flask import Response, current_app, request, stream_with_context
+
+
+def wants_stream():
+    """Return True if this list request should be streamed.
+
+    ``?stream=true`` or ``?stream=false`` decides per request; otherwise the
+    ``STREAM_LIST_RESPONSES`` setting does.
+    """
+    value = request.args.get('stream')
+    if value is None:
+        return current_app.config.get('STREAM_LIST_RESPONSES', False)
+    return value.lower() == 'true'
+
+
+def stream_list(items, serialize, error_message='Failed to fetch data'):
+    """Return a streamed JSON response listing ``serialize(item)`` for ``items``.
+
+    Items are encoded with the app's JSON provider (like ``jsonify``) and
+    written in chunks of ``STREAM_BATCH_SIZE``. The status is sent before
+    the items are read, so an error part way through ends the body with
+    ``"success": false`` and ``error`` instead of a 500.
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 100)
+    dumps = current_app.json.dumps
+
+    def generate():
+        count = 0
+        chunk = ['{"data":[']
+        try:
+            for item in items:
+                chunk.append((',' if count else '') + dumps(serialize(item)))
+                count += 1
+                if len(chunk) >= batch_size:
+                    yield ''.join(chunk)
+                    chunk = []
+        except Exception as e:
+            current_app.logger.error(f"Streaming response error: {e}")
+            chunk.append(f'],"count":{count},"success":false,"error":{dumps(error_message)}}}')
+        else:
+            chunk.append(f'],"count":{count},"success":true}}')
+        yield ''.join(chunk)
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,185 @@
+"""
+Write-behind queue for non-critical writes
+
+Low-priority updates (last login times, read flags) don't need to hold up
+the request that triggers them. With ``WRITE_BEHIND_ENABLED`` they are
+queued in-process and a background thread sends them as one unordered
+``bulk_write`` per collection every ``WRITE_BEHIND_FLUSH_INTERVAL_MS``, or
+as soon as ``WRITE_BEHIND_MAX_BATCH`` are waiting. The queue is flushed at
+exit; writes still queued when the process is killed are lost, so only
+writes that can be lost belong here.
+"""
+
+from itertools import islice
+import atexit
+import logging
+import os
+import threading
+import time
+
+from pymongo.errors import BulkWriteError
+
+from .db import get_collection, get_db
+
+_queue = None
+
+
+class WriteBehindQueue:
+    """Buffer of pymongo write operations flushed by a background thread.
+
+    Operations submitted with a ``key`` replace a queued operation with the
+    same collection and key, so repeated updates of one field of one
+    document cost a single write.
+    """
+
+    def __init__(self, flush_interval_ms=200, max_batch=500, max_queue=10000, logger=None):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = {}
+        self._pid = None
+        self._stopped = False
+        self._stats = {'submitted': 0, 'coalesced': 0, 'overflowed': 0, 'written': 0, 'failed': 0,
+                       'batches': 0, 'last_flush_ms': None, 'last_error': None}
+
+    def submit(self, collection_name, operation, key=None):
+        """Queue ``operation`` for ``collection_name``.
+
+        Returns False when the queue is full or stopped; the caller should
+        then run the write itself.
+        """
+        with self._lock:
+            if self._stopped:
+                self._stats['overflowed'] += 1
+                return False
+            if self._pid != os.getpid():
+                self._start()
+            entry = (collection_name, key) if key is not None else object()
+            if entry not in self._pending and len(self._pending) >= self.max_queue:
+                self._stats['overflowed'] += 1
+                return False
+            if self._pending.pop(entry, None) is not None:
+                self._stats['coalesced'] += 1
+            self._pending[entry] = (collection_name, operation)
+            self._stats['submitted'] += 1
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wakeup.set()
+        return True
+
+    def _start(self):
+        """Start the flusher thread of this process; the caller holds the lock.
+
+        Threads don't survive fork(), and operations inherited from the
+        parent are the parent's to write, so a forked worker starts afresh.
+        """
+        self._pid = os.getpid()
+        self._pending = {}
+        thread = threading.Thread(target=self._run, name='write-behind-flusher', daemon=True)
+        thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write every queued operation now, in batches of ``max_batch``."""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    entries = list(islice(self._pending, self.max_batch))
+                    batch = [self._pending.pop(entry) for entry in entries]
+                if not batch:
+                    return
+                self._write(batch)
+
+    def _write(self, batch):
+        """Send one batch, as one bulk_write per collection."""
+        started = time.perf_counter()
+        by_collection = {}
+        for collection_name, operation in batch:
+            by_collection.setdefault(collection_name, []).append(operation)
+        written = failed = 0
+        error = None
+        for collection_name, operations in by_collection.items():
+            try:
+                get_db()[collection_name].bulk_write(operations, ordered=False)
+                written += len(operations)
+            except BulkWriteError as e:
+                failed += len(e.details['writeErrors'])
+                written += len(operations) - len(e.details['writeErrors'])
+                error = f"{collection_name}: {e.details['writeErrors'][0]['errmsg']}"
+            except Exception as e:
+                # Connection errors and the like: the batch is dropped
+                failed += len(operations)
+                error = f"{collection_name}: {e}"
+        if error:
+            self._logger.error(f"Write-behind flush error ({failed} failed): {error}")
+        with self._lock:
+            self._stats['written'] += written
+            self._stats['failed'] += failed
+            self._stats['batches'] += 1
+            self._stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            if error:
+                self._stats['last_error'] = error
+
+    def stop(self):
+        """Stop accepting operations and flush the ones still queued."""
+        self._stopped = True
+        self._wakeup.set()
+        if self._pid == os.getpid():
+            self.flush()
+
+    def stats(self):
+        """Return the queue depth and flush counters of this process."""
+        with self._lock:
+            depth = len(self._pending) if self._pid == os.getpid() else 0
+            return dict(self._stats, enabled=True, pid=os.getpid(), depth=depth, max_queue=self.max_queue)
+
+
+def init_write_behind(app):
+    """Turn the write-behind queue on or off from the app config."""
+    global _queue
+    if _queue is not None:
+        atexit.unregister(_queue.stop)
+        _queue.stop()
+    if app.config.get('WRITE_BEHIND_ENABLED'):
+        _queue = WriteBehindQueue(flush_interval_ms=app.config.get('WRITE_BEHIND_FLUSH_INTERVAL_MS', 200),
+                                  max_batch=app.config.get('WRITE_BEHIND_MAX_BATCH', 500),
+                                  max_queue=app.config.get('WRITE_BEHIND_MAX_QUEUE', 10000),
+                                  logger=app.logger)
+        atexit.register(_queue.stop)
+        app.logger.info("Write-behind queue enabled")
+    else:
+        _queue = None
+
+
+def defer_write(collection_name, operation, key=None, immediate=None):
+    """Queue a pymongo write operation, or run it now if the queue is off or full.
+
+    ``immediate``, if given, is the operation run instead when the write is
+    not queued, for writes that only need extra conditions while they wait.
+    Returns None when the write was queued, otherwise the BulkWriteResult.
+    """
+    if _queue is not None and _queue.submit(collection_name, operation, key):
+        return None
+    return get_collection(collection_name).bulk_write([immediate or operation])
+
+
+def flush_writes():
+    """Write the queued operations now (no-op when the queue is off)."""
+    if _queue is not None:
+        _queue.flush()
+
+
+def get_write_behind_stats():
+    """Return the write-behind queue statistics of the current process."""
+    if _queue is None:
+        return {'enabled': False, 'pid': os.getpid()}
+    return _queue.stats()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Query-plan audit of the model finders
+
+Runs every model finder for each user with query auditing enabled (every
+query explained) and prints one block per query shape: the winning plan,
+where the query comes from and any COLLSCAN, in-memory SORT or high docs
+examined/returned ratio. With --mock --seed it runs against freshly seeded
+mock data, so it can gate CI: --fail-on-issues exits non-zero when a shape
+is flagged.
+"""
+
+from app import create_app
+from app.config import config
+from app.utils.db import get_db
+from app.utils.query_audit import get_query_auditor
+from app.models.user import User
+from app.models.meeting import Meeting
+from app.models.task import Task
+from app.models.notification import Notification
+from app.models.ai_chat import AIChatSession
+from app.models.kpi import KPIMetric
+from datetime import datetime
+import argparse
+import os
+import sys
+
+def finder_calls(user_id, email):
+    """The model reads the API issues, as (label, callable) pairs."""
+    today = datetime.now().strftime('%Y-%m-%d')
+    return [
+        ('User.find_by_email', lambda: User.find_by_email(email)),
+        ('User.find_by_id', lambda: User.find_by_id(user_id)),
+        ('Meeting.find_by_user', lambda: Meeting.find_by_user(user_id)),
+        ('Meeting.find_by_user(status)', lambda: Meeting.find_by_user(user_id, status='scheduled')),
+        ('Meeting.find_page', lambda: Meeting.find_page(user_id, cursor=Meeting.find_page(user_id, limit=1)[1])),
+        ('Meeting.find_upcoming', lambda: Meeting.find_upcoming(user_id)),
+        ('Meeting.find_by_date', lambda: Meeting.find_by_date(user_id, today)),
+        ('Meeting.find_today', lambda: Meeting.find_today(user_id)),
+        ('Meeting.search_by_text', lambda: Meeting.search_by_text(user_id, 'présentation')),
+        ('Meeting.group_by_date', lambda: Meeting.group_by_date(user_id)),
+        ('Task.find_by_user', lambda: Task.find_by_user(user_id)),
+        ('Task.find_by_user(status)', lambda: Task.find_by_user(user_id, status='todo')),
+        ('Task.find_page', lambda: Task.find_page(user_id, cursor=Task.find_page(user_id, limit=1)[1])),
+        ('Task.find_upcoming', lambda: Task.find_upcoming(user_id)),
+        ('Task.find_today', lambda: Task.find_today(user_id)),
+        ('Task.find_overdue', lambda: Task.find_overdue(user_id)),
+        ('Task.find_by_status', lambda: Task.find_by_status(user_id)),
+        ('Notification.find_by_user', lambda: Notification.find_by_user(user_id)),
+        ('Notification.find_by_user(read)', lambda: Notification.find_by_user(user_id, read=False)),
+        ('Notification.find_page', lambda: Notification.find_page(
+            user_id, cursor=Notification.find_page(user_id, limit=1)[1])),
+        ('Notification.count_unread', lambda: Notification.count_unread(user_id)),
+        ('Notification.find_by_type', lambda: Notification.find_by_type(user_id, 'reminder')),
+        ('Notification.find_recent', lambda: Notification.find_recent(user_id)),
+        ('AIChatSession.find_by_user', lambda: AIChatSession.find_by_user(user_id)),
+        ('AIChatSession.find_recent_sessions', lambda: AIChatSession.find_recent_sessions(user_id)),
+        ('KPIMetric.find_by_user', lambda: KPIMetric.find_by_user(user_id)),
+        ('KPIMetric.find_by_date', lambda: KPIMetric.find_by_date(user_id, today)),
+        ('KPIMetric.get_chart_data', lambda: KPIMetric.get_chart_data(user_id)),
+    ]
+
+def print_report(report):
+    """Print the audited query shapes; return how many were flagged."""
+    flagged = 0
+    for entry in report:
+        if entry['issues']:
+            flagged += 1
+        status = ', '.join(entry['issues']) or 'ok'
+        print(f"[{status}] {entry['shape']}")
+        print(f"    runs: {entry['executions']}  plan: {entry['plan'] or 'not explained'}")
+        if entry['explained']:
+            print(f"    docs examined/returned: {entry['docs_examined']}/{entry['returned']}"
+                  f" (worst ratio {entry['max_ratio']:.1f})")
+        if entry['source']:
+            print(f"    source: {entry['source']}")
+        if entry['errors']:
+            print(f"    explain failed {entry['errors']} time(s)")
+    return flagged
+
+def audit_queries(use_mock=False, seed=False, max_ratio=10):
+    """Run the model finders under audit and return the report."""
+    config_name = os.environ.get('FLASK_ENV', 'development')
+
+    class AuditConfig(config[config_name]):
+        QUERY_AUDIT_ENABLED = True
+        QUERY_AUDIT_SAMPLE_RATE = 1.0
+        QUERY_AUDIT_MAX_RATIO = max_ratio
+        USE_MOCK_DB = use_mock or config[config_name].USE_MOCK_DB
+
+    app = create_app(AuditConfig)
+    if seed:
+        from scripts.seed_db import seed as seed_database
+        seed_database(app)
+
+    with app.app_context():
+        auditor = get_query_auditor()
+        # Seeding goes through the audited collections too
+        auditor.reset()
+        # Read the users straight from the database so the lookup isn't audited
+        users = list(get_db()['users'].find({}, {'_id': 1, 'email': 1}))
+        for user in users:
+            for label, call in finder_calls(str(user['_id']), user.get('email')):
+                try:
+                    call()
+                except Exception as e:
+                    print(f'⚠️ {label} failed: {e}')
+        print(f'Audited the model finders for {len(users)} user(s) on {app.config["MONGO_URI"]}'
+              + (' (mock)' if AuditConfig.USE_MOCK_DB else ''))
+        return auditor.report()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Explain the model queries and flag the slow plans')
+    parser.add_argument('--mock', action='store_true', help='use the in-memory mock database')
+    parser.add_argument('--seed', action='store_true', help='seed sample data first (scripts/seed_db.py)')
+    parser.add_argument('--max-ratio', type=float, default=10, help='flag queries examining more docs per result')
+    parser.add_argument('--fail-on-issues', action='store_true', help='exit with status 1 if a query is flagged')
+    args = parser.parse_args()
+
+    report = audit_queries(use_mock=args.mock, seed=args.seed, max_ratio=args.max_ratio)
+    flagged = print_report(report)
+    print(f'{flagged} of {len(report)} query shape(s) flagged')
+    if flagged and args.fail_on_issues:
+        sys.exit(1)
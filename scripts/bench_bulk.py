@@ -0,0 +1,105 @@
+r"""
+Throughput of the bulk task/meeting endpoints vs one request per item.
+
+Creates ``--items`` tasks (then meetings) through the Flask test client
+against the in-memory mock database, once with one ``POST /api/tasks`` per
+item and once with ``POST /api/tasks/bulk`` in batches of ``--batch``,
+then updates them the same two ways. Every request goes through the full
+middleware chain, including the authenticated user lookup. Reports items
+per second for each.
+
+Usage: run from project root with the project's Python environment, for
+example:
+  python scripts/bench_bulk.py --items 2000 --batch 200
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ensure the package root is on sys.path so `from app import ...` works
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app import create_app
+from app.config import Config
+from app.utils.jwt_helper import generate_access_token
+from app.models.user import User
+
+
+class BenchConfig(Config):
+    USE_MOCK_DB = True
+    DEBUG = False
+    RATE_LIMIT_ENABLED = False
+
+
+def task_item(i):
+    return {'title': f'Tâche {i}', 'assignee': 'AB', 'due_date': f'2024-06-{i % 28 + 1:02d}', 'priority': 'medium'}
+
+
+def meeting_item(i):
+    return {'company': f'Client {i}', 'contact': 'Jean Dupont', 'subject': 'Suivi',
+            'date': f'2024-06-{i % 28 + 1:02d}', 'time': '10:00 AM'}
+
+
+def timed(run):
+    started = time.perf_counter()
+    ids = run()
+    return ids, time.perf_counter() - started
+
+
+def bench(client, headers, resource, make_item, items, batch):
+    """Return items/s for (single create, bulk create, single update, bulk update)."""
+    url = f'/api/{resource}'
+
+    def single_create():
+        return [client.post(url, headers=headers, json=make_item(i)).get_json()['data']['id'] for i in range(items)]
+
+    def bulk_create():
+        ids = []
+        for start in range(0, items, batch):
+            body = client.post(f'{url}/bulk', headers=headers,
+                               json=[make_item(i) for i in range(start, min(start + batch, items))]).get_json()
+            ids += [item['id'] for item in body['data']]
+        return ids
+
+    single_ids, single_create_s = timed(single_create)
+    bulk_ids, bulk_create_s = timed(bulk_create)
+
+    def single_update():
+        for doc_id in single_ids:
+            client.put(f'{url}/{doc_id}', headers=headers, json={'priority': 'high'})
+
+    def bulk_update():
+        for start in range(0, items, batch):
+            client.put(f'{url}/bulk', headers=headers,
+                       json=[{'id': doc_id, 'priority': 'high'} for doc_id in bulk_ids[start:start + batch]])
+
+    _, single_update_s = timed(single_update)
+    _, bulk_update_s = timed(bulk_update)
+    return [items / seconds for seconds in (single_create_s, bulk_create_s, single_update_s, bulk_update_s)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    with app.app_context():
+        user = User(email='bench@exemple.com', password='-', full_name='Bench User')
+        user.create()
+        headers = {'Authorization': f'Bearer {generate_access_token(user.id)}'}
+
+    print(f'{args.items} items, bulk batches of {args.batch} (items/s)')
+    print(f'{"resource":<10}{"create":>10}{"bulk create":>13}{"update":>10}{"bulk update":>13}')
+    for resource, make_item in (('tasks', task_item), ('meetings', meeting_item)):
+        rates = bench(client, headers, resource, make_item, args.items, args.batch)
+        print(f'{resource:<10}' + ''.join(f'{rate:>{width}.0f}' for rate, width in zip(rates, (10, 13, 10, 13))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+r"""
+Micro-benchmark for access token verification with and without the cache.
+
+Times ``decode_token`` on one access token reused for every call (as a
+client does over the token's lifetime), with the verified-token cache off
+(a full HMAC check and JSON decode each time) and on
+(``JWT_VERIFY_CACHE_SIZE``), plus a whole authenticated request through
+the Flask test client in both modes.
+
+Usage: run from project root with the project's Python environment, for
+example:
+  python scripts/bench_jwt.py --calls 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ensure the package root is on sys.path so `from app import ...` works
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app import create_app
+from app.config import Config
+from app.utils.cache import init_token_cache
+from app.utils.jwt_helper import decode_token, generate_access_token
+from app.models.user import User
+
+
+class BenchConfig(Config):
+    USE_MOCK_DB = True
+    DEBUG = False
+    RATE_LIMIT_ENABLED = False
+
+
+def per_call(func, calls):
+    """Return the mean microseconds per ``func()`` call."""
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=100000, help='decode_token calls per mode')
+    parser.add_argument('--requests', type=int, default=2000, help='HTTP requests per mode')
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    with app.app_context():
+        user = User(email='bench@exemple.com', password='-', full_name='Bench User')
+        user.create()
+        token = generate_access_token(user.id)
+        headers = {'Authorization': f'Bearer {token}'}
+        print(f'{"cache":<6}{"decode_token (us)":>20}{"GET /api/auth/me (us)":>24}')
+        for size in (0, BenchConfig.JWT_VERIFY_CACHE_SIZE):
+            app.config['JWT_VERIFY_CACHE_SIZE'] = size
+            init_token_cache(app)
+            decode = per_call(lambda: decode_token(token), args.calls)
+            request = per_call(lambda: client.get('/api/auth/me', headers=headers), args.requests)
+            print(f'{"on" if size else "off":<6}{decode:>20.2f}{request:>24.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+r"""
+Micro-benchmark for mock database reads in ``copy`` vs ``view`` mode.
+
+Seeds one user's meetings and tasks into the in-memory mock database and
+times ``Meeting.find_by_user`` and ``Task.find_by_user`` in both read modes,
+reporting the best wall time and the peak allocation (tracemalloc) per call.
+A raw ``list(find())`` over the meetings collection shows the cost of the
+document copies alone, without the model objects built on top of them.
+
+Usage: run from project root with the project's Python environment, for
+example:
+  python scripts/bench_mock_reads.py --documents 10000 --repeat 5
+"""
+from datetime import datetime, timedelta
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Ensure the package root is on sys.path so `from app import ...` works
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app import create_app
+from app.config import Config
+from app.utils.db import get_collection, get_db
+from app.models.meeting import Meeting
+from app.models.task import Task
+
+
+class BenchConfig(Config):
+    USE_MOCK_DB = True
+    DEBUG = False
+
+
+def seed(user_id, count):
+    """Insert ``count`` meetings and tasks for ``user_id``."""
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        day = (start + timedelta(days=i % 365)).strftime('%Y-%m-%d')
+        get_collection('meetings').insert_one(Meeting(
+            user_id=user_id, company=f'Client {i}', contact='Jean Dupont',
+            subject='Présentation de la solution', date=day, time='10:00 AM',
+            description='Réunion commerciale ' * 10, notes='Notes ' * 50
+        ).to_dict())
+        get_collection('tasks').insert_one(Task(
+            user_id=user_id, title=f'Tâche {i}', description='Préparer la proposition ' * 10,
+            assignee='AB', due_date=day, tags=['commercial', 'suivi']
+        ).to_dict())
+
+
+def measure(finder, user_id, repeat):
+    """Return (best seconds, peak bytes) for one call of ``finder``."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        finder(user_id)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    finder(user_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        user_id = 'bench-user'
+        seed(user_id, args.documents)
+        get_collection('meetings').create_index('user_id')
+        get_collection('tasks').create_index('user_id')
+
+        print(f'{args.documents} documents per collection, best of {args.repeat}')
+        print(f'{"finder":<22}{"mode":<7}{"time (ms)":>12}{"peak (KiB)":>14}')
+        raw_find = lambda uid: list(get_collection('meetings').find({'user_id': uid}))
+        for name, finder in [('Meeting.find_by_user', Meeting.find_by_user),
+                             ('Task.find_by_user', Task.find_by_user),
+                             ('list(meetings.find)', raw_find)]:
+            for mode in ('copy', 'view'):
+                get_db().set_read_mode(mode)
+                seconds, peak = measure(finder, user_id, args.repeat)
+                print(f'{name:<22}{mode:<7}{seconds * 1000:>12.1f}{peak / 1024:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
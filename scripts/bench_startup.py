@@ -0,0 +1,60 @@
+r"""
+Cold-start benchmark for app creation with eager vs lazy MongoDB connect.
+
+Each run starts a fresh Python process (like a serverless cold start) that
+imports the app and calls ``create_app``, and reports how long that took.
+In ``eager`` mode ``init_db`` pings MongoDB before returning; in ``lazy``
+mode (``MONGO_LAZY_CONNECT``) it returns right away and a background probe
+connects. Point ``--uri`` at an unreachable host to see the worst case of
+the eager ping (the server selection timeout).
+
+Usage: run from project root with the project's Python environment, for
+example:
+  python scripts/bench_startup.py --uri mongodb://10.255.255.1:27017/followup_db --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Ensure the package root is on sys.path so `from app import ...` works
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+CHILD = '''
+import time
+started = time.perf_counter()
+from app import create_app
+from app.config import Config
+create_app(Config)
+print(time.perf_counter() - started)
+'''
+
+
+def cold_start(uri, lazy):
+    """Return the seconds spent importing the app and running create_app."""
+    env = dict(os.environ, MONGO_URI=uri, USE_MOCK_DB='False',
+               MONGO_LAZY_CONNECT='True' if lazy else 'False')
+    result = subprocess.run([sys.executable, '-c', CHILD], cwd=BASE_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/followup_db'))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{args.uri}, median of {args.repeat} cold starts')
+    print(f'{"mode":<7}{"import + create_app (ms)":>26}')
+    for mode in ('eager', 'lazy'):
+        runs = [cold_start(args.uri, mode == 'lazy') for _ in range(args.repeat)]
+        print(f'{mode:<7}{statistics.median(runs) * 1000:>26.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+r"""
+Benchmark for buffered vs streamed task list responses.
+
+Seeds one user's tasks into the in-memory mock database and requests
+``GET /api/tasks`` through the Flask test client, once buffered (the usual
+``jsonify`` response) and once with ``?stream=true``. Reports the time to
+the first body chunk, the total time and the peak allocation (tracemalloc)
+per request.
+
+Usage: run from project root with the project's Python environment, for
+example:
+  python scripts/bench_streaming.py --documents 1000 10000 50000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Ensure the package root is on sys.path so `from app import ...` works
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app import create_app
+from app.config import Config
+from app.utils.db import get_collection
+from app.utils.jwt_helper import generate_access_token
+from app.models.task import Task
+from app.models.user import User
+
+
+class BenchConfig(Config):
+    USE_MOCK_DB = True
+    DEBUG = False
+    RATE_LIMIT_ENABLED = False
+
+
+def seed(user_id, count):
+    """Replace the user's tasks with ``count`` new ones."""
+    tasks = get_collection('tasks')
+    tasks.delete_many({'user_id': user_id})
+    for i in range(count):
+        tasks.insert_one(Task(
+            user_id=user_id, title=f'Tâche {i}', description='Préparer la proposition ' * 10,
+            assignee='AB', due_date=f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', tags=['commercial', 'suivi']
+        ).to_dict())
+
+
+def measure(client, url, headers):
+    """Return (seconds to first chunk, total seconds, peak bytes) for one request."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    resp = client.get(url, headers=headers, buffered=False)
+    chunks = iter(resp.response)
+    next(chunks)
+    first = time.perf_counter() - started
+    for _ in chunks:
+        pass
+    total = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    resp.close()
+    return first, total, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    with app.app_context():
+        user = User(email='bench@exemple.com', password='-', full_name='Bench User')
+        user.create()
+        user_id = user.id
+        headers = {'Authorization': f'Bearer {generate_access_token(user_id)}'}
+        print(f'{"tasks":>8}  {"mode":<9}{"first chunk (ms)":>18}{"total (ms)":>12}{"peak (KiB)":>12}')
+        for count in args.documents:
+            seed(user_id, count)
+            for mode, url in (('buffered', '/api/tasks'), ('streamed', '/api/tasks?stream=true')):
+                first, total, peak = measure(client, url, headers)
+                print(f'{count:>8}  {mode:<9}{first * 1000:>18.1f}{total * 1000:>12.1f}{peak / 1024:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+r"""
+Pick the bcrypt cost factor (BCRYPT_ROUNDS) that fits a latency budget.
+
+Times bcrypt hashes on this machine for increasing cost factors (each one
+doubles the work) and reports the highest cost whose median hash time is
+within ``--budget-ms``, never below ``--min-rounds``. Run it at deploy
+time on the instance type that will serve the app, then set
+``BCRYPT_ROUNDS``; existing hashes are upgraded or downgraded to it at
+each user's next login. With ``--env`` only the ``BCRYPT_ROUNDS=<n>`` line
+is printed, for example to append it to an env file.
+
+Usage: run from project root with the project's Python environment, for
+example:
+  python scripts/calibrate_bcrypt.py --budget-ms 250
+  python scripts/calibrate_bcrypt.py --budget-ms 250 --env >> .env
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure the package root is on sys.path so `from app import ...` works
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app.utils.password_helper import MAX_ROUNDS, MIN_ROUNDS, hash_password
+
+
+def median_ms(rounds, samples):
+    """Return the median milliseconds of ``samples`` hashes at cost ``rounds``."""
+    times = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hash_password('Calibrati0n-password', rounds)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def calibrate(budget_ms, min_rounds, max_rounds, samples, log=print):
+    """Return the highest cost factor within ``budget_ms`` (at least ``min_rounds``)."""
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed = median_ms(rounds, samples)
+        log(f'{rounds:>6}{elapsed:>12.1f}')
+        if elapsed > budget_ms:
+            break
+        chosen = max(chosen, rounds)
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--budget-ms', type=float, default=250, help='target median hash time')
+    parser.add_argument('--min-rounds', type=int, default=10, help='lowest cost to ever recommend')
+    parser.add_argument('--max-rounds', type=int, default=16, help='highest cost to try')
+    parser.add_argument('--samples', type=int, default=5, help='hashes timed per cost')
+    parser.add_argument('--env', action='store_true', help='only print BCRYPT_ROUNDS=<n>')
+    args = parser.parse_args()
+    if not MIN_ROUNDS <= args.min_rounds <= args.max_rounds <= MAX_ROUNDS:
+        parser.error(f'need {MIN_ROUNDS} <= --min-rounds <= --max-rounds <= {MAX_ROUNDS}')
+
+    log = (lambda line: None) if args.env else print
+    log(f'{"rounds":>6}{"median (ms)":>12}')
+    rounds = calibrate(args.budget_ms, args.min_rounds, args.max_rounds, args.samples, log)
+    if not args.env:
+        print(f'\nWithin {args.budget_ms:g} ms (minimum {args.min_rounds}):')
+    print(f'BCRYPT_ROUNDS={rounds}')
+
+
+if __name__ == '__main__':
+    main()
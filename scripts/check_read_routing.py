@@ -0,0 +1,71 @@
+r"""
+Check which replica set member serves the primary and analytics reads.
+
+Runs the same find and aggregate on the ``meetings``, ``tasks`` and
+``kpi_metrics`` collections with the default read preference and with the
+``analytics`` read profile (``MONGO_ANALYTICS_*``), and prints the address
+of the member that answered each one next to the replica set primary.
+Analytics reads should land on a secondary while one is available.
+
+A local three-member replica set is enough, for example:
+  mongod --replSet rs0 --port 27017 --dbpath /tmp/rs0-0 &
+  mongod --replSet rs0 --port 27018 --dbpath /tmp/rs0-1 &
+  mongod --replSet rs0 --port 27019 --dbpath /tmp/rs0-2 &
+  mongosh --port 27017 --eval "rs.initiate({_id: 'rs0', members: [
+    {_id: 0, host: 'localhost:27017'}, {_id: 1, host: 'localhost:27018'},
+    {_id: 2, host: 'localhost:27019'}]})"
+
+Usage: run from project root with the project's Python environment, for
+example:
+  python scripts/check_read_routing.py --uri "mongodb://localhost:27017,localhost:27018,localhost:27019/followup_db?replicaSet=rs0"
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Ensure the package root is on sys.path so `from app import ...` works
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+COLLECTIONS = ('meetings', 'tasks', 'kpi_metrics')
+
+
+def served_by(cursor):
+    """Exhaust ``cursor`` and return the 'host:port' of the member that answered."""
+    for _ in cursor:
+        pass
+    address = cursor.address
+    return f'{address[0]}:{address[1]}' if address else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uri', default=os.environ.get('MONGO_URI'),
+                        help='replica set URI (default: $MONGO_URI)')
+    args = parser.parse_args()
+    if not args.uri:
+        parser.error('--uri or MONGO_URI is required')
+    os.environ.update(MONGO_URI=args.uri, USE_MOCK_DB='False', QUERY_AUDIT_ENABLED='False')
+
+    from app import create_app
+    from app.config import Config
+    from app.utils.db import get_collection, get_db
+
+    app = create_app(Config)
+    with app.app_context():
+        client = get_db().client
+        primary = client.primary
+        print(f'primary: {primary[0]}:{primary[1]}' if primary else 'primary: none (not a replica set?)')
+        print(f'{"collection":<13}{"profile":<11}{"find":<24}{"aggregate":<24}')
+        for name in COLLECTIONS:
+            for profile in (None, 'analytics'):
+                collection = get_collection(name, read_profile=profile)
+                find = served_by(collection.find({}).limit(10))
+                aggregate = served_by(collection.aggregate([{'$limit': 10}]))
+                print(f'{name:<13}{profile or "default":<11}{find:<24}{aggregate:<24}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,45 @@
 #!/usr/bin/env python3
 """
 Database setup script to create indexes and initial data
+
+Indexes are declared by the models (app/utils/indexes.py). Undeclared
+indexes are only reported unless --drop-stale is given; --dry-run shows
+what would change without touching the database.
 """
 
 from app import create_app
 from app.config import config
-from app.utils.db import init_db, create_indexes
+from app.utils.indexes import sync_model_indexes
+import argparse
 import os
 
-def setup_database():
+def setup_database(drop_stale=False, dry_run=False):
     """Setup database with indexes"""
     config_name = os.environ.get('FLASK_ENV', 'development')
     app = create_app(config[config_name])
     
     with app.app_context():
-        print('Setting up database indexes...')
-        if create_indexes():
-            print('✅ Database indexes created successfully!')
+        print('Syncing database indexes...' + (' (dry run)' if dry_run else ''))
+        report = sync_model_indexes(drop_stale=drop_stale, dry_run=dry_run)
+        for action in ('created', 'dropped', 'stale'):
+            for label in report[action]:
+                print(f'  {action:<8} {label}')
+        print(f'  {len(report["unchanged"])} index(es) already up to date')
+        
+        if report['errors']:
+            print('⚠️ Some indexes failed: ' + ', '.join(report['errors']))
+        elif dry_run:
+            print('✅ Dry run complete, nothing was changed')
         else:
-            print('⚠️ Some indexes may have failed to create')
+            print('✅ Database indexes are in sync!')
+        if report['stale'] and not drop_stale:
+            print('ℹ️ Re-run with --drop-stale to drop the stale indexes')
         
         print(f'✅ Database setup complete for: {app.config["MONGO_URI"]}')
 
 if __name__ == '__main__':
-    setup_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Sync MongoDB indexes with the model declarations')
+    parser.add_argument('--drop-stale', action='store_true', help='drop indexes no model declares')
+    parser.add_argument('--dry-run', action='store_true', help='only report what would change')
+    args = parser.parse_args()
+    setup_database(drop_stale=args.drop_stale, dry_run=args.dry_run)
@@ -17,3 +17,47 @@ def _add_project_root_to_syspath():
 
 
 _add_project_root_to_syspath()
+
+
+import pytest
+
+from app.config import TestingConfig
+
+
+class MockDBTestingConfig(TestingConfig):
+    USE_MOCK_DB = True
+    RATE_LIMIT_ENABLED = False
+
+
+@pytest.fixture(scope='session')
+def app():
+    """App backed by the mock database, seeded once per test session."""
+    from app import create_app
+    from app.utils.db import get_db
+    from scripts.seed_db import seed
+
+    app = create_app(MockDBTestingConfig)
+    seed(app)
+    get_db().snapshot('seeded')
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """Test client on a freshly restored copy of the seeded data."""
+    from app.utils.cache import get_user_cache, init_token_versions
+    from app.utils.db import get_db
+
+    get_db().restore('seeded')
+    get_user_cache().clear()
+    init_token_versions(app)
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Authorization header for a seeded user."""
+    resp = client.post('/api/auth/login', json={
+        'email': 'abla.benslimane@exemple.com', 'password': 'Passw0rd!'
+    })
+    return {'Authorization': f"Bearer {resp.get_json()['tokens']['access_token']}"}
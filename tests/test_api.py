@@ -0,0 +1,193 @@
+def _task_titles(client, headers):
+    return [task['title'] for task in client.get('/api/tasks', headers=headers).get_json()['data']]
+
+
+def test_login_with_seeded_user(client):
+    resp = client.post('/api/auth/login', json={
+        'email': 'abla.benslimane@exemple.com', 'password': 'Passw0rd!'
+    })
+
+    assert resp.status_code == 200
+    assert resp.get_json()['data']['full_name'] == 'Abla Benslimane'
+
+
+def test_created_task_is_listed(client, auth_headers):
+    resp = client.post('/api/tasks', headers=auth_headers, json={
+        'title': 'Relancer le client', 'assignee': 'AB', 'due_date': '2024-05-01', 'priority': 'high'
+    })
+
+    assert resp.status_code == 201
+    assert 'Relancer le client' in _task_titles(client, auth_headers)
+
+
+def test_seeded_state_is_restored_between_tests(client, auth_headers):
+    titles = _task_titles(client, auth_headers)
+    assert titles
+    assert 'Relancer le client' not in titles
+
+
+def test_readiness_is_public(client):
+    resp = client.get('/api/health/ready')
+
+    assert resp.status_code == 200
+    assert resp.get_json()['data']['backend'] == 'mock'
+
+
+def test_list_fields_projection(client, auth_headers):
+    full = client.get('/api/meetings', headers=auth_headers).get_json()['data']
+    resp = client.get('/api/meetings?fields=company,date,bogus', headers=auth_headers)
+
+    data = resp.get_json()['data']
+    assert resp.status_code == 200
+    assert data == [{'company': m['company'], 'date': m['date'], 'id': m['id']} for m in full]
+    assert all(m['id'] for m in data)
+
+
+def test_notifications_and_dashboard(client, auth_headers):
+    notifications = client.get('/api/notifications?fields=title,read', headers=auth_headers).get_json()['data']
+    assert notifications and set(notifications[0]) == {'title', 'read', 'id'}
+
+    kpis = client.get('/api/dashboard/kpis', headers=auth_headers).get_json()['data']
+    assert kpis['total_meetings'] >= 1
+    assert kpis['total_notifications'] == len(notifications)
+
+
+def test_tasks_keyset_pages(client, auth_headers):
+    for day in range(1, 6):
+        client.post('/api/tasks', headers=auth_headers, json={
+            'title': f'Tâche {day}', 'assignee': 'AB', 'due_date': f'2024-05-0{day}'
+        })
+    everything = _task_titles(client, auth_headers)
+
+    titles, cursor = [], None
+    while True:
+        url = '/api/tasks?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url, headers=auth_headers).get_json()
+        assert body['count'] <= 2
+        titles += [task['title'] for task in body['data']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert titles == everything
+    assert client.get('/api/tasks?cursor=garbage', headers=auth_headers).status_code == 400
+
+
+def test_streamed_list_matches_buffered(client, auth_headers):
+    for url in ('/api/tasks', '/api/meetings?fields=company,date'):
+        buffered = client.get(url, headers=auth_headers).get_json()
+        resp = client.get(url + ('&' if '?' in url else '?') + 'stream=true', headers=auth_headers)
+
+        assert resp.is_streamed
+        assert resp.get_json() == buffered
+
+
+def test_bulk_create_and_update_tasks(client, auth_headers):
+    resp = client.post('/api/tasks/bulk', headers=auth_headers, json=[
+        {'title': 'Import 1', 'assignee': 'AB', 'due_date': '2024-06-01', 'priority': 'low'},
+        {'title': '', 'assignee': 'AB'},
+        {'title': 'Import 2', 'assignee': 'AB', 'due_date': '2024-06-02', 'priority': 'high'},
+    ])
+
+    body = resp.get_json()
+    assert resp.status_code == 207
+    assert [item['status'] for item in body['data']] == ['created', 'invalid', 'created']
+    assert 'due_date' in body['data'][1]['errors']
+    assert {'Import 1', 'Import 2'} <= set(_task_titles(client, auth_headers))
+
+    first, third = body['data'][0]['id'], body['data'][2]['id']
+    resp = client.put('/api/tasks/bulk', headers=auth_headers, json=[
+        {'id': first, 'status': 'done'},
+        {'id': 'missing', 'status': 'done'},
+        {'id': third, 'priority': 'urgent'},
+    ])
+    assert [item['status'] for item in resp.get_json()['data']] == ['updated', 'not_found', 'invalid']
+
+    tasks = {task['id']: task for task in client.get('/api/tasks', headers=auth_headers).get_json()['data']}
+    assert tasks[first]['status'] == 'done' and tasks[first]['completed_at']
+    assert tasks[third]['priority'] == 'high'
+
+    # Setting an already-done task to done again keeps its completion time
+    resp = client.put('/api/tasks/bulk', headers=auth_headers, json=[{'id': first, 'status': 'done'}])
+    assert resp.status_code == 200
+    again = {task['id']: task for task in client.get('/api/tasks', headers=auth_headers).get_json()['data']}
+    assert again[first]['completed_at'] == tasks[first]['completed_at']
+
+    assert client.post('/api/meetings/bulk', headers=auth_headers, json={}).status_code == 400
+
+
+def test_recent_activity_limits_the_finders_in_the_database(client, auth_headers, monkeypatch):
+    from app.utils.mock_db import MockCursor
+
+    client.post('/api/tasks/bulk', headers=auth_headers, json=[
+        {'title': f'Import {day}', 'assignee': 'AB', 'due_date': f'2020-01-0{day}', 'priority': 'low'}
+        for day in range(1, 8)
+    ])
+    limits = []
+    limit = MockCursor.limit
+    monkeypatch.setattr(MockCursor, 'limit', lambda self, count: limits.append(count) or limit(self, count))
+
+    activities = client.get('/api/dashboard/activity', headers=auth_headers).get_json()['data']
+    assert [count for count in limits if count] == [5, 5]
+    tasks = [activity for activity in activities if activity['type'] == 'task']
+    assert [task['due_date'] for task in tasks] == [f'2020-01-0{day}' for day in range(5, 0, -1)]
+
+
+def test_bulk_update_reports_rejected_writes(client, auth_headers, monkeypatch):
+    from pymongo.errors import BulkWriteError
+    from app.utils.mock_db import MockCollection
+
+    ids = [item['id'] for item in client.post('/api/tasks/bulk', headers=auth_headers, json=[
+        {'title': f'Import {n}', 'assignee': 'AB', 'due_date': '2024-06-01', 'priority': 'high'} for n in (1, 2)
+    ]).get_json()['data']]
+
+    def reject_first(self, requests, ordered=True):
+        raise BulkWriteError({'writeErrors': [{'index': 0, 'code': 2, 'errmsg': 'rejected'}], 'nModified': 1})
+    monkeypatch.setattr(MockCollection, 'bulk_write', reject_first)
+
+    resp = client.put('/api/tasks/bulk', headers=auth_headers, json=[
+        {'id': 'missing', 'priority': 'low'},
+        {'id': ids[0], 'priority': 'low'},
+        {'id': ids[1], 'priority': 'low'},
+    ])
+    assert resp.status_code == 207
+    assert [(item['status'], item.get('error')) for item in resp.get_json()['data']] == [
+        ('not_found', None), ('failed', 'rejected'), ('updated', None)]
+
+
+def test_internal_stats_are_admin_only(app, client, auth_headers):
+    from app.models.user import User
+
+    for path in ('/api/health/db', '/api/health/cache', '/api/health/password-pool', '/api/health/write-behind'):
+        assert client.get(path, headers=auth_headers).status_code == 403
+
+    with app.test_request_context():
+        user = User.find_by_email('abla.benslimane@exemple.com')
+        user.update(user.id, {'role': 'admin'})
+    assert client.get('/api/health/cache', headers=auth_headers).status_code == 200
+
+
+def test_dashboard_counts_match_the_finders(app, client, auth_headers):
+    from app.models.meeting import Meeting
+    from app.models.notification import Notification
+    from app.models.task import Task
+    from app.models.user import User
+    from app.utils.db import get_collection
+
+    with app.test_request_context():
+        user_id = User.find_by_email('abla.benslimane@exemple.com').id
+        # An overdue task, and one without a due date that is never overdue
+        get_collection('tasks').insert_many([
+            {'user_id': user_id, 'title': 'En retard', 'status': 'todo', 'due_date': '2020-01-01'},
+            {'user_id': user_id, 'title': 'Sans date', 'status': 'todo', 'due_date': None}
+        ])
+    kpis = client.get('/api/dashboard/kpis', headers=auth_headers).get_json()['data']
+
+    with app.test_request_context():
+        assert kpis['total_meetings'] == len(Meeting.find_by_user(user_id))
+        assert kpis['today_meetings'] == len(Meeting.find_today(user_id))
+        assert kpis['upcoming_meetings'] == len(Meeting.find_upcoming(user_id))
+        assert kpis['total_tasks'] == len(Task.find_by_user(user_id))
+        assert kpis['done_tasks'] == len(Task.find_by_user(user_id, status='done'))
+        assert kpis['overdue_tasks'] == len(Task.find_overdue(user_id)) >= 1
+        assert kpis['unread_notifications'] == Notification.count_unread(user_id)
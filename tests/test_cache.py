@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from app.utils import cache as cache_module
+from app.utils.cache import TTLCache, TokenVersionMap, get_user_cache
+from app.utils.db import get_collection
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+
+    clock.now = 11
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (2, 2, 1, 1)
+    assert stats['size'] == 1
+
+
+def test_token_version_map_fetches_recent_revocations_incrementally(app, client, monkeypatch):
+    clock, wall = FakeClock(), [datetime(2024, 6, 1, 12, 0)]
+    versions = TokenVersionMap(refresh_interval=5, window=900, overlap=60, clock=clock, now=lambda: wall[0])
+    queries = []
+
+    def recording_collection(name):
+        collection = get_collection(name)
+        return type('Recorder', (), {'find': lambda self, query, *args: queries.append(query) or collection.find(query, *args)})()
+    monkeypatch.setattr(cache_module, 'get_collection', recording_collection)
+
+    with app.app_context():
+        users = get_collection('users')
+        users.insert_many([
+            {'_id': 'old', 'email': 'old@exemple.com', 'token_version': 3, 'tokens_revoked_at': wall[0] - timedelta(hours=2)},
+            {'_id': 'recent', 'email': 'recent@exemple.com', 'token_version': 2, 'tokens_revoked_at': wall[0] - timedelta(minutes=1)},
+        ])
+        assert (versions.current('old'), versions.current('recent')) == (0, 2)
+
+        users.insert_one({'_id': 'new', 'email': 'new@exemple.com', 'token_version': 1, 'tokens_revoked_at': wall[0] + timedelta(seconds=4)})
+        clock.now, wall[0] = 5, wall[0] + timedelta(seconds=5)
+        assert (versions.current('new'), versions.current('recent')) == (1, 2)
+        # The second fetch only asked for what changed since the first one
+        assert queries[1]['tokens_revoked_at']['$gte'] == datetime(2024, 6, 1, 11, 59)
+
+        # Once the tokens they revoked have expired, revocations are dropped
+        clock.now, wall[0] = 10, wall[0] + timedelta(minutes=15)
+        assert (versions.current('new'), versions.current('recent')) == (1, 0)
+        assert versions.stats()['reloads'] == 3 and versions.stats()['size'] == 1
+
+
+def test_auth_middleware_caches_principal_without_password(client, auth_headers):
+    cache = get_user_cache()
+    misses = cache.stats()['misses']
+    for _ in range(3):
+        assert client.get('/api/auth/me', headers=auth_headers).status_code == 200
+    stats = cache.stats()
+    assert stats['misses'] == misses + 1 and stats['hits'] >= 2
+    assert all(principal.password is None for principal, _ in cache._entries.values())
+
+
+def test_principal_copies_do_not_share_preferences(app, client, auth_headers):
+    from app.models.user import User
+
+    with app.test_request_context():
+        user_id = User.find_by_email('abla.benslimane@exemple.com').id
+        principal = User.find_principal(user_id)
+        principal.preferences['theme'] = 'changed'
+        assert User.find_principal(user_id).preferences.get('theme') != 'changed'
+
+        payload = {'user_id': user_id, 'preferences': {'theme': 'dark'}}
+        User.from_claims(payload).preferences['theme'] = 'changed'
+        assert payload['preferences'] == {'theme': 'dark'}
+
+
+def test_profile_and_password_changes_reach_the_cache(client, auth_headers):
+    assert client.get('/api/auth/me', headers=auth_headers).status_code == 200
+    resp = client.put('/api/settings', json={'full_name': 'Abla Merad'}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert client.get('/api/auth/me', headers=auth_headers).get_json()['data']['full_name'] == 'Abla Merad'
+
+    resp = client.put('/api/auth/password', headers=auth_headers, json={
+        'current_password': 'Passw0rd!', 'new_password': 'N0uveau!Passw0rd'})
+    assert resp.status_code == 200
+    assert client.post('/api/auth/login', json={
+        'email': 'abla.benslimane@exemple.com', 'password': 'N0uveau!Passw0rd'}).status_code == 200
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from app.utils import db
+
+
+@pytest.fixture
+def mongo_settings(monkeypatch):
+    monkeypatch.setattr(db, '_mongo_settings', {
+        'uri': 'mongodb://localhost:27017/followup_test_db',
+        'db_name': 'followup_test_db',
+        'options': db._client_options({'MONGO_MAX_POOL_SIZE': 8, 'MONGO_WAIT_QUEUE_TIMEOUT_MS': 250,
+                                       'MONGO_SERVER_SELECTION_TIMEOUT_MS': 50}),
+    })
+    yield
+    db.close_db()
+
+
+def test_client_options_from_config():
+    options = db._client_options({'MONGO_MAX_POOL_SIZE': 20, 'MONGO_MAX_IDLE_TIME_MS': 60000,
+                                  'MONGO_COMPRESSORS': 'zstd,snappy'})
+
+    assert options['maxPoolSize'] == 20
+    assert options['maxIdleTimeMS'] == 60000
+    assert options['compressors'] == 'zstd,snappy'
+    assert 'waitQueueTimeoutMS' not in options
+
+
+def test_client_is_created_lazily_per_process(mongo_settings, monkeypatch):
+    client = db._get_client()
+    assert db._get_client() is client
+    assert client.options.pool_options.max_pool_size == 8
+
+    monkeypatch.setattr(db.os, 'getpid', lambda: -1)
+    forked = db._get_client()
+    assert forked is not client
+    assert db.get_pool_stats()['pid'] == -1
+    client.close()
+
+
+def test_pool_listener_tracks_checkouts_and_waits():
+    listener = db.PoolStatsListener()
+    listener.connection_created(None)
+    listener.connection_check_out_started(None)
+    listener.connection_checked_out(None)
+    listener.connection_check_out_started(None)
+    assert listener.snapshot()['waiting'] == 1
+
+    listener.connection_check_out_failed(None)
+    stats = listener.snapshot()
+    assert (stats['connections'], stats['checked_out'], stats['waiting']) == (1, 1, 0)
+    assert (stats['checkouts'], stats['checkout_failures']) == (1, 1)
+    listener.connection_checked_in(None)
+    assert listener.snapshot()['checked_out'] == 0
+
+
+def test_lazy_connect_reports_readiness_separately():
+    from app import create_app
+    from app.config import TestingConfig
+
+    class LazyConfig(TestingConfig):
+        MONGO_URI = 'mongodb://127.0.0.1:1/followup_test_db'
+        MONGO_LAZY_CONNECT = True
+        MONGO_SERVER_SELECTION_TIMEOUT_MS = 50
+        MONGO_PROBE_INTERVAL_S = 0.05
+        RATE_LIMIT_ENABLED = False
+
+    class MockConfig(TestingConfig):
+        USE_MOCK_DB = True
+        RATE_LIMIT_ENABLED = False
+
+    app = create_app(LazyConfig)
+    assert db._mongo_settings['db_name'] == 'followup_test_db'
+    # Nothing connects (or starts a thread) while the app is created
+    assert db._db_client is None and db._probe_pid is None
+
+    resp = app.test_client().get('/api/health/ready')
+    assert resp.status_code == 503
+    assert resp.get_json()['status'] in ('starting', 'unavailable')
+    assert db._probe_pid == os.getpid()
+
+    # A mock app created afterwards starts from a clean state
+    create_app(MockConfig)
+    assert (db._mongo_settings, db._db_client, db._probe_pid) == (None, None, None)
+    assert db.get_readiness()['backend'] == 'mock'
+
+
+def test_read_profiles_from_config():
+    profiles = db._read_profiles({'MONGO_ANALYTICS_READ_PREFERENCE': 'secondaryPreferred',
+                                  'MONGO_ANALYTICS_MAX_STALENESS_S': 90,
+                                  'MONGO_ANALYTICS_READ_CONCERN': 'local',
+                                  'MONGO_REPORTS_READ_PREFERENCE': 'nearest',
+                                  'MONGO_URI': 'mongodb://localhost'})
+
+    assert set(profiles) == {'analytics', 'reports'}
+    preference = profiles['analytics']['read_preference']
+    assert (preference.mongos_mode, preference.max_staleness) == ('secondaryPreferred', 90)
+    assert profiles['analytics']['read_concern'].level == 'local'
+    assert profiles['reports']['read_preference'].max_staleness == -1
+    assert 'read_concern' not in profiles['reports']
+
+
+def test_analytics_reads_use_read_profile(app, monkeypatch):
+    from app.utils.mock_db import MockCollection
+
+    calls = []
+    monkeypatch.setattr(MockCollection, 'with_options',
+                        lambda self, **kwargs: calls.append((self.name, kwargs)) or self)
+    with app.app_context():
+        db.get_collection('meetings')
+        assert calls == []
+
+        db.get_collection('kpi_metrics', read_profile='analytics')
+        with db.read_profile('analytics'):
+            db.get_collection('tasks')
+        assert [name for name, _ in calls] == ['kpi_metrics', 'tasks']
+        assert calls[0][1]['read_preference'].mongos_mode == 'secondaryPreferred'
+
+        with pytest.raises(ValueError):
+            db.get_collection('tasks', read_profile='unknown')
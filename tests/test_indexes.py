@@ -0,0 +1,64 @@
+import pytest
+
+from app.utils import indexes
+from app.utils.db import get_collection
+
+
+@pytest.fixture
+def registry(app, client, monkeypatch):
+    monkeypatch.setattr(indexes, '_registry', {})
+    with app.app_context():
+        get_collection('index_sync').insert_one({'user_id': 'u1', 'status': 'todo', 'due_date': '2024-01-01'})
+        yield
+
+
+def test_sync_creates_missing_and_reports_stale(registry):
+    collection = get_collection('index_sync')
+    collection.create_index('assignee')
+    indexes.register_index('index_sync', [('user_id', 1), ('status', 1), ('due_date', 1)])
+    indexes.register_index('index_sync', 'ref', unique=True, partial={'ref': {'$exists': True}})
+
+    report = indexes.sync_indexes(['index_sync'])
+    assert report['created'] == ['index_sync.user_id_1_status_1_due_date_1', 'index_sync.ref_1']
+    assert report['stale'] == ['index_sync.assignee_1']
+    info = collection.index_information()
+    assert info['ref_1']['partialFilterExpression'] == {'ref': {'$exists': True}}
+
+    report = indexes.sync_indexes(['index_sync'], drop_stale=True)
+    assert report['dropped'] == ['index_sync.assignee_1']
+    assert len(report['unchanged']) == 2
+    assert set(collection.index_information()) == {'_id_', 'user_id_1_status_1_due_date_1', 'ref_1'}
+
+
+def test_changed_definition_is_replaced_only_when_dropping(registry):
+    collection = get_collection('index_sync')
+    collection.create_index('user_id')
+    indexes.register_index('index_sync', 'user_id', unique=True)
+
+    assert indexes.sync_indexes(['index_sync'])['stale'] == ['index_sync.user_id_1']
+    assert indexes.sync_indexes(['index_sync'], dry_run=True, drop_stale=True)['created'] == ['index_sync.user_id_1']
+    assert not collection.index_information()['user_id_1'].get('unique')
+
+    report = indexes.sync_indexes(['index_sync'], drop_stale=True)
+    assert (report['dropped'], report['created']) == (['index_sync.user_id_1'], ['index_sync.user_id_1'])
+    assert collection.index_information()['user_id_1']['unique'] is True
+
+
+def test_kpi_writers_upsert_on_the_unique_index(app, client):
+    from app.models.kpi import KPIMetric, create_kpi_indexes
+
+    with app.app_context():
+        assert create_kpi_indexes()
+        metrics = get_collection('kpi_metrics')
+        first = KPIMetric('kpi-user', '2024-03-01', {'tasks_completed': 1})
+        first.create_if_missing()
+        KPIMetric('kpi-user', '2024-03-01', {'tasks_completed': 5}).create_if_missing()
+        assert metrics.count_documents({'user_id': 'kpi-user'}) == 1
+        assert metrics.find_one({'user_id': 'kpi-user'})['tasks_completed'] == 1
+
+        metric_id = KPIMetric('kpi-user', '2024-03-01', {'tasks_completed': 3}).update_or_create('kpi-user')
+        stored = metrics.find_one({'user_id': 'kpi-user'})
+        assert (str(stored['_id']), stored['tasks_completed']) == (metric_id, 3)
+        assert stored['created_at'] == first.created_at
+        assert KPIMetric('kpi-user', '2024-03-02').update_or_create('kpi-user')
+        assert metrics.count_documents({'user_id': 'kpi-user'}) == 2
@@ -0,0 +1,95 @@
+import jwt
+import pytest
+
+from app.models.user import User
+
+LOGIN = {'email': 'abla.benslimane@exemple.com', 'password': 'Passw0rd!'}
+
+
+@pytest.fixture
+def claims_tokens(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'JWT_CLAIMS_TOKENS', True)
+
+
+def test_claims_token_authorizes_without_loading_the_user(app, client, claims_tokens, monkeypatch):
+    tokens = client.post('/api/auth/login', json=LOGIN).get_json()['tokens']
+    claims = jwt.decode(tokens['access_token'], options={'verify_signature': False})
+    assert (claims['role'], claims['full_name'], claims['tv']) == ('Commercial', 'Abla Benslimane', 0)
+
+    def no_lookup(cls, user_id):
+        raise AssertionError('user loaded')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(User, 'find_principal', classmethod(no_lookup))
+        resp = client.get('/api/tasks', headers={'Authorization': f"Bearer {tokens['access_token']}"})
+        assert resp.status_code == 200
+
+    me = client.get('/api/auth/me', headers={'Authorization': f"Bearer {tokens['access_token']}"}).get_json()
+    assert me['data']['email'] == LOGIN['email'] and me['data']['created_at']
+
+
+def test_role_change_revokes_claims_tokens(app, client, claims_tokens):
+    tokens = client.post('/api/auth/login', json=LOGIN).get_json()['tokens']
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+    user_id = client.get('/api/auth/me', headers=headers).get_json()['data']['user_id']
+
+    with app.test_request_context():
+        User(email='', password='', full_name='').update(user_id, {'role': 'admin'})
+        # The revoked user's document (with tokens_revoked_at) still loads
+        assert [user.id for user in User.find_by_role('admin')] == [user_id]
+
+    resp = client.get('/api/tasks', headers=headers)
+    assert resp.status_code == 401 and resp.get_json()['error'] == 'Token has been revoked'
+    resp = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert resp.status_code == 401
+
+    tokens = client.post('/api/auth/login', json=LOGIN).get_json()['tokens']
+    claims = jwt.decode(tokens['access_token'], options={'verify_signature': False})
+    assert (claims['role'], claims['tv']) == ('admin', 1)
+    assert client.get('/api/tasks', headers={'Authorization': f"Bearer {tokens['access_token']}"}).status_code == 200
+
+
+@pytest.mark.parametrize('claims', [False, True])
+def test_password_change_returns_tokens_of_the_new_version(app, client, monkeypatch, claims):
+    monkeypatch.setitem(app.config, 'JWT_CLAIMS_TOKENS', claims)
+    tokens = client.post('/api/auth/login', json=LOGIN).get_json()['tokens']
+    resp = client.put('/api/auth/password', headers={'Authorization': f"Bearer {tokens['access_token']}"},
+                      json={'current_password': LOGIN['password'], 'new_password': 'N0uveau!Passe'})
+    assert resp.status_code == 200
+    fresh = resp.get_json()['tokens']
+
+    assert client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 401
+    assert client.get('/api/auth/me', headers={'Authorization': f"Bearer {fresh['access_token']}"}).status_code == 200
+    assert client.post('/api/auth/refresh', json={'refresh_token': fresh['refresh_token']}).status_code == 200
+
+
+def test_verified_tokens_are_cached_per_secret(app, monkeypatch):
+    from app.utils import jwt_helper
+
+    with app.app_context():
+        token = jwt_helper.generate_access_token('user-1')
+        calls = []
+        decode = jwt.decode
+        monkeypatch.setattr(jwt_helper.jwt, 'decode', lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+
+        assert jwt_helper.decode_token(token)['user_id'] == 'user-1'
+        assert jwt_helper.decode_token(token, 'refresh') is None
+        assert jwt_helper.is_token_expired(token) is False
+        assert jwt_helper.get_token_expiry(token) > 0
+        assert len(calls) == 1
+
+        assert jwt_helper.decode_token(token[:-2] + 'xx') is None
+
+        user = User(email='a@exemple.com', password='', full_name='A', preferences={'notifications': {'email': True}})
+        monkeypatch.setitem(app.config, 'JWT_CLAIMS_TOKENS', True)
+        token = jwt_helper.generate_access_token('user-1', user)
+        for _ in range(2):
+            payload = jwt_helper.decode_token(token)
+            payload['role'] = 'admin'
+            User.from_claims(payload).preferences['notifications']['email'] = False
+        payload = jwt_helper.decode_token(token)
+        assert (payload['role'], payload['preferences']) == ('user', {'notifications': {'email': True}})
+
+        monkeypatch.setitem(app.config, 'JWT_SECRET_KEY', 'rotated-secret')
+        assert jwt_helper.decode_token(token) is None
+        assert jwt_helper.is_token_expired(token) is True
@@ -0,0 +1,444 @@
+import re
+import threading
+
+import pytest
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from app.utils.mock_db import MockDatabase
+
+
+@pytest.fixture
+def db():
+    return MockDatabase()
+
+
+def test_index_serves_equality_and_range_queries(db):
+    tasks = db['tasks']
+    tasks.create_index('user_id')
+    tasks.create_index('due_date')
+    for i in range(20):
+        tasks.insert_one({'user_id': f'u{i % 2}', 'due_date': f'2024-01-{i + 1:02d}'})
+
+    assert len(list(tasks.find({'user_id': 'u1'}))) == 10
+    in_range = list(tasks.find({'due_date': {'$gte': '2024-01-05', '$lt': '2024-01-08'}}))
+    assert sorted(doc['due_date'] for doc in in_range) == ['2024-01-05', '2024-01-06', '2024-01-07']
+
+
+def test_index_kept_in_sync_on_update_and_delete(db):
+    tasks = db['tasks']
+    tasks.create_index('status')
+    result = tasks.insert_one({'status': 'todo'})
+
+    tasks.update_one({'_id': result.inserted_id}, {'$set': {'status': 'done'}})
+    assert tasks.find_one({'status': 'todo'}) is None
+    assert tasks.find_one({'status': 'done'})['_id'] == result.inserted_id
+
+    tasks.delete_one({'_id': result.inserted_id})
+    assert tasks.find_one({'status': 'done'}) is None
+
+
+def test_index_built_over_existing_documents(db):
+    meetings = db['meetings']
+    meetings.insert_one({'user_id': 'u1', 'date': '2024-03-01'})
+    meetings.create_index('user_id')
+
+    assert meetings.find_one({'user_id': 'u1'})['date'] == '2024-03-01'
+
+
+def test_unique_index_rejects_duplicates(db):
+    users = db['users']
+    users.create_index('email', unique=True)
+    users.insert_one({'email': 'a@example.com'})
+    other = users.insert_one({'email': 'b@example.com'})
+
+    with pytest.raises(DuplicateKeyError):
+        users.insert_one({'email': 'a@example.com'})
+    with pytest.raises(DuplicateKeyError):
+        users.update_one({'_id': other.inserted_id}, {'$set': {'email': 'a@example.com'}})
+    assert users.find_one({'_id': other.inserted_id})['email'] == 'b@example.com'
+
+
+def test_id_lookups_survive_deletes_and_compaction(db):
+    notifications = db['notifications']
+    ids = [notifications.insert_one({'n': i}).inserted_id for i in range(3000)]
+
+    for doc_id in ids[:2000]:
+        assert notifications.delete_one({'_id': doc_id}).deleted_count == 1
+    assert notifications.delete_one({'_id': ids[0]}).deleted_count == 0
+
+    assert notifications.find_one({'_id': ids[2500]})['n'] == 2500
+    notifications.update_one({'_id': ids[2999]}, {'$set': {'n': -1}})
+    assert notifications.find_one({'_id': ids[2999]})['n'] == -1
+    assert len(list(notifications.find({}))) == 1000
+
+
+def test_duplicate_id_is_rejected(db):
+    users = db['users']
+    users.insert_one({'_id': 'fixed'})
+
+    with pytest.raises(DuplicateKeyError):
+        users.insert_one({'_id': 'fixed'})
+
+
+@pytest.fixture
+def tasks(db):
+    tasks = db['tasks']
+    tasks.insert_one({'_id': 't1', 'status': 'todo', 'priority': 'high', 'tags': ['sales'], 'due_date': '2024-01-01'})
+    tasks.insert_one({'_id': 't2', 'status': 'done', 'priority': 'low', 'tags': [], 'due_date': '2024-02-01'})
+    tasks.insert_one({'_id': 't3', 'status': 'inprogress', 'priority': 'medium', 'assignee': 'RN'})
+    return tasks
+
+
+def _ids(cursor):
+    return sorted(doc['_id'] for doc in cursor)
+
+
+@pytest.mark.parametrize('query, expected', [
+    ({'status': {'$in': ['todo', 'done']}}, ['t1', 't2']),
+    ({'status': {'$nin': ['todo', 'done']}}, ['t3']),
+    ({'due_date': {'$gt': '2024-01-01'}}, ['t2']),
+    ({'due_date': {'$lte': '2024-02-01'}}, ['t1', 't2']),
+    ({'assignee': {'$exists': True}}, ['t3']),
+    ({'assignee': None}, ['t1', 't2']),
+    ({'tags': 'sales'}, ['t1']),
+    ({'priority': {'$regex': '^h'}}, ['t1']),
+    ({'priority': re.compile('^M', re.IGNORECASE)}, ['t3']),
+    ({'$or': [{'status': 'done'}, {'priority': 'high'}]}, ['t1', 't2']),
+    ({'$and': [{'status': {'$ne': 'done'}}, {'priority': {'$ne': 'high'}}]}, ['t3']),
+    ({'_id': {'$in': ['t1', 't3', 'missing']}}, ['t1', 't3']),
+])
+def test_query_operators(tasks, query, expected):
+    assert _ids(tasks.find(query)) == expected
+
+
+def test_unknown_operator_is_rejected(tasks):
+    with pytest.raises(OperationFailure):
+        list(tasks.find({'$where': 'this.status == "todo"'}))
+
+
+def test_text_search_matches_terms_only(db):
+    meetings = db['meetings']
+    meetings.insert_one({'_id': 'm1', 'company': 'Axians Industrie', 'subject': 'Réunion de projet'})
+    meetings.insert_one({'_id': 'm2', 'company': 'Prospect Tech', 'subject': 'Démonstration'})
+
+    assert _ids(meetings.find({'$text': {'$search': 'reunion'}})) == ['m1']
+    assert _ids(meetings.find({'$text': {'$search': 'tech axians -projet'}})) == ['m2']
+
+
+def test_cursor_sort_skip_limit_and_projection(db):
+    notifications = db['notifications']
+    for i in range(10):
+        notifications.insert_one({'_id': f'n{i}', 'user_id': 'u1', 'created_at': i, 'read': i % 3 == 0})
+
+    page = list(notifications.find({'user_id': 'u1'}, {'created_at': 1}).sort('created_at', -1).skip(2).limit(3))
+    assert page == [{'_id': 'n7', 'created_at': 7}, {'_id': 'n6', 'created_at': 6}, {'_id': 'n5', 'created_at': 5}]
+
+    ordered = notifications.find({}).sort([('read', 1), ('created_at', -1)])
+    assert [doc['_id'] for doc in ordered][:3] == ['n8', 'n7', 'n5']
+
+
+def test_cursor_results_are_private_copies(db):
+    meetings = db['meetings']
+    meetings.insert_one({'_id': 'm1', 'status': 'scheduled'})
+
+    doc = next(meetings.find({'_id': 'm1'}))
+    doc['status'] = 'cancelled'
+    assert meetings.find_one({'_id': 'm1'})['status'] == 'scheduled'
+
+
+def test_count_update_many_and_delete_many(db):
+    notifications = db['notifications']
+    notifications.create_index('user_id')
+    for i in range(6):
+        notifications.insert_one({'user_id': 'u1' if i < 4 else 'u2', 'read': i % 2 == 0})
+
+    assert notifications.count_documents({'user_id': 'u1', 'read': False}) == 2
+    result = notifications.update_many({'user_id': 'u1', 'read': False}, {'$set': {'read': True}})
+    assert (result.matched_count, result.modified_count) == (2, 2)
+    assert notifications.count_documents({'user_id': 'u1', 'read': False}) == 0
+
+    assert notifications.delete_many({'user_id': 'u1', 'read': True}).deleted_count == 4
+    assert notifications.count_documents({}) == 2
+
+
+def test_aggregate_group_sort_project(db):
+    kpis = db['kpi_metrics']
+    kpis.create_index('user_id')
+    for date, scheduled, completed in [('2024-01-02', 1, 2), ('2024-01-01', 3, 0), ('2024-01-02', 1, 1)]:
+        kpis.insert_one({'user_id': 'u1', 'date': date,
+                         'meetings_scheduled': scheduled, 'meetings_completed': completed})
+    kpis.insert_one({'user_id': 'u2', 'date': '2024-01-01', 'meetings_scheduled': 9, 'meetings_completed': 9})
+
+    result = list(kpis.aggregate([
+        {'$match': {'user_id': 'u1', 'date': {'$gte': '2024-01-01', '$lte': '2024-01-07'}}},
+        {'$group': {'_id': '$date',
+                    'meetings_scheduled': {'$sum': '$meetings_scheduled'},
+                    'meetings_completed': {'$sum': '$meetings_completed'}}},
+        {'$sort': {'_id': 1}},
+        {'$project': {'_id': 0, 'date': '$_id',
+                      'meetings': {'$add': ['$meetings_scheduled', '$meetings_completed']}}},
+    ]))
+    assert result == [{'date': '2024-01-01', 'meetings': 3}, {'date': '2024-01-02', 'meetings': 5}]
+
+
+def test_aggregate_push_omits_missing_fields(db):
+    tasks = db['tasks']
+    tasks.insert_one({'_id': 't1', 'user_id': 'u1', 'status': 'todo', 'title': 'A'})
+    tasks.insert_one({'_id': 't2', 'user_id': 'u1', 'status': 'todo', 'title': 'B', 'tags': ['x']})
+
+    (group,) = tasks.aggregate([
+        {'$match': {'user_id': 'u1'}},
+        {'$group': {'_id': '$status', 'tasks': {'$push': {'id': '$_id', 'tags': '$tags'}}, 'count': {'$sum': 1}}},
+    ])
+    assert group == {'_id': 'todo', 'tasks': [{'id': 't1'}, {'id': 't2', 'tags': ['x']}], 'count': 2}
+
+
+def test_aggregate_unwind_facet_count_and_top_k(db):
+    meetings = db['meetings']
+    meetings.insert_one({'_id': 'm1', 'tags': ['a', 'b'], 'duration': 30})
+    meetings.insert_one({'_id': 'm2', 'tags': ['b'], 'duration': 90})
+    meetings.insert_one({'_id': 'm3', 'tags': [], 'duration': 60})
+
+    (facets,) = meetings.aggregate([{'$facet': {
+        'by_tag': [{'$unwind': '$tags'}, {'$group': {'_id': '$tags', 'n': {'$sum': 1}}}, {'$sort': {'n': -1, '_id': 1}}],
+        'longest': [{'$sort': {'duration': -1}}, {'$limit': 1}, {'$project': {'duration': 1}}],
+        'total': [{'$count': 'meetings'}],
+    }}])
+    assert facets == {
+        'by_tag': [{'_id': 'b', 'n': 2}, {'_id': 'a', 'n': 1}],
+        'longest': [{'_id': 'm2', 'duration': 90}],
+        'total': [{'meetings': 3}],
+    }
+
+
+def test_view_mode_returns_read_only_snapshots(db):
+    db.set_read_mode('view')
+    meetings = db['meetings']
+    meetings.insert_one({'_id': 'm1', 'status': 'scheduled'})
+
+    doc = meetings.find_one({'_id': 'm1'})
+    with pytest.raises(TypeError):
+        doc['status'] = 'cancelled'
+
+    meetings.update_one({'_id': 'm1'}, {'$set': {'status': 'completed'}})
+    assert doc['status'] == 'scheduled'
+    assert meetings.find_one({'_id': 'm1'})['status'] == 'completed'
+
+    private = doc.copy()
+    private['status'] = 'cancelled'
+    assert meetings.find_one({'_id': 'm1'})['status'] == 'completed'
+
+
+def test_nested_values_are_never_shared_with_the_stored_document(db):
+    meetings = db['meetings']
+    tags = ['a']
+    meetings.insert_one({'_id': 'm1', 'tags': tags, 'notes': {'items': []}})
+    tags.append('caller')
+
+    copied = meetings.find_one({'_id': 'm1'})
+    copied['tags'].append('LEAK')
+    copied['notes']['items'].append('LEAK')
+    assert meetings.find_one({'_id': 'm1'}, {'tags': 1})['tags'] == ['a']
+
+    db.set_read_mode('view')
+    view = meetings.find_one({'_id': 'm1'})
+    with pytest.raises(TypeError):
+        view['tags'].append('LEAK')
+    with pytest.raises(TypeError):
+        view['notes']['items'].append('LEAK')
+    private = view.copy()
+    private['notes']['items'].append('mine')
+    assert meetings.find_one({'_id': 'm1'}) == {'_id': 'm1', 'tags': ['a'], 'notes': {'items': []}}
+
+    grouped = next(meetings.aggregate([{'$group': {'_id': None, 'tags': {'$push': '$tags'}}}]))
+    with pytest.raises(TypeError):
+        grouped['tags'][0].append('LEAK')
+
+
+def test_concurrent_writers_and_readers_stay_consistent(db):
+    tasks = db['tasks']
+    tasks.create_index('user_id')
+    errors = []
+
+    def writer(worker):
+        try:
+            for i in range(300):
+                result = tasks.insert_one({'user_id': f'u{worker}', 'n': i})
+                if i % 2:
+                    tasks.delete_one({'_id': result.inserted_id})
+                else:
+                    tasks.update_one({'_id': result.inserted_id}, {'$set': {'n': -i}})
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    def reader():
+        try:
+            for _ in range(100):
+                for doc in tasks.find({'user_id': 'u0'}).sort('n', 1):
+                    assert doc['user_id'] == 'u0'
+                tasks.count_documents({})
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert tasks.count_documents({}) == 4 * 150
+    assert tasks.count_documents({'user_id': 'u3'}) == 150
+    assert all(doc['n'] <= 0 for doc in tasks.find({}))
+
+
+def test_snapshot_is_isolated_from_nested_mutations(db):
+    meetings = db['meetings']
+    meetings.insert_one({'_id': 'm1', 'tags': ['a']})
+    db.snapshot('seeded')
+
+    meetings.find_one({'_id': 'm1'})['tags'].append('LEAK')
+    meetings.update_one({'_id': 'm1'}, {'$push': {'tags': 'b'}})
+    db.restore('seeded')
+    assert meetings.find_one({'_id': 'm1'})['tags'] == ['a']
+
+    db.set_read_mode('view')
+    with pytest.raises(TypeError):
+        meetings.find_one({'_id': 'm1'})['tags'].append('LEAK')
+    db.restore('seeded')
+    assert meetings.find_one({'_id': 'm1'})['tags'] == ['a']
+
+
+def test_snapshot_restore_is_copy_on_write(db):
+    tasks = db['tasks']
+    tasks.create_index('status')
+    tasks.insert_one({'_id': 't1', 'status': 'todo'})
+    db.snapshot('seeded')
+
+    tasks.update_one({'_id': 't1'}, {'$set': {'status': 'done'}})
+    tasks.insert_one({'_id': 't2', 'status': 'todo'})
+    db['meetings'].insert_one({'_id': 'm1'})
+    db.restore('seeded')
+
+    assert _ids(tasks.find({'status': 'todo'})) == ['t1']
+    assert tasks.find_one({'status': 'done'}) is None
+    assert db['meetings'].count_documents({}) == 0
+
+    tasks.delete_one({'_id': 't1'})
+    db.restore('seeded')
+    assert _ids(tasks.find({'status': 'todo'})) == ['t1']
+
+    with pytest.raises(KeyError):
+        db.restore('missing')
+
+
+def test_text_index_search_scores_and_phrases(db):
+    meetings = db['meetings']
+    meetings.create_index([('company', 'text'), ('contact', 'text'), ('subject', 'text')])
+    meetings.insert_one({'_id': 'm1', 'user_id': 'u1', 'company': 'Axians Industrie', 'subject': 'Réunion de projet'})
+    meetings.insert_one({'_id': 'm2', 'user_id': 'u1', 'company': 'Prospect', 'subject': 'Réunion réunion annuelle'})
+    meetings.insert_one({'_id': 'm3', 'user_id': 'u2', 'company': 'Axians', 'subject': 'Démonstration',
+                         'notes': 'réunion'})
+
+    assert _ids(meetings.find({'$text': {'$search': 'REUNION'}})) == ['m1', 'm2']
+    assert _ids(meetings.find({'user_id': 'u1', '$text': {'$search': 'axians'}})) == ['m1']
+    assert _ids(meetings.find({'$text': {'$search': '"réunion de projet"'}})) == ['m1']
+    assert _ids(meetings.find({'$text': {'$search': 'axians -demonstration'}})) == ['m1']
+
+    ranked = meetings.find({'$text': {'$search': 'reunion'}}, {'score': {'$meta': 'textScore'}})
+    ranked = list(ranked.sort([('score', {'$meta': 'textScore'})]))
+    assert [doc['_id'] for doc in ranked] == ['m2', 'm1']
+    assert ranked[0]['score'] > ranked[1]['score'] > 0
+
+    meetings.update_one({'_id': 'm2'}, {'$set': {'subject': 'Bilan'}})
+    meetings.delete_one({'_id': 'm1'})
+    assert list(meetings.find({'$text': {'$search': 'reunion'}})) == []
+    assert meetings.count_documents({'$text': {'$search': 'bilan'}}) == 1
+
+
+def test_update_operators(db):
+    sessions = db['ai_chat']
+    sessions.insert_one({'_id': 's1', 'turns': 1, 'tags': ['a'], 'messages': [{'role': 'user', 'n': 1}],
+                         'meta': {'model': 'x', 'lang': 'fr'}})
+
+    result = sessions.update_one({'_id': 's1'}, {
+        '$inc': {'turns': 2, 'stats.tokens': 10},
+        '$push': {'messages': {'$each': [{'role': 'ai', 'n': 2}, {'role': 'user', 'n': 3}], '$slice': -2}},
+        '$addToSet': {'tags': {'$each': ['a', 'b']}},
+        '$unset': {'meta.model': ''},
+        '$setOnInsert': {'created': True},
+    })
+    assert (result.matched_count, result.modified_count, result.upserted_id) == (1, 1, None)
+    assert sessions.find_one({'_id': 's1'}) == {
+        '_id': 's1', 'turns': 3, 'stats': {'tokens': 10}, 'tags': ['a', 'b'],
+        'messages': [{'role': 'ai', 'n': 2}, {'role': 'user', 'n': 3}], 'meta': {'lang': 'fr'},
+    }
+
+    sessions.update_one({'_id': 's1'}, {'$pull': {'messages': {'role': 'user'}, 'tags': 'a'}})
+    assert sessions.find_one({'_id': 's1'}, {'messages': 1, 'tags': 1}) == {
+        '_id': 's1', 'messages': [{'role': 'ai', 'n': 2}], 'tags': ['b']}
+    assert sessions.update_one({'_id': 's1'}, {'$set': {'turns': 3}}).modified_count == 0
+
+    with pytest.raises(OperationFailure):
+        sessions.update_one({'_id': 's1'}, {'$inc': {'tags': 1}})
+    with pytest.raises(ValueError):
+        sessions.update_one({'_id': 's1'}, {'turns': 4})
+
+
+def test_upsert_inserts_from_query_and_set_on_insert(db):
+    sessions = db['ai_chat']
+    sessions.create_index('session_id')
+
+    result = sessions.update_one({'session_id': 'abc', 'user_id': 'u1'},
+                                 {'$set': {'messages': []}, '$setOnInsert': {'turns': 0}}, upsert=True)
+    assert result.matched_count == 0 and result.upserted_id is not None
+    doc = sessions.find_one({'session_id': 'abc'})
+    assert doc == {'_id': result.upserted_id, 'session_id': 'abc', 'user_id': 'u1', 'messages': [], 'turns': 0}
+
+    again = sessions.update_one({'session_id': 'abc', 'user_id': 'u1'},
+                                {'$push': {'messages': 'hi'}, '$setOnInsert': {'turns': 5}}, upsert=True)
+    assert (again.matched_count, again.modified_count, again.upserted_id) == (1, 1, None)
+    assert sessions.find_one({'session_id': 'abc'})['turns'] == 0
+
+
+def test_insert_many_and_bulk_write():
+    collection = MockDatabase()['bulk']
+    collection.create_index('code', unique=True)
+    documents = [{'code': 1}, {'code': 1}, {'code': 2}]
+    with pytest.raises(BulkWriteError) as failure:
+        collection.insert_many(documents, ordered=False)
+    assert [error['index'] for error in failure.value.details['writeErrors']] == [1]
+    assert failure.value.details['nInserted'] == 2
+    assert all('_id' in document for document in documents)
+
+    result = collection.bulk_write([
+        UpdateOne({'code': 1}, {'$set': {'seen': True}}),
+        UpdateOne({'code': 3}, {'$set': {'seen': False}}, upsert=True),
+        InsertOne({'code': 4}),
+        DeleteOne({'code': 2}),
+    ])
+    assert (result.matched_count, result.modified_count, result.inserted_count, result.deleted_count) == (1, 1, 1, 1)
+    assert list(result.upserted_ids) == [1]
+    assert sorted(doc['code'] for doc in collection.find()) == [1, 3, 4]
+
+    with pytest.raises(BulkWriteError) as failure:
+        collection.bulk_write([InsertOne({'code': 1}), InsertOne({'code': 5})], ordered=True)
+    assert failure.value.details['nInserted'] == 0
+    assert collection.count_documents({'code': 5}) == 0
+
+
+def test_unordered_bulk_write_reports_bad_operations():
+    collection = MockDatabase()['bulk']
+    collection.insert_one({'code': 'a', 'n': 1})
+    with pytest.raises(BulkWriteError) as failure:
+        collection.bulk_write([
+            UpdateOne({'code': 'a'}, {'$inc': {'code': 1}}),
+            UpdateOne({'code': 'a'}, {'$inc': {'n': 1}}),
+            'not an operation',
+        ], ordered=False)
+    details = failure.value.details
+    assert [(error['index'], error['code']) for error in details['writeErrors']] == [(0, 2), (2, 2)]
+    assert details['nModified'] == 1
+    assert collection.find_one({'code': 'a'})['n'] == 2
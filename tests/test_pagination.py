@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.mock_db import MockDatabase
+from app.utils.pagination import InvalidCursor, decode_cursor, find_page
+
+
+def _pages(collection, key, direction, limit):
+    pages, cursor = [], None
+    while True:
+        documents, cursor = find_page(collection, {'user_id': 'u1'}, key, direction, limit, cursor)
+        pages.append([document['n'] for document in documents])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('direction', [1, -1])
+def test_pages_cover_every_document_once(direction):
+    collection = MockDatabase()['tasks']
+    start = datetime(2024, 1, 1)
+    for n in range(11):
+        # Ties on the sort key and documents without one
+        collection.insert_one({'user_id': 'u1', 'n': n, 'created_at': start + timedelta(days=n // 3) if n % 4 else None})
+    collection.insert_one({'user_id': 'u2', 'n': 99, 'created_at': start})
+
+    expected = [document['n'] for document in
+                collection.find({'user_id': 'u1'}).sort([('created_at', direction), ('_id', direction)])]
+    pages = _pages(collection, 'created_at', direction, 3)
+
+    assert [len(page) for page in pages] == [3, 3, 3, 2]
+    assert sum(pages, []) == expected
+
+
+def test_invalid_cursor():
+    with pytest.raises(InvalidCursor):
+        decode_cursor('not-a-cursor')
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from app.utils import password_helper
+from app.utils.password_helper import PasswordHashingBusy, PasswordHashingPool
+
+
+@pytest.fixture
+def blocked_pool():
+    """A one-worker pool whose worker is stuck until ``release`` is set."""
+    pool = PasswordHashingPool(workers=1, max_queue=1, timeout=5)
+    release = threading.Event()
+    holder = threading.Thread(target=lambda: pool.run(release.wait, 5))
+    holder.start()
+    while pool.stats()['running'] == 0:
+        pass
+    yield pool, release
+    release.set()
+    holder.join()
+
+
+def test_pool_times_out_queued_calls(blocked_pool):
+    pool, _ = blocked_pool
+    pool.timeout = 0.05
+    with pytest.raises(PasswordHashingBusy):
+        pool.run(pow, 2, 8)
+
+    stats = pool.stats()
+    assert (stats['timeouts'], stats['queued'], stats['running']) == (1, 0, 1)
+
+
+def test_pool_rejects_past_the_queue_cap(blocked_pool):
+    pool, release = blocked_pool
+    queued = threading.Thread(target=lambda: pool.run(pow, 2, 8))
+    queued.start()
+    while pool.stats()['queued'] == 0:
+        pass
+    with pytest.raises(PasswordHashingBusy):
+        pool.run(pow, 2, 8)
+    release.set()
+    queued.join()
+
+    stats = pool.stats()
+    assert (stats['rejected'], stats['completed'], stats['queued']) == (1, 2, 0)
+
+
+def test_hash_and_verify_on_the_pool():
+    pool = PasswordHashingPool(workers=2, max_queue=2, timeout=5)
+    hashed = pool.run(password_helper._hash_password, 'Passw0rd!', 4)
+    assert pool.run(password_helper._verify_password, 'Passw0rd!', hashed)
+    assert pool.stats()['completed'] == 2
+
+
+def test_login_answers_503_when_hashing_is_busy(client, monkeypatch):
+    class BusyPool:
+        def run(self, func, *args):
+            raise PasswordHashingBusy('Password hashing queue is full')
+
+    monkeypatch.setattr(password_helper, '_pool', BusyPool())
+    resp = client.post('/api/auth/login', json={'email': 'abla.benslimane@exemple.com', 'password': 'Passw0rd!'})
+    assert resp.status_code == 503
+    assert resp.headers['Retry-After'] == '1'
+
+
+def test_login_rehashes_to_the_configured_cost(app, client):
+    from app.utils.db import get_collection
+
+    email = 'abla.benslimane@exemple.com'
+    with app.app_context():
+        users = get_collection('users')
+        users.update_one({'email': email}, {'$set': {'password': password_helper.hash_password('Passw0rd!', 5)}})
+
+        assert client.post('/api/auth/login', json={'email': email, 'password': 'Passw0rd!'}).status_code == 200
+        stored = users.find_one({'email': email})
+        assert password_helper.hash_rounds(stored['password']) == app.config['BCRYPT_ROUNDS'] == 4
+        assert not password_helper.needs_rehash(stored['password'])
+        assert client.post('/api/auth/login', json={'email': email, 'password': 'Passw0rd!'}).status_code == 200
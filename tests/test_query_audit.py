@@ -0,0 +1,65 @@
+from app.utils.mock_db import MockDatabase
+from app.utils.query_audit import QueryAuditor, query_shape
+
+
+def _tasks():
+    db = MockDatabase()
+    tasks = db['tasks']
+    for i in range(30):
+        tasks.insert_one({'user_id': f'u{i % 3}', 'due_date': f'2024-01-{i % 28 + 1:02d}', 'priority': i % 3})
+    return tasks
+
+
+def test_query_shape_hides_values():
+    assert query_shape({'user_id': 'u1', 'due_date': {'$lt': '2024'}}) == {'due_date': {'$lt': '?'}, 'user_id': '?'}
+    assert query_shape({'$or': [{'a': 1}, {'b': 2}]}) == {'$or': [{'a': '?'}, {'b': '?'}]}
+
+
+def test_mock_explain_plans():
+    tasks = _tasks()
+    assert tasks.find({'user_id': 'u1'}).explain()['queryPlanner']['winningPlan']['stage'] == 'COLLSCAN'
+
+    tasks.create_index([('user_id', 1), ('due_date', 1)])
+    explain = tasks.find({'user_id': 'u1'}).sort('due_date', 1).explain()
+    plan = explain['queryPlanner']['winningPlan']
+    assert plan['stage'] == 'FETCH' and plan['inputStage']['stage'] == 'IXSCAN'
+    assert explain['executionStats']['nReturned'] == 10
+    assert explain['executionStats']['totalDocsExamined'] == 10
+
+    plan = tasks.find({'user_id': 'u1'}).sort('priority', -1).explain()['queryPlanner']['winningPlan']
+    assert plan['stage'] == 'SORT'
+
+
+def test_auditor_flags_collscan_sort_and_ratio():
+    tasks = _tasks()
+    auditor = QueryAuditor(sample_rate=1.0, max_ratio=5)
+    audited = auditor.wrap(tasks)
+
+    assert len(list(audited.find({'user_id': 'u1'}).sort('priority', -1))) == 10
+    assert len(list(audited.find({'user_id': 'u2'}).sort('priority', -1))) == 10
+    assert audited.find_one({'priority': 1, 'user_id': 'u0'}) is None
+    list(audited.aggregate([{'$match': {'user_id': 'u1'}}, {'$group': {'_id': '$priority'}}]))
+
+    report = {entry['shape']: entry for entry in auditor.report()}
+    find = report['tasks.find {"filter": {"user_id": "?"}, "sort": [["priority", -1]]}']
+    assert find['executions'] == 2
+    assert find['issues'] == ['COLLSCAN', 'SORT']
+    assert find['plan'] == 'SORT > COLLSCAN'
+    # 30 documents scanned for no result
+    assert report['tasks.find {"filter": {"priority": "?", "user_id": "?"}}']['issues'] == ['COLLSCAN', 'RATIO']
+    assert 'COLLSCAN' in report['tasks.aggregate [{"$match": {"user_id": "?"}}, "$group"]']['issues']
+
+    tasks.create_index([('user_id', 1), ('priority', -1)])
+    auditor.reset()
+    list(audited.find({'user_id': 'u1'}).sort('priority', -1))
+    assert auditor.report()[0]['issues'] == []
+
+
+def test_auditor_records_cursors_read_by_index():
+    tasks = _tasks()
+    auditor = QueryAuditor(sample_rate=1.0, max_ratio=5)
+    audited = auditor.wrap(tasks)
+
+    assert audited.find({'user_id': 'u1'}).sort('due_date', 1)[0]['user_id'] == 'u1'
+    assert [entry['shape'] for entry in auditor.report()] == [
+        'tasks.find {"filter": {"user_id": "?"}, "sort": [["due_date", 1]]}']
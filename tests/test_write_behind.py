@@ -0,0 +1,70 @@
+import pytest
+from pymongo import UpdateOne
+
+from app.utils import write_behind
+from app.utils.db import get_collection
+
+LOGIN = {'email': 'abla.benslimane@exemple.com', 'password': 'Passw0rd!'}
+
+
+@pytest.fixture
+def queue(client, monkeypatch):
+    """A write-behind queue that only flushes when told to."""
+    queue = write_behind.WriteBehindQueue(flush_interval_ms=60000, max_batch=100, max_queue=2)
+    monkeypatch.setattr(write_behind, '_queue', queue)
+    yield queue
+    queue.stop()
+
+
+def test_login_defers_last_login_until_flush(app, client, queue):
+    with app.app_context():
+        users = get_collection('users')
+        before = users.find_one({'email': LOGIN['email']}).get('last_login')
+
+        assert client.post('/api/auth/login', json=LOGIN).status_code == 200
+        assert client.post('/api/auth/login', json=LOGIN).status_code == 200
+        assert users.find_one({'email': LOGIN['email']}).get('last_login') == before
+        stats = queue.stats()
+        assert (stats['depth'], stats['submitted'], stats['coalesced']) == (1, 2, 1)
+
+        write_behind.flush_writes()
+        assert users.find_one({'email': LOGIN['email']})['last_login'] != before
+        stats = queue.stats()
+        assert (stats['depth'], stats['written'], stats['batches']) == (0, 1, 1)
+
+
+def test_mark_all_as_read_is_queued(app, client, auth_headers, queue):
+    assert client.put('/api/notifications/read-all', headers=auth_headers).status_code == 200
+    assert client.get('/api/notifications?unread_only=true', headers=auth_headers).get_json()['count'] > 0
+
+    write_behind.flush_writes()
+    assert client.get('/api/notifications?unread_only=true', headers=auth_headers).get_json()['count'] == 0
+
+
+def test_mark_all_as_read_without_queue_has_no_cutoff(app, client, auth_headers):
+    from datetime import datetime, timedelta
+
+    with app.app_context():
+        user = get_collection('users').find_one({'email': LOGIN['email']})
+        # Written by a server whose clock runs ahead of this one
+        get_collection('notifications').insert_one({
+            'user_id': str(user['_id']), 'type': 'info', 'title': 'Rappel', 'description': '',
+            'read': False, 'created_at': datetime.utcnow() + timedelta(minutes=1)
+        })
+
+    assert client.put('/api/notifications/read-all', headers=auth_headers).status_code == 200
+    assert client.get('/api/notifications?unread_only=true', headers=auth_headers).get_json()['count'] == 0
+
+
+def test_full_queue_writes_synchronously(app, client, queue):
+    with app.app_context():
+        tasks = get_collection('tasks')
+        ids = [task['_id'] for task in tasks.find({}, {'_id': 1})]
+        for task_id in ids:
+            write_behind.defer_write('tasks', UpdateOne({'_id': task_id}, {'$set': {'title': 'Relancer'}}))
+
+        assert queue.stats()['overflowed'] == 1
+        assert tasks.count_documents({'title': 'Relancer'}) == 1
+        queue.stop()
+        assert tasks.count_documents({'title': 'Relancer'}) == 3
+        assert write_behind.get_write_behind_stats()['depth'] == 0